@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from apps.core.authentication import TENANT_RELATED
+
+User = get_user_model()
+
+
+class TenantModelBackend(ModelBackend):
+    """Carga el usuario de sesión junto con company, subscription y plan."""
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related(*TENANT_RELATED).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
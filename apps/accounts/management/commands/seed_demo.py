@@ -17,7 +17,9 @@ from apps.inventory.models import (
     PurchaseItem,
     Supplier,
 )
+from apps.inventory.services import rebuild_supplier_stats
 from apps.sales.models import CartItem, Order, OrderItem, Sale, SaleItem
+from apps.sales.services import rebuild_sales_rollups
 
 
 class Command(BaseCommand):
@@ -475,6 +477,7 @@ class Command(BaseCommand):
             PurchaseItem.objects.bulk_create(purchase_items)
         if movements:
             InventoryMovement.objects.bulk_create(movements)
+        rebuild_supplier_stats([company.id])
 
     def _create_sales(self, company, branches, products, inventory_cache, seller, options):
         rng = random.Random(901)
@@ -538,6 +541,7 @@ class Command(BaseCommand):
             SaleItem.objects.bulk_create(sale_items)
         if movements:
             InventoryMovement.objects.bulk_create(movements)
+        rebuild_sales_rollups([company.id])
 
     def _create_orders(self, company, branches, products, inventory_cache, options):
         rng = random.Random(777)
@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from apps.core.models import Company
 from apps.core.validators import validate_rut
 from apps.core.serializers import CompanySerializer
+from .tokens import TenantRefreshToken
 
 User = get_user_model()
 
@@ -49,3 +51,7 @@ class MeSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'role', 'rut', 'company', 'is_active']
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = TenantRefreshToken
@@ -0,0 +1,93 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.models import Company
+
+User = get_user_model()
+
+TOKEN_VERSION_CLAIM = 'tv'
+TOKEN_VERSION_TIMEOUT = 60
+
+
+def _token_version_key(user_id) -> str:
+    return f'accounts:token_version:{user_id}'
+
+
+def compute_token_version(role, company_id, is_active, password) -> str:
+    """Huella de los datos que viajan en el token: cambia si cambia rol, compañía, estado o clave."""
+    raw = f'{role}:{company_id}:{int(bool(is_active))}:{password}'
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def token_version_for(user) -> str:
+    return compute_token_version(user.role, user.company_id, user.is_active, user.password)
+
+
+def current_token_version(user_id) -> str | None:
+    """Versión vigente del usuario desde la caché; en un miss se consulta la tabla de usuarios."""
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        row = User.objects.filter(pk=user_id).values_list('role', 'company_id', 'is_active', 'password').first()
+        if row is None:
+            return None
+        version = compute_token_version(*row)
+        cache.set(key, version, TOKEN_VERSION_TIMEOUT)
+    return version
+
+
+def invalidate_token_version(user_id) -> None:
+    cache.delete(_token_version_key(user_id))
+
+
+class TenantRefreshToken(RefreshToken):
+    """Refresh token que, con JWT_TENANT_CLAIMS activo, incluye rol, compañía y estado del usuario.
+
+    Las features del plan no viajan en el token: ``plan_allows`` las lee de la caché de
+    entitlements, que refleja al instante un cambio de suscripción.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        if getattr(settings, 'JWT_TENANT_CLAIMS', False):
+            token['role'] = user.role
+            token['company_id'] = user.company_id
+            token['is_active'] = user.is_active
+            token[TOKEN_VERSION_CLAIM] = token_version_for(user)
+        return token
+
+
+class TenantTokenUser(TokenUser):
+    """Usuario liviano construido desde los claims del token, sin consultar la tabla de usuarios."""
+
+    ROLE_SUPER_ADMIN = User.ROLE_SUPER_ADMIN
+    ROLE_ADMIN_CLIENTE = User.ROLE_ADMIN_CLIENTE
+    ROLE_GERENTE = User.ROLE_GERENTE
+    ROLE_VENDEDOR = User.ROLE_VENDEDOR
+
+    @cached_property
+    def is_active(self) -> bool:
+        return bool(self.token.get('is_active', False))
+
+    @cached_property
+    def role(self) -> str:
+        return self.token.get('role', '')
+
+    @cached_property
+    def company_id(self):
+        return self.token.get('company_id')
+
+    @cached_property
+    def company(self):
+        if not self.company_id:
+            return None
+        # Solo la pk viene cargada (basta para filtrar y comparar); el resto son campos diferidos
+        # que Django consulta al primer acceso, así ``company.name`` nunca devuelve un valor vacío.
+        return Company.from_db(None, ['id'], [self.company_id])
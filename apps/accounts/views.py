@@ -2,10 +2,10 @@ from django.contrib.auth import get_user_model
 from rest_framework import authentication, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from apps.core.permissions import IsActive
 from .permissions import IsAdminOrSuper
 from .serializers import UserSerializer, MeSerializer
+from .tokens import TenantRefreshToken
 
 User = get_user_model()
 
@@ -22,7 +22,11 @@ class MeView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsActive]
 
     def get(self, request):
-        serializer = MeSerializer(request.user)
+        user = request.user
+        if not isinstance(user, User):
+            # Usuario sin estado (claims JWT): el perfil completo sí requiere la fila.
+            user = User.objects.select_related('company').get(pk=user.pk)
+        serializer = MeSerializer(user)
         return Response(serializer.data)
 
 
@@ -31,5 +35,5 @@ class SessionTokenView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsActive]
 
     def post(self, request):
-        refresh = RefreshToken.for_user(request.user)
+        refresh = TenantRefreshToken.for_user(request.user)
         return Response({'refresh': str(refresh), 'access': str(refresh.access_token)})
@@ -4,6 +4,11 @@ from datetime import date
 from typing import Iterable
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apps.core.models import Company, Subscription
 
 User = get_user_model()
 
@@ -14,6 +19,129 @@ DEFAULT_PLAN_MATRIX = {
     'PREMIUM': {'inventory', 'sales', 'orders', 'pos', 'reports', 'user_management', 'branches_unlimited'},
 }
 
+ENTITLEMENTS_CACHE_TIMEOUT = 300
+
+# Generación local del proceso: las señales la incrementan para descartar los
+# resultados memorizados en los objetos usuario de la petición en curso.
+_entitlements_generation = 0
+
+
+def _entitlements_cache_key(company_id) -> str:
+    return f'core:entitlements:{company_id}'
+
+
+def _build_company_entitlements(company_id) -> dict:
+    subscription = Subscription.objects.select_related('plan').filter(company_id=company_id).first()
+    if not subscription:
+        return {'status': None, 'start_date': None, 'end_date': None, 'plan_code': None, 'features': frozenset()}
+    plan = subscription.plan
+    features: set[str] = set()
+    if plan:
+        features.update(plan.features.values_list('code', flat=True))
+        # fallback para planes iniciales basados en código
+        features.update(DEFAULT_PLAN_MATRIX.get(plan.code, set()))
+    return {
+        'status': subscription.status,
+        'start_date': subscription.start_date,
+        'end_date': subscription.end_date,
+        'plan_code': plan.code if plan else None,
+        'features': frozenset(features),
+    }
+
+
+def company_entitlements(company_id) -> dict:
+    """Entitlements de la compañía desde la caché compartida (se calcula en un miss)."""
+    key = _entitlements_cache_key(company_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _build_company_entitlements(company_id)
+        cache.set(key, entry, ENTITLEMENTS_CACHE_TIMEOUT)
+    return entry
+
+
+def invalidate_entitlements(company_ids: Iterable[int]) -> None:
+    global _entitlements_generation
+    _entitlements_generation += 1
+    keys = [_entitlements_cache_key(company_id) for company_id in company_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _entry_is_active(entry: dict) -> bool:
+    if entry['status'] != Subscription.STATUS_ACTIVE or not entry['plan_code']:
+        return False
+    return entry['start_date'] <= timezone.now().date() <= entry['end_date']
+
+
+class Tenant:
+    """Contexto de la compañía del usuario: company, subscription, plan y features vigentes.
+
+    Las features se leen de la caché de entitlements; company/subscription/plan se
+    cargan con una sola consulta (o ninguna si el usuario ya los trae vía select_related).
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.company_id = getattr(user, 'company_id', None)
+
+    def __bool__(self):
+        return bool(self.company_id)
+
+    @cached_property
+    def company(self):
+        if not self.company_id:
+            return None
+        descriptor = getattr(type(self.user), 'company', None)
+        if hasattr(descriptor, 'is_cached') and descriptor.is_cached(self.user):
+            company = self.user.company
+            if Company.subscription.is_cached(company):
+                return company
+        return Company.objects.select_related('subscription__plan').filter(pk=self.company_id).first()
+
+    @cached_property
+    def subscription(self):
+        return getattr(self.company, 'subscription', None) if self.company else None
+
+    @property
+    def plan(self):
+        return self.subscription.plan if self.subscription else None
+
+    @cached_property
+    def entitlements(self) -> dict | None:
+        return company_entitlements(self.company_id) if self.company_id else None
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.entitlements and _entry_is_active(self.entitlements))
+
+    @property
+    def features(self) -> frozenset[str]:
+        return self.entitlements['features'] if self.is_active else frozenset()
+
+    @property
+    def branch_limit(self):
+        return self.subscription.branch_limit if self.subscription else None
+
+    def allows(self, feature_code: str) -> bool:
+        return feature_code in self.features
+
+
+def get_tenant(user) -> Tenant:
+    """Tenant del usuario, memorizado en el objeto usuario durante la petición."""
+    memo = getattr(user, '_tenant', None)
+    company_id = getattr(user, 'company_id', None)
+    if memo and memo[0] == _entitlements_generation and memo[1].company_id == company_id:
+        return memo[1]
+    tenant = Tenant(user)
+    if user is not None:
+        user._tenant = (_entitlements_generation, tenant)
+    return tenant
+
+
+def user_entitlements(user) -> frozenset[str]:
+    """Funcionalidades vigentes para la compañía del usuario."""
+    return get_tenant(user).features
+
 
 def plan_allows(user, feature_code: str) -> bool:
     """Evalúa si el usuario puede acceder a una funcionalidad según su plan y rol."""
@@ -21,20 +149,7 @@ def plan_allows(user, feature_code: str) -> bool:
         return False
     if getattr(user, 'role', None) == getattr(user, 'ROLE_SUPER_ADMIN', 'super_admin'):
         return True
-
-    company = getattr(user, 'company', None)
-    subscription = getattr(company, 'subscription', None) if company else None
-    if not subscription or not subscription.is_active:
-        return False
-    plan = getattr(subscription, 'plan', None)
-    if not plan:
-        return False
-    if hasattr(plan, 'has_feature') and plan.has_feature(feature_code):
-        return True
-
-    # fallback para planes iniciales basados en código
-    feature_set: Iterable[str] = DEFAULT_PLAN_MATRIX.get(plan.code, set())
-    return feature_code in feature_set
+    return get_tenant(user).allows(feature_code)
 
 
 def plan_window_active(subscription) -> bool:
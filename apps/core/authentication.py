@@ -0,0 +1,83 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.accounts.tokens import TOKEN_VERSION_CLAIM, TenantTokenUser, current_token_version
+from apps.core.access import get_tenant
+
+TENANT_RELATED = ('company__subscription__plan',)
+
+
+def attach_tenant(request, user):
+    request._request.tenant = get_tenant(user)
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """JWT que carga usuario, company, subscription y plan en una sola consulta."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            attach_tenant(request, result[0])
+        return result
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            user = self.user_model.objects.select_related(*TENANT_RELATED).get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class TenantClaimsJWTAuthentication(TenantJWTAuthentication):
+    """Modo sin estado: en lecturas arma el usuario desde los claims del token.
+
+    Solo aplica a tokens emitidos con JWT_TENANT_CLAIMS; la versión del token se
+    valida contra una caché de TTL corto para revocar tokens de usuarios modificados.
+    Las escrituras siguen cargando el usuario desde la base de datos.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS and TOKEN_VERSION_CLAIM in validated_token:
+            user = self.get_token_user(validated_token)
+        else:
+            user = self.get_user(validated_token)
+        attach_tenant(request, user)
+        return user, validated_token
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        user = TenantTokenUser(validated_token)
+        if current_token_version(user.id) != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed('Token revocado, vuelve a iniciar sesión', code='token_revoked')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class TenantSessionAuthentication(SessionAuthentication):
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            attach_tenant(request, result[0])
+        return result
@@ -0,0 +1,147 @@
+"""Versiones de datos por empresa y caché con coalescencia de peticiones (single-flight).
+
+``data_version(company_id)`` cambia cada vez que se registran ventas, compras o
+movimientos de inventario de la empresa; incluirla en la clave de caché hace que
+los resultados viejos simplemente dejen de consultarse, sin borrado explícito.
+``catalog_version(company_id)`` solo cambia con escrituras de productos, así los
+cachés del catálogo sobreviven a las ventas; al avanzar se emite ``catalog_changed``
+(por ejemplo para purgar el caché del proxy).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+DATA_VERSION_TIMEOUT = None  # sin expiración: la versión solo avanza
+SINGLE_FLIGHT_LOCK_TIMEOUT = 60
+SINGLE_FLIGHT_WAIT = 30
+SINGLE_FLIGHT_POLL = 0.05
+# Backends cuyo contenido vive dentro de cada proceso: una versión avanzada en un worker no la ven los demás.
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+# Con caché por proceso, lo que dependa de data_version o catalog_version no debe vivir más que esto
+# (segundos) en cada worker.
+PROCESS_LOCAL_MAX_AGE = 30
+
+# Argumento: company_ids (conjunto). Se envía después del commit.
+catalog_changed = Signal()
+
+_MISSING = object()
+_inflight: dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+
+def shared_cache() -> bool:
+    """True si las versiones viven en una caché compartida entre procesos (Redis, Memcached, archivos, base)."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def version_timeout(timeout):
+    """Timeout de una entrada cuya clave lleva una versión: acotado a PROCESS_LOCAL_MAX_AGE sin caché compartida."""
+    return timeout if shared_cache() else min(timeout, PROCESS_LOCAL_MAX_AGE)
+
+
+def _data_version_key(company_id) -> str:
+    return f'core:data_version:{company_id}'
+
+
+def _catalog_version_key(company_id) -> str:
+    return f'core:catalog_version:{company_id}'
+
+
+def _current_version(key) -> int:
+    version = cache.get(key)
+    if version is None:
+        # Si la caché perdió la clave se reinicia desde el reloj: nunca vuelve a un valor ya usado.
+        cache.add(key, time.time_ns(), DATA_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), DATA_VERSION_TIMEOUT)
+
+
+def data_version(company_id) -> int:
+    return _current_version(_data_version_key(company_id))
+
+
+def catalog_version(company_id) -> int:
+    return _current_version(_catalog_version_key(company_id))
+
+
+def bump_data_version(*company_ids):
+    """Invalida los resultados cacheados de las empresas al confirmar la transacción en curso."""
+    keys = {_data_version_key(company_id) for company_id in company_ids if company_id}
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def _bump_catalog(company_ids):
+    _bump({_catalog_version_key(company_id) for company_id in company_ids} | {_data_version_key(company_id) for company_id in company_ids})
+    catalog_changed.send(sender=None, company_ids=company_ids)
+
+
+def bump_catalog_version(*company_ids):
+    """Como ``bump_data_version`` para los cachés del catálogo; también avanza la versión de datos."""
+    ids = {company_id for company_id in company_ids if company_id}
+    if ids:
+        transaction.on_commit(lambda: _bump_catalog(ids))
+
+
+def single_flight(key, compute, timeout):
+    """Devuelve ``cache[key]`` o lo calcula una sola vez aunque lleguen muchas peticiones a la vez.
+
+    Dentro del proceso los hilos esperan un Event del primero; entre procesos se
+    usa ``cache.add`` como candado y los demás sondean la clave hasta que aparezca.
+    Si quien calcula falla o tarda más de SINGLE_FLIGHT_WAIT, cada uno calcula por su cuenta.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+    if not leader:
+        event.wait(SINGLE_FLIGHT_WAIT)
+        value = cache.get(key, _MISSING)
+        return compute() if value is _MISSING else value
+    try:
+        return _compute_once_across_processes(key, compute, timeout)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def _compute_once_across_processes(key, compute, timeout):
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, SINGLE_FLIGHT_LOCK_TIMEOUT):
+        deadline = time.monotonic() + SINGLE_FLIGHT_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(SINGLE_FLIGHT_POLL)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if cache.get(lock_key) is None:
+                break
+        value = compute()
+        cache.set(key, value, timeout)
+        return value
+    try:
+        value = compute()
+        cache.set(key, value, timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
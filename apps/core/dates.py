@@ -0,0 +1,10 @@
+from django.utils import timezone
+
+
+def business_date(value=None):
+    """Día local del negocio (TIME_ZONE, America/Santiago) para ``value`` o para ahora.
+
+    Se guarda en la columna ``business_date`` para filtrar y agrupar por día sin
+    convertir zona horaria fila por fila.
+    """
+    return timezone.localtime(value or timezone.now(), timezone.get_default_timezone()).date()
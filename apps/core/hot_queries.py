@@ -0,0 +1,38 @@
+"""Registro de consultas críticas (multi-tenant) que deben resolverse con índices.
+
+Cada app declara las suyas en un módulo ``hot_queries.py`` con ``@register``; la
+función recibe un ``company_id`` y devuelve el QuerySet tal como lo usan las vistas.
+``manage.py explain_hot_queries`` ejecuta EXPLAIN sobre todas y reporta los escaneos
+secuenciales.
+"""
+import re
+
+from django.utils.module_loading import autodiscover_modules
+
+_registry = {}
+
+_SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)'),
+}
+
+
+def register(name):
+    def decorator(func):
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def registered_queries():
+    autodiscover_modules('hot_queries')
+    return dict(sorted(_registry.items()))
+
+
+def sequential_scans(plan, vendor):
+    """Tablas recorridas completas según el texto de EXPLAIN (vacío si el motor no está soportado)."""
+    pattern = _SEQ_SCAN_PATTERNS.get(vendor)
+    if not pattern:
+        return []
+    return sorted(set(pattern.findall(plan)))
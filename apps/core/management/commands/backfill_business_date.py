@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.inventory.models import InventoryMovement
+from apps.sales.models import Order, Sale
+
+MODELS = (Sale, Order, InventoryMovement)
+
+
+class Command(BaseCommand):
+    help = 'Completa business_date (día local) en ventas, órdenes y movimientos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas (rango de ids) por transacción')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        local_day = TruncDate('created_at', tzinfo=timezone.get_default_timezone())
+        for model in MODELS:
+            pending = model.objects.filter(business_date__isnull=True)
+            bounds = pending.aggregate(first=Min('pk'), last=Max('pk'))
+            updated = 0
+            if bounds['first'] is not None:
+                # Rangos de pk: cada bloque es un UPDATE acotado por índice y una transacción corta.
+                for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+                    with transaction.atomic():
+                        updated += pending.filter(pk__gte=start, pk__lt=start + chunk_size).update(business_date=local_day)
+            self.stdout.write(f'{model._meta.label}: {updated} filas actualizadas')
+        self.stdout.write(self.style.SUCCESS('Backfill de business_date completo'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.core.hot_queries import registered_queries, sequential_scans
+from apps.core.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas críticas registradas y reporta escaneos secuenciales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Empresa usada como parámetro (por defecto la primera)')
+        parser.add_argument('--verbose-plan', action='store_true', help='Muestra el plan completo de cada consulta')
+        parser.add_argument(
+            '--planner-default',
+            action='store_true',
+            help='PostgreSQL: no desactiva enable_seqscan (con tablas pequeñas el planner prefiere seq scan aunque exista índice)',
+        )
+
+    def handle(self, *args, **options):
+        company_id = options.get('company') or Company.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+        vendor = connection.vendor
+        flagged = []
+        for name, build in registered_queries().items():
+            with transaction.atomic():
+                if vendor == 'postgresql' and not options['planner_default']:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = build(company_id).explain()
+            tables = sequential_scans(plan, vendor)
+            if tables:
+                flagged.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: escaneo secuencial en {', '.join(tables)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+            if options['verbose_plan']:
+                self.stdout.write(plan)
+        if flagged:
+            raise CommandError(f'{len(flagged)} consulta(s) sin índice: {", ".join(flagged)}')
@@ -0,0 +1,37 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.utils.functional import SimpleLazyObject
+
+from apps.core.access import get_tenant
+
+TENANT_SESSION_BACKEND = 'apps.accounts.backends.TenantModelBackend'
+LEGACY_SESSION_BACKENDS = {'django.contrib.auth.backends.ModelBackend'}
+
+
+class TenantMiddleware:
+    """Adjunta ``request.tenant`` (company, subscription, plan y features del usuario)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Perezoso: en la API DRF autentica después del middleware y actualiza request.user.
+        request.tenant = SimpleLazyObject(lambda: get_tenant(request.user))
+        return self.get_response(request)
+
+
+class LegacySessionBackendMiddleware:
+    """Traduce la ruta de backend de sesiones emitidas con ModelBackend a TenantModelBackend.
+
+    ``django.contrib.auth`` solo acepta sesiones cuyo backend siga en AUTHENTICATION_BACKENDS;
+    así se conservan sin dejar ModelBackend como respaldo de ``authenticate``. Va entre
+    SessionMiddleware y AuthenticationMiddleware y sirve con cualquier SESSION_ENGINE, también
+    durante un despliegue en que workers viejos siguen emitiendo la ruta anterior.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.session.get(BACKEND_SESSION_KEY) in LEGACY_SESSION_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = TENANT_SESSION_BACKEND
+        return self.get_response(request)
@@ -0,0 +1,33 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.access import invalidate_entitlements
+from apps.core.models import Plan, Subscription
+
+
+def _companies_for_plans(plan_ids):
+    return list(Subscription.objects.filter(plan_id__in=plan_ids).values_list('company_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    invalidate_entitlements([instance.company_id])
+
+
+@receiver(post_save, sender=Plan)
+def plan_saved(sender, instance, **kwargs):
+    invalidate_entitlements(_companies_for_plans([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Plan.features.through)
+def plan_features_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {'post_add', 'post_remove', 'post_clear', 'pre_clear'}:
+        return
+    if not reverse:
+        plan_ids = [instance.pk]
+    elif pk_set:
+        plan_ids = list(pk_set)
+    else:
+        # clear() desde PlanFeature: pk_set no informa los planes afectados.
+        plan_ids = list(instance.plans.values_list('pk', flat=True))
+    invalidate_entitlements(_companies_for_plans(plan_ids))
@@ -0,0 +1,135 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, Product
+from apps.sales.models import CartItem, Sale
+from apps.shop import live
+from apps.shop.services import dashboard_kpis, live_kpis
+
+User = get_user_model()
+
+
+class DashboardKpisTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='ACME', rut='12345678-5')
+        self.gerente = User.objects.create_user(
+            username='gerente', password='pass1234', role=User.ROLE_GERENTE, email='g@example.com',
+            rut='11111111-1', company=self.company,
+        )
+        self.vendedor = User.objects.create_user(
+            username='vendedor', password='pass1234', role=User.ROLE_VENDEDOR, email='v@example.com',
+            rut='22222222-2', company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(3)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(company=self.company, branch=self.branch, product=p, stock=i, reorder_point=1)
+            for i, p in enumerate(self.products)
+        ])
+
+    def test_kpis_come_from_one_query_and_then_from_cache(self):
+        with self.assertNumQueries(1):
+            values, has_data = dashboard_kpis(self.company.id, self.gerente)
+        self.assertTrue(has_data)
+        self.assertEqual(values, {'products': 3, 'suppliers': 0, 'low_stock': 2, 'sales_today': 0, 'pending_orders': 0})
+        with self.assertNumQueries(0):
+            dashboard_kpis(self.company.id, self.gerente)
+
+    def test_writes_invalidate_cached_kpis(self):
+        dashboard_kpis(self.company.id, self.vendedor)
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(company=self.company, branch=self.branch, seller=self.vendedor, total=10, payment_method='efectivo')
+            CartItem.objects.create(user=self.vendedor, product=self.products[0], quantity=1)
+        values, _ = dashboard_kpis(self.company.id, self.vendedor)
+        self.assertEqual((values['my_sales'], values['cart_items']), (1, 1))
+
+    def test_dashboard_view_renders_role_kpis(self):
+        self.client.force_login(self.gerente)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([k['title'] for k in response.context['kpis']][:3], ['Productos', 'Proveedores', 'Stock bajo'])
+        self.assertEqual(response.context['kpis'][2]['value'], 2)
+
+
+class LiveKpiStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='ACME', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', role=User.ROLE_GERENTE, email='g@example.com',
+            rut='11111111-1', company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+
+    async def test_one_query_per_company_tick_shared_by_subscribers(self):
+        with mock.patch.object(live, 'LIVE_KPI_INTERVAL', 0.01), \
+                mock.patch.object(live, 'live_kpis', wraps=live_kpis) as query:
+            streams = [live.kpi_events(self.company.id) for _ in range(3)]
+            first = await asyncio.gather(*[stream.__anext__() for stream in streams])
+            self.assertTrue(all(event.startswith('event: snapshot') for event in first))
+            self.assertEqual(query.call_count, 1)
+
+            await sync_to_async(Sale.objects.create)(
+                company=self.company, branch=self.branch, seller=self.user, total=10, payment_method='efectivo',
+            )
+            deltas = await asyncio.wait_for(asyncio.gather(*[stream.__anext__() for stream in streams]), 5)
+            self.assertEqual(deltas, ['event: delta\ndata: {"sales_today": 1}\n\n'] * 3)
+            for stream in streams:
+                await stream.aclose()
+        self.assertEqual(live.hub.active_companies(), [])
+
+    def test_stream_requires_asgi(self):
+        self.client.force_login(self.user)
+        # 204: el EventSource del dashboard servido por gunicorn deja de reconectarse.
+        self.assertEqual(self.client.get(reverse('dashboard_live')).status_code, 204)
+
+
+class LiveKpiDisconnectTests(TransactionTestCase):
+    def test_stream_ends_after_client_drops_the_connection(self):
+        company = Company.objects.create(name='ACME', rut='12345678-5')
+        user = User.objects.create_user(
+            username='gerente', password='pass1234', role=User.ROLE_GERENTE, email='g@example.com',
+            rut='11111111-1', company=company,
+        )
+        self.client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        path = reverse('dashboard_live')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        delivered = []
+
+        async def receive():
+            return requests.pop() if requests else {'type': 'http.disconnect'}
+
+        async def send(message):
+            # El navegador se fue tras el primer evento: como uvicorn, el resto se descarta sin error.
+            if len(delivered) < 2:
+                delivered.append(message)
+
+        async def serve():
+            # Nadie llama aclose(): el stream tiene que terminar solo.
+            await asyncio.wait_for(get_asgi_application()(scope, receive, send), 5)
+
+        with mock.patch.object(live, 'LIVE_KPI_INTERVAL', 0.01), mock.patch.object(live, 'LIVE_KPI_HEARTBEAT', 0.05), \
+                mock.patch.object(live, 'LIVE_KPI_MAX_AGE', 0.3):
+            async_to_sync(serve)()
+        self.assertEqual(delivered[0]['status'], 200)
+        self.assertTrue(delivered[1]['body'].startswith(b'event: snapshot'))
+        self.assertEqual(live.hub.active_companies(), [])
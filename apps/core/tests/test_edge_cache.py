@@ -0,0 +1,90 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.core.models import Company
+from apps.inventory.imports import import_products
+from apps.inventory.models import Product
+
+User = get_user_model()
+
+
+class _PurgeStandIn(BaseHTTPRequestHandler):
+    """Proxy local de prueba: registra los PURGE como lo haría /_edge/purge de nginx."""
+    received = []
+
+    def do_PURGE(self):
+        self.received.append(self.headers['Surrogate-Key'])
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class EdgeCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _PurgeStandIn)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.purge_url = f'http://127.0.0.1:{cls.server.server_address[1]}/_edge/purge'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _PurgeStandIn.received.clear()
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.product = Product.objects.create(company=self.company, sku='TAL-100', name='Taladro', price=100, cost=60)
+
+    def test_anonymous_pages_are_cacheable_with_surrogate_keys(self):
+        response = self.client.get(reverse('shop-products'), {'company': self.company.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=60', response['Cache-Control'])
+        self.assertEqual(response['X-Accel-Expires'], '60')
+        self.assertEqual(response['Surrogate-Key'], f'catalog-{self.company.id}')
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+        detail = self.client.get(reverse('shop-product-detail', args=[self.product.pk]), {'company': self.company.id})
+        self.assertEqual(detail['Surrogate-Key'], f'catalog-{self.company.id}')
+
+    def test_logged_in_pages_stay_private(self):
+        user = User.objects.create_user(
+            username='cliente', password='pass1234', email='c@example.com', rut='11111111-1',
+            role=User.ROLE_VENDEDOR, company=self.company,
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse('shop-products'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('Surrogate-Key', response.headers)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_product_writes_purge_the_proxy_after_commit(self):
+        with override_settings(EDGE_PURGE_URL=self.purge_url):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.product.price = 120
+                self.product.save()
+                self.assertEqual(_PurgeStandIn.received, [])
+            self.assertEqual(_PurgeStandIn.received, [f'catalog-{self.company.id}'])
+
+            _PurgeStandIn.received.clear()
+            with self.captureOnCommitCallbacks(execute=True):
+                import_products(self.company, iter(['sku,name,price,cost\n', 'MAR-1,Martillo,15,8\n']))
+            self.assertEqual(_PurgeStandIn.received, [f'catalog-{self.company.id}'])
+
+    @override_settings(EDGE_PURGE_URL='http://127.0.0.1:9/_edge/purge')
+    def test_unreachable_proxy_does_not_break_writes(self):
+        with self.assertLogs('apps.shop.edge', 'WARNING') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.product.save()
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(Product.objects.filter(pk=self.product.pk).exists())
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.access import plan_allows
+from apps.core.models import Company, Plan, PlanFeature, Subscription
+
+User = get_user_model()
+
+
+class EntitlementsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='ACME', rut='12345678-5')
+        self.feature_reports, _ = PlanFeature.objects.get_or_create(code='reports', defaults={'label': 'Reportes'})
+        self.feature_extra, _ = PlanFeature.objects.get_or_create(code='extra', defaults={'label': 'Extra'})
+        self.plan, _ = Plan.objects.get_or_create(code='CUSTOM', defaults={'name': 'Custom', 'monthly_price': 0})
+        self.plan.features.set([self.feature_reports])
+        Subscription.objects.create(
+            company=self.company,
+            plan=self.plan,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            status=Subscription.STATUS_ACTIVE,
+        )
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', role=User.ROLE_GERENTE, email='g@example.com',
+            rut='11111111-1', company=self.company,
+        )
+
+    def _fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_cache_hit_costs_no_queries(self):
+        self.assertTrue(plan_allows(self._fresh_user(), 'reports'))
+        user = self._fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(plan_allows(user, 'reports'))
+            self.assertFalse(plan_allows(user, 'extra'))
+
+    def test_plan_feature_change_invalidates(self):
+        self.assertFalse(plan_allows(self._fresh_user(), 'extra'))
+        self.plan.features.add(self.feature_extra)
+        self.assertTrue(plan_allows(self._fresh_user(), 'extra'))
+        self.feature_extra.plans.remove(self.plan)
+        self.assertFalse(plan_allows(self._fresh_user(), 'extra'))
+
+    def test_subscription_save_invalidates_request_memo(self):
+        user = self._fresh_user()
+        self.assertTrue(plan_allows(user, 'reports'))
+        self.company.subscription.cancel()
+        self.assertFalse(plan_allows(user, 'reports'))
@@ -0,0 +1,19 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core.hot_queries import registered_queries, sequential_scans
+
+
+class HotQueriesAuditTests(TestCase):
+    def test_registered_queries_use_indexes(self):
+        self.assertIn('sales.by_company_date', registered_queries())
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertNotIn('escaneo secuencial', out.getvalue())
+
+    def test_detects_sequential_scans(self):
+        self.assertEqual(sequential_scans('Seq Scan on sales_sale  (cost=0.00..1.01)', 'postgresql'), ['sales_sale'])
+        self.assertEqual(sequential_scans('3 0 0 SCAN sales_order', 'sqlite'), ['sales_order'])
+        self.assertEqual(sequential_scans('3 0 0 SEARCH sales_sale USING INDEX x (company_id=?)', 'sqlite'), [])
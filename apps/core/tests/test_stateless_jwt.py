@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.tokens import TenantTokenUser
+from apps.core.models import Company, Plan, PlanFeature, Subscription
+from apps.inventory.models import Product
+
+User = get_user_model()
+
+
+@override_settings(JWT_TENANT_CLAIMS=True)
+class StatelessJwtTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='ACME', rut='12345678-5')
+        feature, _ = PlanFeature.objects.get_or_create(code='reports', defaults={'label': 'Reportes'})
+        plan, _ = Plan.objects.get_or_create(code='PREMIUM', defaults={'name': 'Premium', 'monthly_price': 0})
+        plan.features.add(feature)
+        Subscription.objects.create(
+            company=self.company,
+            plan=plan,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            status=Subscription.STATUS_ACTIVE,
+        )
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', role=User.ROLE_GERENTE, email='g@example.com',
+            rut='11111111-1', company=self.company,
+        )
+        Product.objects.create(company=self.company, sku='SKU-1', name='Producto', price=10, cost=5)
+        self.client = APIClient()
+
+    def _login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'gerente', 'password': 'pass1234'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return AccessToken(response.data['access'])
+
+    def test_token_carries_tenant_claims(self):
+        token = self._login()
+        self.assertEqual(token['role'], User.ROLE_GERENTE)
+        self.assertEqual(token['company_id'], self.company.id)
+        self.assertTrue(token['is_active'])
+        self.assertNotIn('features', token)
+
+    def test_read_endpoint_skips_users_table(self):
+        self._login()
+        self.client.get(reverse('product-list'))  # calienta cachés de versión y entitlements
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('report-stock'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'accounts_user' in q['sql']])
+
+    def test_user_change_revokes_token(self):
+        self._login()
+        self.assertEqual(self.client.get(reverse('product-list')).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('product-list')).status_code, 401)
+
+    def test_token_user_company_loads_fields_on_access(self):
+        token = self._login()
+        user = TenantTokenUser(token)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.company, self.company)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.company.name, 'ACME')
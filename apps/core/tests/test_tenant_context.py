@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.backends import TenantModelBackend
+from apps.core.access import get_tenant
+from apps.core.models import Company, Plan, PlanFeature, Subscription
+from apps.inventory.models import Branch
+
+User = get_user_model()
+
+
+class TenantContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='ACME', rut='12345678-5')
+        feature, _ = PlanFeature.objects.get_or_create(code='inventory', defaults={'label': 'Inventario'})
+        self.plan, _ = Plan.objects.get_or_create(code='BASICO', defaults={'name': 'Básico', 'branch_limit': 1, 'monthly_price': 0})
+        self.plan.branch_limit = 1
+        self.plan.save()
+        self.plan.features.set([feature])
+        Subscription.objects.create(
+            company=self.company,
+            plan=self.plan,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            status=Subscription.STATUS_ACTIVE,
+        )
+        self.user = User.objects.create_user(
+            username='admin', password='pass1234', role=User.ROLE_ADMIN_CLIENTE, email='a@example.com',
+            rut='11111111-1', company=self.company,
+        )
+
+    def test_tenant_loads_company_subscription_plan_in_one_query(self):
+        get_tenant(User.objects.get(pk=self.user.pk)).features  # calienta la caché de entitlements
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            tenant = get_tenant(user)
+            self.assertEqual(tenant.company, self.company)
+            self.assertEqual(tenant.plan, self.plan)
+            self.assertTrue(tenant.allows('inventory'))
+            self.assertEqual(tenant.branch_limit, 1)
+
+    def test_session_backend_preloads_tenant(self):
+        get_tenant(User.objects.get(pk=self.user.pk)).features
+        user = TenantModelBackend().get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            tenant = get_tenant(user)
+            self.assertEqual(tenant.subscription.plan, self.plan)
+            self.assertTrue(tenant.allows('inventory'))
+
+    def test_legacy_model_backend_sessions_stay_valid(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'apps.accounts.backends.TenantModelBackend')
+        self.assertFalse(self.client.login(username='admin', password='wrong'))
+
+    def test_branch_limit_enforced_through_tenant(self):
+        Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        response = client.post(reverse('branch-list'), {'name': 'Norte', 'address': 'Av. 1'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Límite de sucursales', str(response.data))
@@ -0,0 +1,58 @@
+import io
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from apps.inventory.models import Inventory, Branch, Product, Supplier, InventoryMovement
+from apps.sales.models import CartItem, Order, Sale
+User = get_user_model()
+
+URLS = ['/', '/inventory/', '/reports/stock/', '/reports/suppliers/', '/branches/', '/branches/new/', '/subscription/', '/sales/', '/pos/new-sale/', '/purchases/new/', '/inventory/transfer/', '/shop/products/', '/shop/cart/', '/shop/checkout/', '/super-admin/', '/shop/orders/']
+API = ['/api/products/', '/api/branches/', '/api/inventory/', '/api/suppliers/', '/api/purchases/', '/api/sales/', '/api/reports/stock/', '/api/reports/sales/', '/api/reports/suppliers/', '/api/users/me/']
+
+class Smoke(TestCase):
+    def test_pages(self):
+        call_command('seed_demo', '--reset', '--products', '30', '--sales', '20', '--orders', '10', '--purchases', '10', stdout=io.StringIO())
+        for username in ['ana.rios', 'matias.urrutia', 'carlos.fuentes', 'superadmin', 'catalina.vera']:
+            self.client.login(username=username, password='demo12345')
+            for url in URLS:
+                r = self.client.get(url)
+                self.assertIn(r.status_code, (200, 302), (username, url, r.status_code))
+            self.client.logout()
+            api = APIClient(); api.force_authenticate(User.objects.get(username=username))
+            for url in API:
+                r = api.get(url)
+                self.assertIn(r.status_code, (200, 403), (username, url, r.status_code))
+        u = User.objects.get(username='ana.rios')
+        self.client.login(username='ana.rios', password='demo12345')
+        company = u.company
+        b1, b2 = list(Branch.objects.filter(company=company).order_by('id')[:2])
+        p = Product.objects.filter(company=company).first()
+        inv = Inventory.objects.get(branch=b1, product=p)
+        before = inv.stock
+        r = self.client.post('/inventory/transfer/', {'source_branch': b1.id, 'target_branch': b2.id, 'item_product': [p.id], 'item_quantity': [1]})
+        self.assertEqual(r.status_code, 302)
+        inv.refresh_from_db(); self.assertEqual(inv.stock, before - 1)
+        r = self.client.post('/pos/new-sale/', {'branch': b1.id, 'payment_method': 'Efectivo', 'item_product': [p.id], 'item_quantity': ['1']})
+        self.assertEqual(r.status_code, 302, r.content[:3000])
+        sup = Supplier.objects.filter(company=company).first()
+        r = self.client.post('/purchases/new/', {'branch': b1.id, 'supplier': sup.id, 'date': '2024-01-01', 'item_product': [p.id], 'item_quantity': ['3'], 'item_unit_cost': ['10']})
+        self.assertEqual(r.status_code, 302)
+        inv.refresh_from_db(); self.assertEqual(inv.stock, before + 1)
+        CartItem.objects.create(user=u, product=p, quantity=1)
+        orders = Order.objects.count()
+        r = self.client.post('/shop/checkout/', {'branch': b1.id})
+        self.assertEqual(r.status_code, 302)
+        self.assertEqual(Order.objects.count(), orders + 1)
+        api = APIClient(); api.force_authenticate(u)
+        r = api.post('/api/inventory/adjust/', {'branch': b1.id, 'product': p.id, 'quantity_delta': 5, 'reason': 'x'}, format='json')
+        self.assertEqual(r.status_code, 200, r.data)
+        r = api.post('/api/purchases/', {'branch': b1.id, 'supplier': sup.id, 'date': '2024-01-01', 'items': [{'product': p.id, 'quantity': 2, 'unit_cost': '5'}]}, format='json')
+        self.assertEqual(r.status_code, 201, r.data)
+        api.post('/api/cart/add/', {'product': p.id, 'quantity': 1}, format='json')
+        r = api.post('/api/cart/checkout/', {'branch_id': b1.id}, format='json')
+        self.assertEqual(r.status_code, 200, r.data)
+        self.adhoc_extra(u, api, b1, b2, p, sup)
+
+    def adhoc_extra(self, u, api, b1, b2, p, sup):
+        pass
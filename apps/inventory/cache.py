@@ -0,0 +1,26 @@
+"""Caché del catálogo público (``GET /products/``) con ETag fuerte.
+
+La clave y el ETag incluyen ``catalog_version`` de la empresa, que avanza con cada
+escritura de productos: un ``If-None-Match`` vigente se responde con 304 sin
+consultar productos ni serializar, y las entradas viejas expiran solas. Requiere una
+caché compartida entre workers (``CACHE_BACKEND``); con LocMem la vista no emite ETag.
+"""
+import hashlib
+import json
+
+from apps.core.caching import single_flight
+
+CATALOG_CACHE_TIMEOUT = 300
+
+
+def _digest(params) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def catalog_etag(company_id, version, params) -> str:
+    return f'"catalog-{company_id}-{version}-{_digest(params)[:16]}"'
+
+
+def cached_catalog(company_id, version, params, compute, timeout=CATALOG_CACHE_TIMEOUT):
+    """Datos serializados del listado; peticiones simultáneas con la misma clave calculan una vez."""
+    return single_flight(f'inventory:catalog:{company_id}:{version}:{_digest(params)}', compute, timeout)
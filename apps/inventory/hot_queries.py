@@ -0,0 +1,14 @@
+from apps.core.hot_queries import register
+
+from .models import InventoryMovement
+from .services import low_stock_lines
+
+
+@register('inventory.movements_kardex')
+def movements_kardex(company_id):
+    return InventoryMovement.objects.filter(company_id=company_id, branch_id=1, product_id=1).order_by('-created_at')
+
+
+@register('inventory.low_stock')
+def low_stock(company_id):
+    return low_stock_lines(company_id, branch_id=1).order_by('margin', 'pk')
@@ -0,0 +1,330 @@
+"""Importación masiva de compras y del catálogo de productos desde CSV o JSONL.
+
+Compras: cada fila es una línea de compra con las columnas ``reference``, ``branch``
+(id o nombre), ``supplier`` (RUT o id), ``date`` (AAAA-MM-DD), ``sku``,
+``quantity`` y ``unit_cost``. Las filas consecutivas con la misma referencia,
+sucursal, proveedor y fecha forman una compra.
+
+Productos: columnas ``sku``, ``name``, ``price``, ``cost`` y opcionales
+``description`` y ``category``; se insertan o actualizan por (empresa, sku).
+
+El archivo se lee en streaming y se escribe en bloques, cada uno en su propia transacción.
+"""
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.core.caching import bump_catalog_version
+from .models import Branch, Product, Purchase, Supplier
+from .services import post_purchases
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_CHUNK_SIZE = 500
+PRODUCT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+PURCHASE_COLUMNS = {'branch', 'supplier', 'date', 'sku', 'quantity', 'unit_cost'}
+PRODUCT_COLUMNS = {'sku', 'name', 'price', 'cost'}
+PRODUCT_UPDATE_FIELDS = ['name', 'description', 'price', 'cost', 'category']
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_rows(stream, fmt, required=PURCHASE_COLUMNS):
+    """Entrega (número de línea, dict) leyendo el archivo de texto sin cargarlo completo."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        missing = set(required) - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFormatError(f"Faltan columnas: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_num, None
+                continue
+            yield line_num, row if isinstance(row, dict) else None
+    else:
+        raise ImportFormatError(f'Formato no soportado: {fmt}')
+
+
+class _Lookups:
+    """Sucursales, proveedores y productos de la empresa, cargados una vez por importación."""
+
+    def __init__(self, company):
+        self.branches = {}
+        for pk, name in Branch.objects.filter(company=company).values_list('id', 'name'):
+            self.branches[str(pk)] = pk
+            self.branches[name.strip().lower()] = pk
+        self.suppliers = {}
+        for pk, rut in Supplier.objects.filter(company=company).values_list('id', 'rut'):
+            self.suppliers[str(pk)] = pk
+            self.suppliers[rut.strip().upper()] = pk
+        self.products = dict(Product.objects.filter(company=company).values_list('sku', 'id'))
+
+    def branch(self, value):
+        value = str(value or '').strip()
+        return self.branches.get(value) or self.branches.get(value.lower())
+
+    def supplier(self, value):
+        value = str(value or '').strip()
+        return self.suppliers.get(value) or self.suppliers.get(value.upper())
+
+
+def _parse_line(row, lookups, today):
+    branch_id = lookups.branch(row.get('branch'))
+    if branch_id is None:
+        raise ValueError(f"Sucursal desconocida: {row.get('branch')}")
+    supplier_id = lookups.supplier(row.get('supplier'))
+    if supplier_id is None:
+        raise ValueError(f"Proveedor desconocido: {row.get('supplier')}")
+    try:
+        purchase_date = date.fromisoformat(str(row.get('date') or '').strip())
+    except ValueError:
+        raise ValueError('Fecha inválida (formato AAAA-MM-DD)')
+    if purchase_date > today:
+        raise ValueError('La fecha no puede estar en el futuro')
+    sku = str(row.get('sku') or '').strip()
+    product_id = lookups.products.get(sku)
+    if product_id is None:
+        raise ValueError(f'SKU desconocido: {sku}')
+    try:
+        quantity = int(row.get('quantity'))
+    except (TypeError, ValueError):
+        quantity = 0
+    if quantity < 1:
+        raise ValueError('Cantidad inválida (mínimo 1)')
+    try:
+        unit_cost = Decimal(str(row.get('unit_cost')))
+    except InvalidOperation:
+        unit_cost = Decimal('-1')
+    if not unit_cost.is_finite() or unit_cost < 0:
+        raise ValueError('Costo unitario inválido')
+    reference = str(row.get('reference') or '').strip()[:100]
+    key = (reference, branch_id, supplier_id, purchase_date)
+    return key, {'product': product_id, 'quantity': quantity, 'unit_cost': unit_cost}
+
+
+class _ErrorLog:
+    """Cuenta todos los errores pero guarda solo los primeros para el resumen."""
+
+    def __init__(self):
+        self.count = 0
+        self.details = []
+
+    def add(self, line, error):
+        self.count += 1
+        if len(self.details) < MAX_REPORTED_ERRORS:
+            self.details.append({'line': line, 'error': error})
+
+
+def _group_of(row, lookups):
+    """Campos de agrupación que se logran resolver de una fila inválida (None los que no)."""
+    try:
+        purchase_date = date.fromisoformat(str(row.get('date') or '').strip())
+    except ValueError:
+        purchase_date = None
+    reference = str(row.get('reference') or '').strip()[:100]
+    return reference, lookups.branch(row.get('branch')), lookups.supplier(row.get('supplier')), purchase_date
+
+
+def _same_group(bad, key):
+    """¿La línea inválida ``bad`` pudo ser parte de la compra ``key``?"""
+    if bad is None:
+        return False
+    if bad[0] or key[0]:
+        return bad[0] == key[0]
+    # Sin referencia la compra se identifica por sucursal, proveedor y fecha: basta que no contradiga ninguno.
+    return all(part is None or part == other for part, other in zip(bad[1:], key[1:]))
+
+
+def _iter_documents(rows, lookups, errors):
+    """Agrupa líneas consecutivas en compras; una compra con una línea inválida se descarta completa."""
+    today = timezone.now().date()
+    current = None
+    bad_group = None
+    for line_num, row in rows:
+        if row is None:
+            errors.add(line_num, 'Línea con formato inválido')
+            if current:
+                current['invalid'] = True
+            continue
+        try:
+            key, item = _parse_line(row, lookups, today)
+        except ValueError as exc:
+            errors.add(line_num, str(exc))
+            bad_group = _group_of(row, lookups)
+            if current and _same_group(bad_group, current['key']):
+                current['invalid'] = True
+            continue
+        if not _same_group(bad_group, key):
+            bad_group = None
+        if current and current['key'] == key:
+            current['items'].append(item)
+            continue
+        if current and not current['invalid']:
+            yield current
+        reference, branch_id, supplier_id, purchase_date = key
+        current = {
+            'key': key,
+            'line': line_num,
+            'invalid': _same_group(bad_group, key),
+            'reference': reference,
+            'branch': branch_id,
+            'supplier': supplier_id,
+            'date': purchase_date,
+            'items': [item],
+        }
+    if current and not current['invalid']:
+        yield current
+
+
+def _error_message(exc):
+    return str(exc.detail[0] if isinstance(exc.detail, list) else exc.detail)
+
+
+def _post_chunk(company, user, chunk, summary, errors):
+    references = {doc['reference'] for doc in chunk if doc['reference']}
+    existing = set()
+    if references:
+        existing = set(
+            Purchase.objects.filter(company=company, reference__in=references).values_list('supplier_id', 'reference')
+        )
+    pending = []
+    for doc in chunk:
+        if doc['reference'] and (doc['supplier'], doc['reference']) in existing:
+            summary['skipped'] += 1
+            continue
+        if doc['reference']:
+            existing.add((doc['supplier'], doc['reference']))
+        pending.append(doc)
+    if not pending:
+        return
+    try:
+        post_purchases(company, user, pending)
+    except ValidationError:
+        # El bloque se revirtió completo: se reintenta compra por compra para rechazar solo la inválida.
+        posted = []
+        for doc in pending:
+            try:
+                post_purchases(company, user, [doc])
+            except ValidationError as exc:
+                errors.add(doc['line'], _error_message(exc))
+            else:
+                posted.append(doc)
+        pending = posted
+    summary['purchases'] += len(pending)
+    summary['lines'] += sum(len(doc['items']) for doc in pending)
+
+
+def import_purchases(company, user, stream, fmt='csv', chunk_size=IMPORT_CHUNK_SIZE):
+    """Importa compras desde ``stream`` (texto) y devuelve un resumen con los errores por línea.
+
+    Las compras con referencia que ya existe para el mismo proveedor se omiten,
+    por lo que reintentar una importación interrumpida es seguro.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFormatError(f'Formato no soportado: {fmt}')
+    summary = {'purchases': 0, 'lines': 0, 'skipped': 0, 'errors': 0}
+    errors = _ErrorLog()
+    lookups = _Lookups(company)
+    chunk = []
+    for document in _iter_documents(iter_rows(stream, fmt), lookups, errors):
+        chunk.append(document)
+        if len(chunk) >= chunk_size:
+            _post_chunk(company, user, chunk, summary, errors)
+            chunk = []
+    if chunk:
+        _post_chunk(company, user, chunk, summary, errors)
+    summary['errors'] = errors.count
+    summary['error_details'] = errors.details
+    return summary
+
+
+def _parse_decimal(value, label):
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        number = Decimal('-1')
+    if not number.is_finite() or number < 0:
+        raise ValueError(f'{label} inválido (debe ser >= 0)')
+    if number.as_tuple().exponent < -2 or number >= Decimal('1e10'):
+        raise ValueError(f'{label} inválido (máximo 10 enteros y 2 decimales)')
+    return number
+
+
+def _parse_product(row):
+    """Valida una fila de producto con las mismas reglas que ProductSerializer."""
+    sku = str(row.get('sku') or '').strip()
+    if not sku or len(sku) > 50:
+        raise ValueError('SKU vacío o de más de 50 caracteres')
+    name = str(row.get('name') or '').strip()
+    if len(name) < 3 or len(name) > 255:
+        raise ValueError('El nombre debe tener entre 3 y 255 caracteres')
+    category = str(row.get('category') or '').strip()
+    if len(category) > 100:
+        raise ValueError('La categoría no puede superar 100 caracteres')
+    return {
+        'sku': sku,
+        'name': name,
+        'description': str(row.get('description') or '').strip(),
+        'price': _parse_decimal(row.get('price'), 'Precio'),
+        'cost': _parse_decimal(row.get('cost'), 'Costo'),
+        'category': category,
+    }
+
+
+def _upsert_products(company, chunk, summary):
+    # Un SKU repetido en el mismo bloque haría fallar ON CONFLICT: gana la última fila.
+    by_sku = {values['sku']: values for values in chunk}
+    existing = set(Product.objects.filter(company=company, sku__in=list(by_sku)).values_list('sku', flat=True))
+    with transaction.atomic():
+        Product.objects.bulk_create(
+            [Product(company=company, **values) for values in by_sku.values()],
+            update_conflicts=True,
+            unique_fields=['company', 'sku'],
+            update_fields=PRODUCT_UPDATE_FIELDS,
+        )
+        bump_catalog_version(company.id)
+    summary['created'] += len(by_sku) - len(existing)
+    summary['updated'] += len(existing)
+
+
+def import_products(company, stream, fmt='csv', chunk_size=PRODUCT_CHUNK_SIZE):
+    """Inserta o actualiza productos por (empresa, sku) desde ``stream``; devuelve un resumen con errores por línea.
+
+    Las columnas opcionales ausentes (``description``, ``category``) quedan vacías.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFormatError(f'Formato no soportado: {fmt}')
+    summary = {'created': 0, 'updated': 0, 'errors': 0}
+    errors = _ErrorLog()
+    chunk = []
+    for line_num, row in iter_rows(stream, fmt, required=PRODUCT_COLUMNS):
+        if row is None:
+            errors.add(line_num, 'Línea con formato inválido')
+            continue
+        try:
+            chunk.append(_parse_product(row))
+        except ValueError as exc:
+            errors.add(line_num, str(exc))
+            continue
+        if len(chunk) >= chunk_size:
+            _upsert_products(company, chunk, summary)
+            chunk = []
+    if chunk:
+        _upsert_products(company, chunk, summary)
+    summary['errors'] = errors.count
+    summary['error_details'] = errors.details
+    return summary
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Company
+from apps.inventory.snapshot import build_catalog_snapshot, snapshot_enabled, snapshot_path
+
+
+class Command(BaseCommand):
+    help = 'Genera los snapshots del catálogo (CATALOG_SNAPSHOT_DIR) que comparten los workers de gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', help='Limita a una empresa (repetible)')
+
+    def handle(self, *args, **options):
+        if not snapshot_enabled():
+            raise CommandError('CATALOG_SNAPSHOT_DIR no está configurado')
+        companies = Company.objects.order_by('pk')
+        if options.get('company'):
+            companies = companies.filter(pk__in=options['company'])
+        for company_id in companies.values_list('pk', flat=True):
+            count = build_catalog_snapshot(company_id)
+            self.stdout.write(f'Empresa {company_id}: {count} productos -> {snapshot_path(company_id)}')
+        self.stdout.write(self.style.SUCCESS('Snapshots del catálogo generados'))
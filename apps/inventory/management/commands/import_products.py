@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Company
+from apps.inventory.imports import IMPORT_FORMATS, PRODUCT_CHUNK_SIZE, ImportFormatError, import_products
+
+
+class Command(BaseCommand):
+    help = 'Importa (inserta o actualiza por SKU) el catálogo de productos desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar')
+        parser.add_argument('--company', type=int, required=True, help='ID de la empresa')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Por defecto se deduce de la extensión')
+        parser.add_argument('--chunk-size', type=int, default=PRODUCT_CHUNK_SIZE, help='Productos por transacción')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'No existe el archivo {path}')
+        company = Company.objects.filter(pk=options['company']).first()
+        if not company:
+            raise CommandError('Empresa no encontrada')
+        fmt = options.get('format') or ('jsonl' if path.suffix.lower() in ('.jsonl', '.ndjson') else 'csv')
+
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            try:
+                summary = import_products(company, stream, fmt=fmt, chunk_size=max(options['chunk_size'], 1))
+            except ImportFormatError as exc:
+                raise CommandError(str(exc))
+
+        for error in summary['error_details']:
+            self.stderr.write(f"Línea {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Creados: {summary['created']} | Actualizados: {summary['updated']} | Errores: {summary['errors']}"
+        ))
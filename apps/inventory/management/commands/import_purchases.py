@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Company
+from apps.inventory.imports import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, ImportFormatError, import_purchases
+
+
+class Command(BaseCommand):
+    help = 'Importa compras desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar')
+        parser.add_argument('--company', type=int, required=True, help='ID de la empresa')
+        parser.add_argument('--user', help='Usuario que registra las compras')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Por defecto se deduce de la extensión')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Compras por transacción')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'No existe el archivo {path}')
+        company = Company.objects.filter(pk=options['company']).first()
+        if not company:
+            raise CommandError('Empresa no encontrada')
+        user = None
+        if options.get('user'):
+            user = get_user_model().objects.filter(username=options['user'], company=company).first()
+            if not user:
+                raise CommandError('Usuario no encontrado en la empresa')
+        fmt = options.get('format') or ('jsonl' if path.suffix.lower() in ('.jsonl', '.ndjson') else 'csv')
+
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            try:
+                summary = import_purchases(company, user, stream, fmt=fmt, chunk_size=max(options['chunk_size'], 1))
+            except ImportFormatError as exc:
+                raise CommandError(str(exc))
+
+        for error in summary['error_details']:
+            self.stderr.write(f"Línea {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Compras: {summary['purchases']} | Líneas: {summary['lines']} | "
+            f"Omitidas: {summary['skipped']} | Errores: {summary['errors']}"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services import rebuild_supplier_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas por proveedor (SupplierStats) desde las compras registradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', help='Limita a una empresa (repetible)')
+
+    def handle(self, *args, **options):
+        count = rebuild_supplier_stats(options.get('company'))
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas de proveedores reconstruidas: {count} proveedores'))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Company
+from apps.inventory.reorder import LEAD_TIME_DAYS, REVIEW_DAYS, SERVICE_Z, WINDOW_DAYS, suggest_reorder_points
+
+
+class Command(BaseCommand):
+    help = 'Calcula puntos de reorden y cantidades a pedir por proveedor desde el historial de ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', help='Limita a una empresa (repetible)')
+        parser.add_argument('--window', type=int, default=WINDOW_DAYS, help='Días de historial de ventas')
+        parser.add_argument('--lead-time', type=int, default=LEAD_TIME_DAYS, help='Días de reposición del proveedor')
+        parser.add_argument('--review', type=int, default=REVIEW_DAYS, help='Días entre pedidos')
+        parser.add_argument('--z', type=float, default=SERVICE_Z, help='Factor de nivel de servicio')
+        parser.add_argument('--apply', action='store_true', help='Escribe el punto sugerido en Inventory.reorder_point')
+
+    def handle(self, *args, **options):
+        companies = Company.objects.order_by('pk')
+        if options.get('company'):
+            companies = companies.filter(pk__in=options['company'])
+        for company in companies:
+            started = time.monotonic()
+            summary = suggest_reorder_points(
+                company,
+                window_days=max(options['window'], 1),
+                lead_time_days=max(options['lead_time'], 1),
+                review_days=max(options['review'], 0),
+                service_z=options['z'],
+                apply=options['apply'],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{company.name}: {summary['pairs']} pares | a pedir: {summary['to_order']} | "
+                f"reorder_point actualizados: {summary['updated']} ({time.monotonic() - started:.1f}s)"
+            ))
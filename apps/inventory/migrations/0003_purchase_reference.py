@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_alter_inventorymovement_movement_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='reference',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:17
+
+from django.db import migrations, models
+
+from apps.core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0004_transferorder'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('stock__lte', models.F('reorder_point'))), fields=['company', 'branch'], name='inventory_low_stock_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='inventorymovement',
+            index=models.Index(fields=['company', 'branch', 'product', 'created_at'], name='movement_kardex_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:19
+
+import apps.core.dates
+from django.db import migrations, models
+
+from apps.core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0005_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            # Las filas existentes quedan en NULL hasta correr backfill_business_date;
+            # el default solo aplica a las nuevas.
+            database_operations=[
+                migrations.AddField(
+                    model_name='inventorymovement',
+                    name='business_date',
+                    field=models.DateField(editable=False, null=True),
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='inventorymovement',
+                    name='business_date',
+                    field=models.DateField(default=apps.core.dates.business_date, editable=False, null=True),
+                ),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name='inventorymovement',
+            index=models.Index(fields=['company', 'business_date'], name='movement_company_bdate_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_planfeature_remove_subscription_active_and_more'),
+        ('inventory', '0006_business_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierStats',
+            fields=[
+                ('supplier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='inventory.supplier')),
+                ('purchases_count', models.PositiveIntegerField(default=0)),
+                ('last_purchase', models.DateField(blank=True, null=True)),
+                ('products_count', models.PositiveIntegerField(default=0)),
+                ('total_spend', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SupplierProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.product')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.supplier')),
+            ],
+            options={
+                'unique_together': {('supplier', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:37
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+from apps.core.migration_operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY no pueden ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0007_supplierstats'),
+    ]
+
+    operations = [
+        # Primero el nuevo: las consultas de stock bajo nunca quedan sin índice.
+        AddIndexConcurrently(
+            model_name='inventory',
+            index=models.Index(models.F('company'), models.F('branch'), django.db.models.expressions.CombinedExpression(models.F('stock'), '-', models.F('reorder_point')), condition=models.Q(('stock__lte', models.F('reorder_point'))), name='inventory_low_severity_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='inventory',
+            name='inventory_low_stock_idx',
+        ),
+    ]
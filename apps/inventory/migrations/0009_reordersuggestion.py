@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_planfeature_remove_subscription_active_and_more'),
+        ('inventory', '0008_low_stock_severity_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('daily_velocity', models.FloatField()),
+                ('daily_std', models.FloatField()),
+                ('days_of_cover', models.FloatField(blank=True, null=True)),
+                ('stock', models.PositiveIntegerField()),
+                ('reorder_point', models.PositiveIntegerField()),
+                ('order_quantity', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.branch')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.product')),
+                ('supplier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'supplier', 'branch'], name='reorder_company_supplier_idx')],
+                'unique_together': {('company', 'branch', 'product')},
+            },
+        ),
+    ]
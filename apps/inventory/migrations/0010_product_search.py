@@ -0,0 +1,69 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:10
+
+from django.db import migrations
+
+# Misma expresión que apps.inventory.search.PG_DOCUMENT para que el planificador use el índice.
+PG_DOCUMENT = "to_tsvector('simple', name || ' ' || sku || ' ' || category || ' ' || description)"
+
+SQLITE_FORWARD = [
+    # Contenido externo: el índice guarda solo los tokens, el texto se lee de inventory_product.
+    """CREATE VIRTUAL TABLE inventory_product_fts USING fts5(
+        name, sku, category, description,
+        content='inventory_product', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER inventory_product_fts_ai AFTER INSERT ON inventory_product BEGIN
+        INSERT INTO inventory_product_fts(rowid, name, sku, category, description)
+        VALUES (new.id, new.name, new.sku, new.category, new.description);
+    END""",
+    """CREATE TRIGGER inventory_product_fts_ad AFTER DELETE ON inventory_product BEGIN
+        INSERT INTO inventory_product_fts(inventory_product_fts, rowid, name, sku, category, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.category, old.description);
+    END""",
+    """CREATE TRIGGER inventory_product_fts_au AFTER UPDATE ON inventory_product BEGIN
+        INSERT INTO inventory_product_fts(inventory_product_fts, rowid, name, sku, category, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.category, old.description);
+        INSERT INTO inventory_product_fts(rowid, name, sku, category, description)
+        VALUES (new.id, new.name, new.sku, new.category, new.description);
+    END""",
+    "INSERT INTO inventory_product_fts(inventory_product_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS inventory_product_fts_au',
+    'DROP TRIGGER IF EXISTS inventory_product_fts_ad',
+    'DROP TRIGGER IF EXISTS inventory_product_fts_ai',
+    'DROP TABLE IF EXISTS inventory_product_fts',
+]
+POSTGRESQL_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_product_search_idx ON inventory_product USING gin ({PG_DOCUMENT})',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_product_name_trgm_idx ON inventory_product USING gin (name gin_trgm_ops)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_product_sku_trgm_idx ON inventory_product USING gin (sku gin_trgm_ops)',
+]
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX CONCURRENTLY IF EXISTS inventory_product_sku_trgm_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS inventory_product_name_trgm_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS inventory_product_search_idx',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY no pueden ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0009_reordersuggestion'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,39 @@
+"""Índice (company, sku COLLATE "C") para el rango por prefijo de SKU del typeahead en PostgreSQL.
+
+Con una colación ICU/libc el orden no es por punto de código y el rango
+``sku >= prefijo AND sku < prefijo || U+10FFFF`` puede dejar fuera (o incluir) SKU;
+search.py evalúa el rango con "C" y este índice lo respalda. SQLite ya compara
+con BINARY (punto de código): no necesita nada.
+"""
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS inventory_product_company_sku_c_idx '
+    'ON inventory_product (company_id, sku COLLATE "C")',
+]
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX CONCURRENTLY IF EXISTS inventory_product_company_sku_c_idx',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY no pueden ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0010_product_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRESQL_FORWARD}),
+            _run({'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from apps.core.dates import business_date
 from apps.core.models import Company
 from apps.core.validators import validate_rut
 
@@ -42,6 +43,17 @@ class Inventory(models.Model):
 
     class Meta:
         unique_together = ('company', 'branch', 'product')
+        indexes = [
+            # Parcial: solo las filas bajo el punto de reorden (alertas de stock bajo). Toda
+            # escritura de stock lo mantiene; la expresión final ordena por severidad.
+            models.Index(
+                models.F('company'),
+                models.F('branch'),
+                models.F('stock') - models.F('reorder_point'),
+                name='inventory_low_severity_idx',
+                condition=models.Q(stock__lte=models.F('reorder_point')),
+            ),
+        ]
 
 
 class InventoryMovement(models.Model):
@@ -62,8 +74,15 @@ class InventoryMovement(models.Model):
     quantity_delta = models.IntegerField()
     reason = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    business_date = models.DateField(default=business_date, null=True, editable=False)
     created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'branch', 'product', 'created_at'], name='movement_kardex_idx'),
+            models.Index(fields=['company', 'business_date'], name='movement_company_bdate_idx'),
+        ]
+
 
 class Supplier(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='suppliers')
@@ -85,6 +104,7 @@ class Purchase(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE)
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE)
     date = models.DateField()
+    reference = models.CharField(max_length=100, blank=True)
     created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True)
     total_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
@@ -94,3 +114,58 @@ class PurchaseItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     unit_cost = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
+
+
+class SupplierStats(models.Model):
+    """Totales por proveedor mantenidos al registrar compras (``rebuild_supplier_stats`` los recalcula)."""
+    supplier = models.OneToOneField(Supplier, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    purchases_count = models.PositiveIntegerField(default=0)
+    last_purchase = models.DateField(null=True, blank=True)
+    products_count = models.PositiveIntegerField(default=0)
+    total_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+
+class SupplierProduct(models.Model):
+    """Productos distintos comprados a cada proveedor; alimenta SupplierStats.products_count."""
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name='+')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('supplier', 'product')
+
+
+class ReorderSuggestion(models.Model):
+    """Resultado de ``suggest_reorder_points``: punto de reorden y cantidad a pedir por sucursal/producto."""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='+')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    daily_velocity = models.FloatField()
+    daily_std = models.FloatField()
+    days_of_cover = models.FloatField(null=True, blank=True)
+    stock = models.PositiveIntegerField()
+    reorder_point = models.PositiveIntegerField()
+    order_quantity = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('company', 'branch', 'product')
+        indexes = [
+            models.Index(fields=['company', 'supplier', 'branch'], name='reorder_company_supplier_idx'),
+        ]
+
+
+class TransferOrder(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    source_branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='outgoing_transfers')
+    target_branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='incoming_transfers')
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True)
+
+
+class TransferOrderItem(models.Model):
+    transfer = models.ForeignKey(TransferOrder, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
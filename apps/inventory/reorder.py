@@ -0,0 +1,214 @@
+"""Sugerencias de reposición a partir de la velocidad de venta.
+
+Lee los movimientos SALE de la ventana agregados por día en la base (una fila por
+sucursal/producto/día, en bloques) y calcula todo con arreglos NumPy: velocidad
+media, desviación diaria, días de cobertura, punto de reorden y cantidad a pedir
+para llegar al nivel objetivo. No hay consultas ni bucles Python por par.
+
+    reorder_point = velocidad * lead_time + z * desviación * sqrt(lead_time)
+    nivel objetivo = velocidad * (lead_time + revisión) + z * desviación * sqrt(lead_time + revisión)
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from apps.core.caching import bump_data_version
+from apps.core.dates import business_date
+from .models import Inventory, InventoryMovement, Product, PurchaseItem, ReorderSuggestion
+
+WINDOW_DAYS = 56
+LEAD_TIME_DAYS = 7
+REVIEW_DAYS = 7
+SERVICE_Z = 1.65  # ~95 % de nivel de servicio
+CHUNK_SIZE = 20000
+WRITE_BATCH_SIZE = 2000
+
+
+def _pair_keys(branch_ids, product_ids):
+    # Clave única por (sucursal, producto) para cruzar arreglos con searchsorted.
+    return branch_ids.astype(np.int64) << 32 | product_ids.astype(np.int64)
+
+
+def _read_chunks(queryset, fields, dtype=np.int64):
+    """Concatena ``values_list(*fields)`` leído en bloques como un arreglo (n, len(fields))."""
+    blocks, block = [], []
+    for row in queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        block.append(row)
+        if len(block) >= CHUNK_SIZE:
+            blocks.append(np.array(block, dtype=dtype))
+            block = []
+    if block:
+        blocks.append(np.array(block, dtype=dtype))
+    if not blocks:
+        return np.empty((0, len(fields)), dtype=dtype)
+    return np.concatenate(blocks)
+
+
+def _daily_sales(company, since):
+    """(branch, product, unidades) de cada día con ventas en la ventana."""
+    daily = (
+        InventoryMovement.objects.filter(
+            company=company, movement_type=InventoryMovement.MOV_SALE, business_date__gte=since,
+        )
+        .values('branch_id', 'product_id', 'business_date')
+        .annotate(units=-Sum('quantity_delta'))
+        .order_by()
+    )
+    return _read_chunks(daily, ('branch_id', 'product_id', 'units'))
+
+
+def _last_suppliers(company):
+    """Proveedor de la compra más reciente de cada producto (arreglos ids de producto / proveedor)."""
+    last_supplier = (
+        PurchaseItem.objects.filter(product=OuterRef('pk'))
+        .order_by('-purchase__date', '-purchase_id')
+        .values('purchase__supplier_id')[:1]
+    )
+    rows = _read_chunks(
+        Product.objects.filter(company=company).annotate(supplier_id=Subquery(last_supplier))
+        .exclude(supplier_id=None).order_by('pk'),
+        ('pk', 'supplier_id'),
+    )
+    return rows[:, 0], rows[:, 1]
+
+
+def _insert_suggestions(rows, computed_at):
+    # executemany directo: con 100k pares el costo de bulk_create está en instanciar y preparar cada modelo.
+    opts = ReorderSuggestion._meta
+    columns = [
+        opts.get_field(name).column for name in (
+            'company', 'branch', 'product', 'supplier', 'daily_velocity', 'daily_std', 'days_of_cover', 'stock',
+            'reorder_point', 'order_quantity', 'computed_at',
+        )
+    ]
+    qn = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(opts.db_table), ', '.join(qn(column) for column in columns), ', '.join(['%s'] * len(columns)),
+    )
+    stamp = opts.get_field('computed_at').get_db_prep_save(computed_at, connection)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            cursor.executemany(sql, [row + (stamp,) for row in rows[start:start + WRITE_BATCH_SIZE]])
+
+
+def _update_reorder_points(pairs):
+    """``pairs`` son tuplas (reorder_point, inventory_id)."""
+    qn = connection.ops.quote_name
+    sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+        qn(Inventory._meta.db_table), qn('reorder_point'), qn(Inventory._meta.pk.column),
+    )
+    pairs = list(pairs)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), WRITE_BATCH_SIZE):
+            cursor.executemany(sql, pairs[start:start + WRITE_BATCH_SIZE])
+
+
+def compute_suggestions(stock, sales_total, sales_sumsq, *, window_days=WINDOW_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                        review_days=REVIEW_DAYS, service_z=SERVICE_Z):
+    """Cálculo vectorizado; recibe arreglos alineados por fila de inventario y devuelve un dict de arreglos."""
+    velocity = sales_total / window_days
+    # Los días sin ventas cuentan como cero: la varianza sale de las sumas sin armar la matriz diaria.
+    variance = np.maximum(sales_sumsq / window_days - velocity ** 2, 0.0)
+    std = np.sqrt(variance)
+    reorder_point = np.ceil(velocity * lead_time_days + service_z * std * np.sqrt(lead_time_days))
+    horizon = lead_time_days + review_days
+    order_up_to = np.ceil(velocity * horizon + service_z * std * np.sqrt(horizon))
+    order_quantity = np.where(stock <= reorder_point, np.maximum(order_up_to - stock, 0), 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_of_cover = np.where(velocity > 0, stock / velocity, np.nan)
+    return {
+        'daily_velocity': velocity,
+        'daily_std': std,
+        'days_of_cover': days_of_cover,
+        'reorder_point': reorder_point.astype(np.int64),
+        'order_quantity': order_quantity.astype(np.int64),
+    }
+
+
+def suggest_reorder_points(company, *, window_days=WINDOW_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                           review_days=REVIEW_DAYS, service_z=SERVICE_Z, apply=False):
+    """Recalcula las sugerencias de la empresa; con ``apply`` además actualiza Inventory.reorder_point.
+
+    Devuelve ``{'pairs', 'to_order', 'updated'}``.
+    """
+    since = business_date() - timedelta(days=window_days - 1)
+    inventory = _read_chunks(
+        Inventory.objects.filter(company=company).order_by('pk'),
+        ('pk', 'branch_id', 'product_id', 'stock', 'reorder_point'),
+    )
+    if not len(inventory):
+        ReorderSuggestion.objects.filter(company=company).delete()
+        return {'pairs': 0, 'to_order': 0, 'updated': 0}
+    inv_keys = _pair_keys(inventory[:, 1], inventory[:, 2])
+
+    # Totales y sumas de cuadrados por par con bincount sobre el índice del par.
+    daily = _daily_sales(company, since)
+    sales_total = np.zeros(len(inventory))
+    sales_sumsq = np.zeros(len(inventory))
+    if len(daily):
+        order = np.argsort(inv_keys)
+        sorted_keys = inv_keys[order]
+        sale_keys = _pair_keys(daily[:, 0], daily[:, 1])
+        pos = np.clip(np.searchsorted(sorted_keys, sale_keys), 0, len(sorted_keys) - 1)
+        known = sorted_keys[pos] == sale_keys  # ventas de pares sin fila de inventario se ignoran
+        pair_index = order[pos[known]]
+        units = daily[known, 2].astype(float)
+        sales_total = np.bincount(pair_index, weights=units, minlength=len(inventory))
+        sales_sumsq = np.bincount(pair_index, weights=units ** 2, minlength=len(inventory))
+
+    result = compute_suggestions(
+        inventory[:, 3], sales_total, sales_sumsq, window_days=window_days, lead_time_days=lead_time_days,
+        review_days=review_days, service_z=service_z,
+    )
+
+    supplier_products, supplier_ids = _last_suppliers(company)
+    suppliers = np.zeros(len(inventory), dtype=np.int64)
+    if len(supplier_products):
+        pos = np.clip(np.searchsorted(supplier_products, inventory[:, 2]), 0, len(supplier_products) - 1)
+        match = supplier_products[pos] == inventory[:, 2]
+        suppliers[match] = supplier_ids[pos[match]]
+
+    now = timezone.now()
+    days_of_cover = result['days_of_cover'].astype(object)
+    days_of_cover[np.isnan(result['days_of_cover'])] = None
+    rows = list(zip(
+        [company.id] * len(inventory), inventory[:, 1].tolist(), inventory[:, 2].tolist(),
+        [supplier_id or None for supplier_id in suppliers.tolist()], result['daily_velocity'].tolist(),
+        result['daily_std'].tolist(), days_of_cover.tolist(), inventory[:, 3].tolist(),
+        result['reorder_point'].tolist(), result['order_quantity'].tolist(),
+    ))
+    changed = np.flatnonzero(result['reorder_point'] != inventory[:, 4]) if apply else np.empty(0, dtype=np.int64)
+    with transaction.atomic():
+        ReorderSuggestion.objects.filter(company=company).delete()
+        _insert_suggestions(rows, now)
+        if len(changed):
+            _update_reorder_points(
+                zip(result['reorder_point'][changed].tolist(), inventory[changed, 0].tolist()),
+            )
+            bump_data_version(company.id)
+    return {
+        'pairs': len(rows),
+        'to_order': int(np.count_nonzero(result['order_quantity'])),
+        'updated': len(changed),
+    }
+
+
+def draft_purchases(company, branch_id=None, supplier_id=None):
+    """Borradores de compra por proveedor y sucursal con el formato de ``POST /purchases/`` (sin fecha)."""
+    suggestions = ReorderSuggestion.objects.filter(
+        company=company, order_quantity__gt=0, supplier__isnull=False,
+    ).order_by('supplier_id', 'branch_id', 'product_id')
+    if branch_id:
+        suggestions = suggestions.filter(branch_id=branch_id)
+    if supplier_id:
+        suggestions = suggestions.filter(supplier_id=supplier_id)
+    drafts = {}
+    for supplier, branch, product, quantity, cost in suggestions.values_list(
+        'supplier_id', 'branch_id', 'product_id', 'order_quantity', 'product__cost',
+    ).iterator(chunk_size=CHUNK_SIZE):
+        draft = drafts.setdefault((supplier, branch), {'supplier': supplier, 'branch': branch, 'items': []})
+        draft['items'].append({'product': product, 'quantity': quantity, 'unit_cost': cost})
+    return list(drafts.values())
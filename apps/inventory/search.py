@@ -0,0 +1,135 @@
+"""Búsqueda de texto completo en el catálogo (nombre, SKU, categoría y descripción) y typeahead.
+
+SQLite: tabla virtual FTS5 ``inventory_product_fts`` con contenido externo sobre
+``inventory_product``, sincronizada por triggers (también cubre bulk_create y
+``QuerySet.update``). PostgreSQL: índice GIN sobre ``to_tsvector`` más índices
+trigram en nombre y SKU para coincidencias parciales. Ambos los crea la migración
+0010_product_search; ``PG_DOCUMENT`` debe ser la misma expresión que la del índice.
+"""
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Collate
+
+from apps.core.caching import catalog_version
+from .models import Product
+
+FTS_TABLE = 'inventory_product_fts'
+MAX_TERMS = 8
+# Pesos bm25 por columna de la tabla FTS5 (name, sku, category, description).
+FTS_WEIGHTS = (10.0, 10.0, 2.0, 1.0)
+# Columnas calificadas: el queryset puede traer joins con otras tablas que también tienen ``name``.
+PG_DOCUMENT = (
+    "to_tsvector('simple', inventory_product.name || ' ' || inventory_product.sku || ' ' "
+    "|| inventory_product.category || ' ' || inventory_product.description)"
+)
+
+LOOKUP_LIMIT = 20
+LOOKUP_MAX_LIMIT = 50
+LOOKUP_CACHE_TIMEOUT = 300
+LOOKUP_FIELDS = ('id', 'sku', 'name', 'price')
+
+_TERM = re.compile(r'\w+')
+
+
+def search_terms(query):
+    """Palabras de la búsqueda sin operadores ni comillas (nunca llegan crudas al motor)."""
+    return _TERM.findall(query or '')[:MAX_TERMS]
+
+
+def _sqlite_search(queryset, terms):
+    # Cada término como prefijo entre comillas: "tal"* "rojo"* equivale a tal* AND rojo*.
+    match = ' '.join(f'"{term}"*' for term in terms)
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        # El "+" evita que SQLite empiece por inventory_product y repita el MATCH por cada fila
+        # (pasa en COUNT): primero se resuelve el MATCH y luego se busca cada producto por id.
+        where=[f'{table}.id = +{FTS_TABLE}.rowid', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        # bm25 devuelve valores negativos: más bajo es más relevante.
+        select={'search_rank': f'bm25({FTS_TABLE}, {", ".join(map(str, FTS_WEIGHTS))})'},
+    ).order_by('search_rank', 'pk')
+
+
+def _postgresql_search(queryset, terms):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    phrase = ' '.join(terms)
+    # El OR con ILIKE usa los índices trigram: encuentra fragmentos dentro de un SKU o una palabra.
+    matches = RawSQL(
+        f"({PG_DOCUMENT} @@ to_tsquery('simple', %s) OR inventory_product.name ILIKE %s "
+        "OR inventory_product.sku ILIKE %s)",
+        (tsquery, f'%{phrase}%', f'%{phrase}%'),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"ts_rank({PG_DOCUMENT}, to_tsquery('simple', %s)) + word_similarity(%s, inventory_product.name)",
+        (tsquery, phrase),
+    )
+    return queryset.filter(matches).annotate(search_rank=rank).order_by('-search_rank', 'pk')
+
+
+def _fallback_search(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(
+            Q(name__icontains=term) | Q(sku__icontains=term) | Q(category__icontains=term)
+            | Q(description__icontains=term)
+        )
+    return queryset.order_by('name', 'pk')
+
+
+def search_products(queryset, query):
+    """Filtra ``queryset`` (de Product) por ``query`` y lo ordena por relevancia.
+
+    Sin términos válidos devuelve el queryset sin cambios.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(queryset, terms)
+    if connection.vendor == 'postgresql':
+        return _postgresql_search(queryset, terms)
+    return _fallback_search(queryset, terms)
+
+
+def _sku_prefix(queryset, prefixes):
+    """Filtra los SKU que empiezan con alguno de ``prefixes``.
+
+    Rango en vez de startswith: LIKE no usa el índice (company, sku) ni en SQLite ni en
+    PostgreSQL. El rango supone orden por punto de código: SQLite compara con BINARY y en
+    PostgreSQL se evalúa con COLLATE "C" (índice de la migración 0011), no con la de la base.
+    """
+    field = 'sku'
+    if connection.vendor == 'postgresql':
+        queryset, field = queryset.alias(sku_c=Collate('sku', 'C')), 'sku_c'
+    matches = Q()
+    for prefix in prefixes:
+        matches |= Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+    return queryset.filter(matches)
+
+
+def lookup_products(company_id, query, limit=LOOKUP_LIMIT):
+    """Typeahead: primero los SKU que empiezan con ``query`` y luego coincidencias por prefijo de palabra.
+
+    Devuelve dicts con ``LOOKUP_FIELDS``; se cachea por empresa y versión del catálogo.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+    key = f'inventory:lookup:{company_id}:{catalog_version(company_id)}:{limit}:{query.lower()}'
+    results = cache.get(key)
+    if results is not None:
+        return results
+    products = Product.objects.filter(company_id=company_id)
+    results = list(
+        _sku_prefix(products, {query, query.upper()}).order_by('sku').values(*LOOKUP_FIELDS)[:limit]
+    )
+    if len(results) < limit:
+        seen = [row['id'] for row in results]
+        results += list(search_products(products.exclude(pk__in=seen), query).values(*LOOKUP_FIELDS)[:limit - len(results)])
+    cache.set(key, results, LOOKUP_CACHE_TIMEOUT)
+    return results
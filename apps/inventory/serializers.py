@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Product, Branch, Inventory, InventoryMovement, Supplier, Purchase, PurchaseItem
+from .models import (
+    Product, Branch, Inventory, InventoryMovement, Supplier, Purchase, PurchaseItem, ReorderSuggestion, TransferOrder,
+    TransferOrderItem,
+)
 from apps.core.validators import validate_rut
 
 
@@ -38,6 +41,32 @@ class InventorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'company', 'stock']
 
 
+class LowStockSerializer(serializers.ModelSerializer):
+    branch_name = serializers.CharField(source='branch.name', read_only=True)
+    sku = serializers.CharField(source='product.sku', read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    shortfall = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Inventory
+        fields = ['id', 'branch', 'branch_name', 'product', 'sku', 'product_name', 'stock', 'reorder_point', 'shortfall']
+
+    def get_shortfall(self, obj):
+        return obj.reorder_point - obj.stock
+
+
+class ReorderSuggestionSerializer(serializers.ModelSerializer):
+    sku = serializers.CharField(source='product.sku', read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True)
+
+    class Meta:
+        model = ReorderSuggestion
+        fields = [
+            'id', 'branch', 'product', 'sku', 'product_name', 'supplier', 'stock', 'daily_velocity', 'daily_std',
+            'days_of_cover', 'reorder_point', 'order_quantity', 'computed_at',
+        ]
+
+
 class InventoryAdjustSerializer(serializers.Serializer):
     branch = serializers.PrimaryKeyRelatedField(queryset=Branch.objects.all())
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
@@ -45,6 +74,19 @@ class InventoryAdjustSerializer(serializers.Serializer):
     reason = serializers.CharField(max_length=255, allow_blank=True)
 
 
+class InventoryBulkAdjustLineSerializer(serializers.Serializer):
+    # IDs planos: las sucursales/productos se resuelven en lote en el servicio.
+    branch = serializers.IntegerField()
+    product = serializers.IntegerField()
+    quantity_delta = serializers.IntegerField()
+    reason = serializers.CharField(max_length=255, allow_blank=True, required=False, default='')
+
+
+class InventoryBulkAdjustSerializer(serializers.Serializer):
+    lines = InventoryBulkAdjustLineSerializer(many=True, allow_empty=False, max_length=10000)
+    reason = serializers.CharField(max_length=255, allow_blank=True, required=False, default='')
+
+
 class SupplierSerializer(serializers.ModelSerializer):
     rut = serializers.CharField(validators=[validate_rut])
 
@@ -55,6 +97,9 @@ class SupplierSerializer(serializers.ModelSerializer):
 
 
 class PurchaseItemSerializer(serializers.ModelSerializer):
+    # ID plano: post_purchase valida todos los productos con una sola consulta.
+    product = serializers.IntegerField(source='product_id')
+
     class Meta:
         model = PurchaseItem
         fields = ['product', 'quantity', 'unit_cost']
@@ -65,7 +110,7 @@ class PurchaseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Purchase
-        fields = ['id', 'company', 'branch', 'supplier', 'date', 'created_by', 'total_cost', 'items']
+        fields = ['id', 'company', 'branch', 'supplier', 'date', 'reference', 'created_by', 'total_cost', 'items']
         read_only_fields = ['id', 'company', 'created_by', 'total_cost']
 
     def validate_date(self, value):
@@ -77,3 +122,32 @@ class PurchaseSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError('Debe incluir items')
         return value
+
+
+class PurchaseImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=['csv', 'jsonl'], required=False)
+
+
+class ProductImportSerializer(PurchaseImportSerializer):
+    pass
+
+
+class TransferOrderItemSerializer(serializers.ModelSerializer):
+    # ID plano: post_transfer valida todos los productos con una sola consulta.
+    product = serializers.IntegerField(source='product_id')
+
+    class Meta:
+        model = TransferOrderItem
+        fields = ['product', 'quantity']
+
+
+class TransferOrderSerializer(serializers.ModelSerializer):
+    source_branch = serializers.IntegerField(source='source_branch_id')
+    target_branch = serializers.IntegerField(source='target_branch_id')
+    items = TransferOrderItemSerializer(many=True, allow_empty=False, max_length=10000)
+
+    class Meta:
+        model = TransferOrder
+        fields = ['id', 'company', 'source_branch', 'target_branch', 'note', 'created_at', 'created_by', 'items']
+        read_only_fields = ['id', 'company', 'created_at', 'created_by']
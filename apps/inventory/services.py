@@ -0,0 +1,498 @@
+import functools
+import random
+import time
+from decimal import Decimal
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from rest_framework.exceptions import ValidationError
+
+from apps.core.caching import bump_data_version
+from .models import (
+    Branch, Inventory, InventoryMovement, Product, Purchase, PurchaseItem, Supplier, SupplierProduct, SupplierStats,
+    TransferOrder, TransferOrderItem,
+)
+
+BULK_BATCH_SIZE = 1000
+DEADLOCK_RETRIES = 3
+# SQLSTATE de PostgreSQL: deadlock_detected y serialization_failure.
+RETRYABLE_SQLSTATES = {'40P01', '40001'}
+
+
+class StockError(ValidationError):
+    def __init__(self, detail=None, code=None, *, branch_id=None, product_id=None):
+        super().__init__(detail, code)
+        self.branch_id = branch_id
+        self.product_id = product_id
+
+
+class InsufficientStock(StockError):
+    default_detail = 'Stock insuficiente'
+    default_code = 'insufficient_stock'
+
+
+class InventoryNotFound(StockError):
+    default_detail = 'Inventario no encontrado para el producto/sucursal'
+    default_code = 'inventory_not_found'
+
+
+def _is_retryable(exc: OperationalError) -> bool:
+    cause = exc.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    message = str(exc).lower()
+    return sqlstate in RETRYABLE_SQLSTATES or 'deadlock' in message or 'database is locked' in message
+
+
+def retry_on_deadlock(func):
+    """Reintenta la transacción completa ante deadlocks; solo si no hay un atomic externo."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, DEADLOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == DEADLOCK_RETRIES or transaction.get_connection().in_atomic_block or not _is_retryable(exc):
+                    raise
+                time.sleep(random.uniform(0.01, 0.05) * attempt)
+
+    return wrapper
+
+
+@retry_on_deadlock
+def apply_stock_deltas(company, lines, *, movement_type, user=None, create_missing=False):
+    """Aplica variaciones de stock con UPDATE condicionales, sin select_for_update.
+
+    ``lines`` son dicts con ``branch``, ``product`` (ids), ``quantity_delta`` y
+    ``reason`` opcional; se registra un InventoryMovement por línea. Los descuentos
+    usan ``UPDATE ... SET stock = stock - n WHERE stock >= n`` y se valida la cantidad
+    de filas afectadas. Las filas se actualizan en orden (branch, product) para que
+    transacciones concurrentes no se bloqueen mutuamente en orden inverso.
+    """
+    net: dict[tuple[int, int], int] = {}
+    for line in lines:
+        key = (line['branch'], line['product'])
+        net[key] = net.get(key, 0) + line['quantity_delta']
+
+    with transaction.atomic():
+        for branch_id, product_id in sorted(net):
+            delta = net[(branch_id, product_id)]
+            if delta == 0:
+                continue
+            rows = Inventory.objects.filter(company=company, branch_id=branch_id, product_id=product_id)
+            if delta < 0:
+                if rows.filter(stock__gte=-delta).update(stock=F('stock') + delta):
+                    continue
+                error = InsufficientStock if rows.exists() else InventoryNotFound
+                raise error(branch_id=branch_id, product_id=product_id)
+            if rows.update(stock=F('stock') + delta):
+                continue
+            if not create_missing:
+                raise InventoryNotFound(branch_id=branch_id, product_id=product_id)
+            _, created = Inventory.objects.get_or_create(
+                company=company, branch_id=branch_id, product_id=product_id, defaults={'stock': delta},
+            )
+            if not created:
+                rows.update(stock=F('stock') + delta)
+
+        bump_data_version(company.id)
+        InventoryMovement.objects.bulk_create(
+            [
+                InventoryMovement(
+                    company=company,
+                    branch_id=line['branch'],
+                    product_id=line['product'],
+                    movement_type=movement_type,
+                    quantity_delta=line['quantity_delta'],
+                    reason=line.get('reason', ''),
+                    created_by=user,
+                )
+                for line in lines
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+
+def low_stock_lines(company, branch_id=None):
+    """Inventario bajo el punto de reorden, anotado con ``margin`` (stock - reorder_point, más negativo = más crítico).
+
+    El filtro coincide con la condición del índice parcial ``inventory_low_severity_idx``,
+    que toda escritura de stock mantiene al día sin código adicional.
+    """
+    qs = Inventory.objects.filter(company=company, stock__lte=F('reorder_point'))
+    if branch_id:
+        qs = qs.filter(branch_id=branch_id)
+    return qs.annotate(margin=F('stock') - F('reorder_point'))
+
+
+def _lock_inventories(company, pairs):
+    """Bloquea (select_for_update) las filas de inventario de los pares (branch_id, product_id) en orden fijo."""
+    by_branch: dict[int, set[int]] = {}
+    for branch_id, product_id in pairs:
+        by_branch.setdefault(branch_id, set()).add(product_id)
+    if not by_branch:
+        return {}
+    condition = Q()
+    for branch_id, product_ids in by_branch.items():
+        condition |= Q(branch_id=branch_id, product_id__in=product_ids)
+    rows = (
+        Inventory.objects.select_for_update()
+        .filter(condition, company=company)
+        .order_by('branch_id', 'product_id')
+    )
+    return {(inv.branch_id, inv.product_id): inv for inv in rows}
+
+
+def bulk_adjust_inventory(company, lines, user, default_reason=''):
+    """Aplica ajustes de stock masivos con un número acotado de consultas.
+
+    Devuelve un resultado por línea, en el orden recibido. Las líneas con sucursal o
+    producto ajeno a la compañía, o que dejarían el stock negativo, se rechazan sin
+    afectar al resto.
+    """
+    branch_ids = {line['branch'] for line in lines}
+    product_ids = {line['product'] for line in lines}
+    valid_branches = set(Branch.objects.filter(company=company, id__in=branch_ids).values_list('id', flat=True))
+    valid_products = set(Product.objects.filter(company=company, id__in=product_ids).values_list('id', flat=True))
+
+    results = [None] * len(lines)
+    pairs = set()
+    for idx, line in enumerate(lines):
+        if line['branch'] not in valid_branches or line['product'] not in valid_products:
+            results[idx] = {'line': idx, 'status': 'error', 'detail': 'Sucursal o producto inválido'}
+        else:
+            pairs.add((line['branch'], line['product']))
+
+    with transaction.atomic():
+        inventories = _lock_inventories(company, pairs)
+        missing = pairs - inventories.keys()
+        if missing:
+            Inventory.objects.bulk_create(
+                [Inventory(company=company, branch_id=b, product_id=p, stock=0) for b, p in missing],
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            inventories.update(_lock_inventories(company, missing))
+
+        changed = {}
+        movements = []
+        for idx, line in enumerate(lines):
+            if results[idx] is not None:
+                continue
+            inventory = inventories[(line['branch'], line['product'])]
+            qty = line['quantity_delta']
+            new_stock = inventory.stock + qty
+            if new_stock < 0:
+                results[idx] = {'line': idx, 'status': 'error', 'detail': 'Stock no puede ser negativo'}
+                continue
+            inventory.stock = new_stock
+            changed[inventory.pk] = inventory
+            movements.append(
+                InventoryMovement(
+                    company=company,
+                    branch_id=line['branch'],
+                    product_id=line['product'],
+                    movement_type=InventoryMovement.MOV_ADJUST,
+                    quantity_delta=qty,
+                    reason=line.get('reason') or default_reason,
+                    created_by=user,
+                )
+            )
+            results[idx] = {'line': idx, 'status': 'ok', 'stock': new_stock}
+
+        if changed:
+            Inventory.objects.bulk_update(list(changed.values()), ['stock'], batch_size=BULK_BATCH_SIZE)
+        if movements:
+            InventoryMovement.objects.bulk_create(movements, batch_size=BULK_BATCH_SIZE)
+            bump_data_version(company.id)
+    return results
+
+
+def apply_stock_increments(company, lines, *, movement_type, user=None):
+    """Suma stock a muchas filas con un número fijo de consultas (no depende de la cantidad de líneas).
+
+    Crea en lote las filas faltantes y aplica ``stock = stock + n`` con un único
+    bulk_update de expresiones F, sin leer ni bloquear el valor actual.
+    """
+    net: dict[tuple[int, int], int] = {}
+    for line in lines:
+        if line['quantity_delta'] < 0:
+            raise ValueError('apply_stock_increments solo acepta cantidades positivas')
+        key = (line['branch'], line['product'])
+        net[key] = net.get(key, 0) + line['quantity_delta']
+    if not net:
+        return
+
+    with transaction.atomic():
+        Inventory.objects.bulk_create(
+            [Inventory(company=company, branch_id=b, product_id=p, stock=0) for b, p in sorted(net)],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        by_branch: dict[int, set[int]] = {}
+        for branch_id, product_id in net:
+            by_branch.setdefault(branch_id, set()).add(product_id)
+        condition = Q()
+        for branch_id, product_ids in by_branch.items():
+            condition |= Q(branch_id=branch_id, product_id__in=product_ids)
+        rows = Inventory.objects.filter(condition, company=company).only('pk', 'branch_id', 'product_id').order_by('branch_id', 'product_id')
+        updates = []
+        for inventory in rows:
+            inventory.stock = F('stock') + net[(inventory.branch_id, inventory.product_id)]
+            updates.append(inventory)
+        Inventory.objects.bulk_update(updates, ['stock'], batch_size=BULK_BATCH_SIZE)
+        bump_data_version(company.id)
+        InventoryMovement.objects.bulk_create(
+            [
+                InventoryMovement(
+                    company=company,
+                    branch_id=line['branch'],
+                    product_id=line['product'],
+                    movement_type=movement_type,
+                    quantity_delta=line['quantity_delta'],
+                    reason=line.get('reason', ''),
+                    created_by=user,
+                )
+                for line in lines
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+
+def _validate_purchase_documents(company, documents):
+    branch_ids = {doc['branch'] for doc in documents}
+    supplier_ids = {doc['supplier'] for doc in documents}
+    product_ids = {item['product'] for doc in documents for item in doc['items']}
+    if len(branch_ids) != Branch.objects.filter(company=company, id__in=branch_ids).count():
+        raise ValidationError('Sucursal o proveedor inválido')
+    if len(supplier_ids) != Supplier.objects.filter(company=company, id__in=supplier_ids).count():
+        raise ValidationError('Sucursal o proveedor inválido')
+    if len(product_ids) != Product.objects.filter(company=company, id__in=product_ids).count():
+        raise ValidationError('Producto no pertenece a la empresa del usuario')
+
+
+@retry_on_deadlock
+def post_purchases(company, user, documents):
+    """Registra compras (con sus items, stock y movimientos) en una transacción.
+
+    ``documents`` son dicts con ``branch``, ``supplier`` (ids), ``date``,
+    ``reference`` opcional e ``items`` (``product`` id, ``quantity``, ``unit_cost``).
+    El número de consultas es fijo por lote, sin importar cuántas compras o líneas traiga.
+    """
+    if not documents:
+        return []
+    _validate_purchase_documents(company, documents)
+    purchases = [
+        Purchase(
+            company=company,
+            branch_id=doc['branch'],
+            supplier_id=doc['supplier'],
+            date=doc['date'],
+            reference=doc.get('reference', ''),
+            created_by=user,
+            total_cost=sum((item['quantity'] * Decimal(item['unit_cost']) for item in doc['items']), Decimal('0')),
+        )
+        for doc in documents
+    ]
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Purchase.objects.bulk_create(purchases, batch_size=BULK_BATCH_SIZE)
+        else:
+            for purchase in purchases:
+                purchase.save()
+        PurchaseItem.objects.bulk_create(
+            [
+                PurchaseItem(purchase=purchase, product_id=item['product'], quantity=item['quantity'], unit_cost=item['unit_cost'])
+                for purchase, doc in zip(purchases, documents)
+                for item in doc['items']
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        apply_stock_increments(
+            company,
+            [
+                {'branch': doc['branch'], 'product': item['product'], 'quantity_delta': item['quantity'], 'reason': 'Compra'}
+                for doc in documents
+                for item in doc['items']
+            ],
+            movement_type=InventoryMovement.MOV_PURCHASE,
+            user=user,
+        )
+        record_supplier_purchases(company, purchases, documents)
+    return purchases
+
+
+def _refresh_products_count(stats):
+    distinct_products = (
+        SupplierProduct.objects.filter(supplier_id=OuterRef('supplier_id'))
+        .order_by().values('supplier_id').annotate(n=Count('*')).values('n')
+    )
+    stats.update(
+        products_count=Coalesce(Subquery(distinct_products), 0),
+    )
+
+
+def record_supplier_purchases(company, purchases, documents):
+    """Suma las compras recién registradas a SupplierStats; se llama dentro de la transacción de la compra."""
+    totals: dict[int, dict] = {}
+    pairs = set()
+    for purchase, doc in zip(purchases, documents):
+        entry = totals.setdefault(purchase.supplier_id, {'count': 0, 'spend': Decimal('0'), 'last': purchase.date})
+        entry['count'] += 1
+        entry['spend'] += purchase.total_cost
+        entry['last'] = max(entry['last'], purchase.date)
+        pairs.update((purchase.supplier_id, item['product']) for item in doc['items'])
+    if not totals:
+        return
+    SupplierStats.objects.bulk_create(
+        [SupplierStats(supplier_id=supplier_id, company=company) for supplier_id in sorted(totals)],
+        ignore_conflicts=True,
+    )
+    updates = []
+    for supplier_id in sorted(totals):
+        entry = totals[supplier_id]
+        last = Value(entry['last'])
+        updates.append(SupplierStats(
+            supplier_id=supplier_id,
+            purchases_count=F('purchases_count') + entry['count'],
+            total_spend=F('total_spend') + entry['spend'],
+            last_purchase=Greatest(Coalesce('last_purchase', last), last),
+        ))
+    SupplierStats.objects.bulk_update(updates, ['purchases_count', 'total_spend', 'last_purchase'], batch_size=BULK_BATCH_SIZE)
+    SupplierProduct.objects.bulk_create(
+        [SupplierProduct(supplier_id=supplier_id, product_id=product_id) for supplier_id, product_id in sorted(pairs)],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    _refresh_products_count(SupplierStats.objects.filter(supplier_id__in=list(totals)))
+
+
+def rebuild_supplier_stats(company_ids=None, supplier_ids=None):
+    """Recalcula SupplierStats/SupplierProduct desde Purchase/PurchaseItem; devuelve proveedores procesados."""
+    suppliers = Supplier.objects.all()
+    if company_ids is not None:
+        suppliers = suppliers.filter(company_id__in=company_ids)
+    if supplier_ids is not None:
+        suppliers = suppliers.filter(id__in=supplier_ids)
+    # Agregados por separado: contar compras sobre el join con items las multiplicaría.
+    totals = {
+        row['supplier_id']: row
+        for row in Purchase.objects.filter(supplier__in=suppliers).values('supplier_id').annotate(
+            count=Count('id'), spend=Sum('total_cost'), last=Max('date'),
+        ).order_by()
+    }
+    with transaction.atomic():
+        SupplierProduct.objects.filter(supplier__in=suppliers).delete()
+        SupplierStats.objects.filter(supplier__in=suppliers).delete()
+        pairs = (
+            PurchaseItem.objects.filter(purchase__supplier__in=suppliers)
+            .values_list('purchase__supplier_id', 'product_id').distinct().order_by()
+        )
+        batch = []
+        for supplier_id, product_id in pairs.iterator(chunk_size=2000):
+            batch.append(SupplierProduct(supplier_id=supplier_id, product_id=product_id))
+            if len(batch) >= BULK_BATCH_SIZE:
+                SupplierProduct.objects.bulk_create(batch)
+                batch = []
+        SupplierProduct.objects.bulk_create(batch)
+        stats = [
+            SupplierStats(
+                supplier_id=supplier_id,
+                company_id=company_id,
+                purchases_count=totals.get(supplier_id, {}).get('count', 0),
+                total_spend=totals.get(supplier_id, {}).get('spend') or 0,
+                last_purchase=totals.get(supplier_id, {}).get('last'),
+            )
+            for supplier_id, company_id in suppliers.values_list('id', 'company_id').iterator(chunk_size=2000)
+        ]
+        SupplierStats.objects.bulk_create(stats, batch_size=BULK_BATCH_SIZE)
+        _refresh_products_count(SupplierStats.objects.filter(supplier__in=suppliers))
+    return len(stats)
+
+
+def post_purchase(company, user, validated_data):
+    """Registra una compra a partir de los datos validados de PurchaseSerializer."""
+    document = {
+        'branch': validated_data['branch'].id,
+        'supplier': validated_data['supplier'].id,
+        'date': validated_data['date'],
+        'reference': validated_data.get('reference', ''),
+        'items': [
+            {'product': item['product_id'], 'quantity': item['quantity'], 'unit_cost': item['unit_cost']}
+            for item in validated_data['items']
+        ],
+    }
+    return post_purchases(company, user, [document])[0]
+
+
+@retry_on_deadlock
+def post_transfer(company, user, source_branch_id, target_branch_id, items, note=''):
+    """Registra un traspaso de muchas líneas entre dos sucursales en una transacción.
+
+    ``items`` son dicts con ``product`` (id) y ``quantity``. Las filas de origen y
+    destino se bloquean con un único select_for_update ordenado; el stock se escribe
+    con un bulk_update y los movimientos pareados con un bulk_create.
+    """
+    if source_branch_id == target_branch_id:
+        raise ValidationError('La sucursal de origen y destino no pueden ser la misma.')
+    if Branch.objects.filter(company=company, id__in=[source_branch_id, target_branch_id]).count() != 2:
+        raise ValidationError('Selecciona sucursales válidas.')
+    quantities: dict[int, int] = {}
+    for item in items:
+        quantities[item['product']] = quantities.get(item['product'], 0) + item['quantity']
+    if not quantities:
+        raise ValidationError('Debe incluir items')
+    if Product.objects.filter(company=company, id__in=quantities).count() != len(quantities):
+        raise ValidationError('Producto no pertenece a la empresa del usuario')
+
+    with transaction.atomic():
+        Inventory.objects.bulk_create(
+            [Inventory(company=company, branch_id=target_branch_id, product_id=pid, stock=0) for pid in sorted(quantities)],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        locked = _lock_inventories(
+            company,
+            [(branch_id, pid) for branch_id in (source_branch_id, target_branch_id) for pid in quantities],
+        )
+        updates = []
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            source = locked.get((source_branch_id, product_id))
+            if source is None:
+                raise InventoryNotFound(branch_id=source_branch_id, product_id=product_id)
+            if source.stock < quantity:
+                raise InsufficientStock(branch_id=source_branch_id, product_id=product_id)
+            target = locked[(target_branch_id, product_id)]
+            source.stock -= quantity
+            target.stock += quantity
+            updates.extend([source, target])
+        Inventory.objects.bulk_update(updates, ['stock'], batch_size=BULK_BATCH_SIZE)
+
+        transfer = TransferOrder.objects.create(
+            company=company,
+            source_branch_id=source_branch_id,
+            target_branch_id=target_branch_id,
+            note=note,
+            created_by=user,
+        )
+        TransferOrderItem.objects.bulk_create(
+            [TransferOrderItem(transfer=transfer, product_id=pid, quantity=qty) for pid, qty in quantities.items()],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        movements = []
+        for product_id, quantity in quantities.items():
+            for branch_id, delta in ((source_branch_id, -quantity), (target_branch_id, quantity)):
+                movements.append(InventoryMovement(
+                    company=company,
+                    branch_id=branch_id,
+                    product_id=product_id,
+                    movement_type=InventoryMovement.MOV_TRANSFER,
+                    quantity_delta=delta,
+                    reason=note or f'Traspaso #{transfer.id}',
+                    created_by=user,
+                ))
+        InventoryMovement.objects.bulk_create(movements, batch_size=BULK_BATCH_SIZE)
+        bump_data_version(company.id)
+    return transfer
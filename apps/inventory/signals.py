@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.core.caching import bump_catalog_version, bump_data_version, catalog_changed
+from apps.core.models import Company
+from .models import Branch, Inventory, Product, Purchase, Supplier, SupplierProduct
+from .services import rebuild_supplier_stats
+from .snapshot import discard_catalog_snapshot, snapshot_enabled
+
+
+@receiver([post_save, post_delete], sender=Inventory)
+@receiver([post_save, post_delete], sender=Branch)
+@receiver([post_save, post_delete], sender=Supplier)
+@receiver([post_save, post_delete], sender=Purchase)
+def inventory_data_changed(sender, instance, **kwargs):
+    # Escrituras fila a fila (admin, CRUD de la API); los servicios masivos invalidan por su cuenta.
+    bump_data_version(instance.company_id)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, **kwargs):
+    bump_catalog_version(instance.company_id)
+
+
+@receiver(catalog_changed)
+def catalog_snapshot_stale(sender, company_ids, **kwargs):
+    # Se borra en vez de reconstruirse: una importación emite la señal por bloque y el primer uso lo rehace.
+    if snapshot_enabled():
+        for company_id in company_ids:
+            discard_catalog_snapshot(company_id)
+
+
+@receiver(post_save, sender=Purchase)
+def purchase_saved(sender, instance, created, **kwargs):
+    # Las compras nuevas suman a SupplierStats en post_purchases; una edición recalcula al proveedor.
+    if not created:
+        rebuild_supplier_stats(supplier_ids=[instance.supplier_id])
+
+
+def _rebuild_suppliers_on_commit(origin, supplier_ids):
+    # Un borrado en cascada (sucursal, producto) emite una señal por fila: se junta todo en un solo
+    # recálculo por borrado, guardando los proveedores pendientes en el objeto que lo originó.
+    if not supplier_ids:
+        return
+    pending = getattr(origin, '_pending_supplier_rebuild', None)
+    if pending is None:
+        pending = set()
+
+        def rebuild():
+            if origin is not None:
+                del origin._pending_supplier_rebuild
+            rebuild_supplier_stats(supplier_ids=pending)
+
+        if origin is not None:
+            origin._pending_supplier_rebuild = pending
+        transaction.on_commit(rebuild)
+    pending.update(supplier_ids)
+
+
+def _stats_cascade(origin):
+    # El borrado en cascada de un proveedor o una empresa se lleva también las estadísticas.
+    return getattr(origin, 'model', type(origin)) in (Supplier, Company)
+
+
+@receiver(post_delete, sender=Purchase)
+def purchase_deleted(sender, instance, origin=None, **kwargs):
+    if not _stats_cascade(origin):
+        _rebuild_suppliers_on_commit(origin, [instance.supplier_id])
+
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, origin=None, **kwargs):
+    # Sus filas de SupplierProduct caen en cascada: products_count de esos proveedores debe recalcularse.
+    if not _stats_cascade(origin):
+        supplier_ids = SupplierProduct.objects.filter(product=instance).values_list('supplier_id', flat=True)
+        _rebuild_suppliers_on_commit(origin, list(supplier_ids))
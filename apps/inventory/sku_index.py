@@ -0,0 +1,122 @@
+"""Índice en memoria del catálogo por empresa para resolver escaneos del POS sin ir a la base.
+
+Cada proceso guarda, para las empresas usadas más recientemente (LRU de
+``SKU_INDEX_MAX_COMPANIES``), el catálogo en columnas compactas: ids ordenados y
+precios en centavos en ``array`` (búsqueda por id con bisect), SKU y nombres en
+listas y un diccionario SKU -> fila. El índice se carga al primer uso y se descarta cuando cambia
+``catalog_version`` de la empresa; comprobarla es una lectura de la caché
+compartida, no una consulta SQL. Si la caché es por proceso (LocMem) un worker no ve
+las versiones que avanzan otros, así que además el índice vence a los
+``PROCESS_LOCAL_MAX_AGE`` segundos: el precio que completa el POS nunca queda viejo por más. Con ``CATALOG_SNAPSHOT_DIR`` se usa en su lugar el
+snapshot mapeado en memoria (``snapshot.py``), compartido por todos los workers del host.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+
+from apps.core.caching import PROCESS_LOCAL_MAX_AGE, catalog_version, shared_cache
+from .models import Product
+from .snapshot import catalog_snapshots, snapshot_enabled
+
+SKU_INDEX_MAX_COMPANIES = 32
+SKU_INDEX_CHUNK_SIZE = 5000
+
+IndexedProduct = namedtuple('IndexedProduct', 'id sku name price')
+
+
+class SkuIndex:
+    def __init__(self, company_id, version, rows):
+        """``rows`` son tuplas (id, sku, name, price) ordenadas por id."""
+        self.company_id = company_id
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._ids = array('q')
+        self._cents = array('q')
+        self._skus = []
+        self._names = []
+        for product_id, sku, name, price in rows:
+            self._ids.append(product_id)
+            self._cents.append(int(price * 100))
+            self._skus.append(sku)
+            self._names.append(name)
+        self._row_by_sku = {sku: row for row, sku in enumerate(self._skus)}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _product(self, row):
+        if row is None:
+            return None
+        return IndexedProduct(self._ids[row], self._skus[row], self._names[row], Decimal(self._cents[row]).scaleb(-2))
+
+    def by_id(self, product_id):
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return None
+        row = bisect_left(self._ids, product_id)
+        return self._product(row if row < len(self._ids) and self._ids[row] == product_id else None)
+
+    def by_sku(self, code):
+        code = (code or '').strip()
+        row = self._row_by_sku.get(code)
+        if row is None:
+            row = self._row_by_sku.get(code.upper())
+        return self._product(row)
+
+    def instance(self, product):
+        """Product sin consulta (solo id, empresa, SKU, nombre y precio) para asignarlo como FK."""
+        return Product(id=product.id, company_id=self.company_id, sku=product.sku, name=product.name, price=product.price)
+
+
+def _load(company_id, version):
+    rows = Product.objects.filter(company_id=company_id).order_by('pk').values_list('id', 'sku', 'name', 'price')
+    return SkuIndex(company_id, version, rows.iterator(chunk_size=SKU_INDEX_CHUNK_SIZE))
+
+
+class SkuIndexCache:
+    def __init__(self, max_companies=SKU_INDEX_MAX_COMPANIES):
+        self.max_companies = max_companies
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, index, version):
+        if index is None or index.version != version:
+            return False
+        return shared_cache() or time.monotonic() - index.loaded_at < PROCESS_LOCAL_MAX_AGE
+
+    def get(self, company_id):
+        version = catalog_version(company_id)
+        with self._lock:
+            index = self._indexes.get(company_id)
+            if self._fresh(index, version):
+                self._indexes.move_to_end(company_id)
+                return index
+        # Se construye fuera del candado: dos hilos pueden cargar la misma empresa, pero ninguno bloquea a otras.
+        index = _load(company_id, version)
+        with self._lock:
+            self._indexes[company_id] = index
+            self._indexes.move_to_end(company_id)
+            while len(self._indexes) > self.max_companies:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+sku_indexes = SkuIndexCache()
+
+
+def get_sku_index(company_id):
+    if snapshot_enabled():
+        try:
+            return catalog_snapshots.get(company_id)
+        except FileNotFoundError:
+            # El catálogo cambió también durante la reconstrucción: se responde desde memoria.
+            return sku_indexes.get(company_id)
+    return sku_indexes.get(company_id)
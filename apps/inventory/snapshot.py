@@ -0,0 +1,279 @@
+"""Snapshot del catálogo por empresa en un archivo mapeado en memoria, compartido por los workers del host.
+
+Con ``CATALOG_SNAPSHOT_DIR`` configurado, ``get_sku_index`` lee el catálogo
+(id, SKU, nombre, precio y categoría) desde ``<dir>/<empresa>.catalog`` con
+``mmap``: las páginas viven una sola vez en la caché del sistema operativo y
+cada worker solo guarda vistas (``memoryview``) sobre ellas, sin copiar filas.
+El archivo sobrevive a los reinicios de gunicorn.
+
+Formato (orden de bytes nativo; el archivo es local al host):
+
+    cabecera   magic, catalog_version, n, tamaño del texto
+    ids        int64[n]     ordenados (búsqueda por id con bisect)
+    centavos   int64[n]     precio * 100
+    offsets    uint64[3n+1] inicio de sku, nombre y categoría de cada fila en el texto
+    hashes     uint64[n]    blake2b del SKU, ordenados
+    filas      uint64[n]    fila de cada hash
+    texto      UTF-8
+
+``build_catalog_snapshot`` escribe un archivo temporal y lo reemplaza con
+``os.replace``: los lectores que ya lo tenían mapeado siguen con el anterior hasta
+su próximo acceso. Al cambiar el catálogo (``catalog_changed``) se renueva la marca
+``<empresa>.stale`` y se borra el archivo; el primer uso lo reconstruye, una vez por
+host y no una por bloque importado. Si la marca cambió mientras se leía el catálogo,
+el snapshot recién escrito se descarta: la marca está en disco, así que funciona aunque
+la escritura la haya hecho otro worker y la caché de versiones sea por proceso.
+
+Los lectores tampoco confían solo en el borrado: con caché compartida comparan la
+versión de la cabecera con ``catalog_version`` y, con caché por proceso (LocMem),
+donde las versiones no se ven entre workers, reconstruyen el archivo cuando tiene más
+de ``PROCESS_LOCAL_MAX_AGE`` segundos, como vence ``SkuIndex``.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+
+from apps.core.caching import PROCESS_LOCAL_MAX_AGE, catalog_version, shared_cache
+from .models import Product
+
+SNAPSHOT_MAGIC = b'CATSNAP1'
+SNAPSHOT_CHUNK_SIZE = 5000
+SNAPSHOT_MAX_COMPANIES = 32
+HEADER = struct.Struct('=8sQQQ')
+FIELDS = 3  # sku, nombre, categoría
+
+SnapshotProduct = namedtuple('SnapshotProduct', 'id sku name price category')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_enabled():
+    return bool(settings.CATALOG_SNAPSHOT_DIR)
+
+
+def snapshot_path(company_id):
+    return Path(settings.CATALOG_SNAPSHOT_DIR) / f'{int(company_id)}.catalog'
+
+
+def _sku_hash(sku):
+    # hash() de Python cambia entre procesos; el archivo lo leen varios.
+    return int.from_bytes(hashlib.blake2b(sku.encode(), digest_size=8).digest(), 'little')
+
+
+def _marker_path(company_id):
+    return Path(settings.CATALOG_SNAPSHOT_DIR) / f'{int(company_id)}.stale'
+
+
+def _invalidation_token(company_id):
+    try:
+        return _marker_path(company_id).read_bytes()
+    except FileNotFoundError:
+        return b''
+
+
+def _replace_file(path, content):
+    # Temporal + os.replace: basta con permiso sobre la carpeta, aunque el archivo lo haya creado otro usuario.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for part in content:
+                out.write(part)
+            out.flush()
+            os.fsync(out.fileno())
+        os.chmod(tmp, 0o644)  # mkstemp crea 0600; el comando puede correr con otro usuario que los workers
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _stamp(stat):
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def build_catalog_snapshot(company_id):
+    """Escribe el snapshot de la empresa y devuelve la cantidad de productos."""
+    token = _invalidation_token(company_id)
+    version = catalog_version(company_id)
+    ids, cents, offsets, heap, by_hash = array('q'), array('q'), array('Q', [0]), bytearray(), []
+    rows = Product.objects.filter(company_id=company_id).order_by('pk').values_list(
+        'id', 'sku', 'name', 'price', 'category',
+    )
+    for row, (product_id, sku, name, price, category) in enumerate(rows.iterator(chunk_size=SNAPSHOT_CHUNK_SIZE)):
+        ids.append(product_id)
+        cents.append(int(price * 100))
+        for text in (sku, name, category):
+            heap += text.encode()
+            offsets.append(len(heap))
+        by_hash.append((_sku_hash(sku), row))
+    by_hash.sort()
+    hashes = array('Q', (sku_hash for sku_hash, _ in by_hash))
+    hash_rows = array('Q', (row for _, row in by_hash))
+
+    header = HEADER.pack(SNAPSHOT_MAGIC, version, len(ids), len(heap))
+    _replace_file(snapshot_path(company_id), (header, ids, cents, offsets, hashes, hash_rows, heap))
+    # Un cambio confirmado mientras se leía pudo borrar el archivo antes de que existiera: la marca
+    # lo delata aunque venga de otro proceso; la versión cubre además a otros hosts con caché compartida.
+    if _invalidation_token(company_id) != token or catalog_version(company_id) != version:
+        discard_catalog_snapshot(company_id)
+    return len(ids)
+
+
+def discard_catalog_snapshot(company_id):
+    # Primero la marca y después el archivo: un build en curso en cualquier proceso ve la marca nueva.
+    _replace_file(_marker_path(company_id), (os.urandom(16),))
+    try:
+        snapshot_path(company_id).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class CatalogSnapshot:
+    """Lector del snapshot; misma interfaz que ``SkuIndex`` (``by_id``, ``by_sku``, ``instance``)."""
+
+    def __init__(self, company_id, path):
+        self.company_id = company_id
+        with open(path, 'rb') as stream:
+            stat = os.fstat(stream.fileno())
+            self.stamp = _stamp(stat)
+            self.mtime = stat.st_mtime
+            # mmap duplica el descriptor: el archivo puede cerrarse (y reemplazarse) sin afectar al mapa.
+            self._mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, self.version, count, heap_size = HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f'{path} no es un snapshot de catálogo')
+        position = HEADER.size
+
+        def section(length, fmt):
+            nonlocal position
+            start, position = position, position + length * 8
+            return view[start:position].cast(fmt)
+
+        self._ids = section(count, 'q')
+        self._cents = section(count, 'q')
+        self._offsets = section(FIELDS * count + 1, 'Q')
+        self._hashes = section(count, 'Q')
+        self._hash_rows = section(count, 'Q')
+        self._text = view[position:position + heap_size]
+        if len(self._text) != heap_size:
+            raise SnapshotError(f'{path} está truncado')
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _field(self, row, field):
+        slot = row * FIELDS + field
+        return str(self._text[self._offsets[slot]:self._offsets[slot + 1]], 'utf-8')
+
+    def _product(self, row):
+        if row is None:
+            return None
+        return SnapshotProduct(
+            self._ids[row], self._field(row, 0), self._field(row, 1), Decimal(self._cents[row]).scaleb(-2),
+            self._field(row, 2),
+        )
+
+    def by_id(self, product_id):
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return None
+        row = bisect_left(self._ids, product_id)
+        return self._product(row if row < len(self._ids) and self._ids[row] == product_id else None)
+
+    def _row_by_sku(self, code):
+        sku_hash = _sku_hash(code)
+        position = bisect_left(self._hashes, sku_hash)
+        while position < len(self._hashes) and self._hashes[position] == sku_hash:
+            row = self._hash_rows[position]
+            if self._field(row, 0) == code:
+                return row
+            position += 1
+        return None
+
+    def by_sku(self, code):
+        code = (code or '').strip()
+        row = self._row_by_sku(code)
+        if row is None:
+            row = self._row_by_sku(code.upper())
+        return self._product(row)
+
+    def instance(self, product):
+        """Product sin consulta para asignarlo como FK."""
+        return Product(
+            id=product.id, company_id=self.company_id, sku=product.sku, name=product.name, price=product.price,
+            category=product.category,
+        )
+
+
+def _open(company_id, path, build):
+    if build:
+        build_catalog_snapshot(company_id)
+    try:
+        return CatalogSnapshot(company_id, path)
+    except FileNotFoundError:
+        # Un cambio del catálogo lo borró entre el stat (o la construcción) y la apertura.
+        build_catalog_snapshot(company_id)
+        return CatalogSnapshot(company_id, path)
+
+
+class CatalogSnapshotCache:
+    """Snapshots abiertos en el proceso (LRU); un ``stat`` por acceso detecta el archivo reemplazado o borrado."""
+
+    def __init__(self, max_companies=SNAPSHOT_MAX_COMPANIES):
+        self.max_companies = max_companies
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, snapshot):
+        # Un proceso sin CATALOG_SNAPSHOT_DIR (o en otro host) avanza la versión sin borrar el archivo.
+        if shared_cache():
+            return snapshot.version == catalog_version(snapshot.company_id)
+        return time.time() - snapshot.mtime < PROCESS_LOCAL_MAX_AGE
+
+    def get(self, company_id):
+        path = snapshot_path(company_id)
+        try:
+            stamp = _stamp(os.stat(path))
+        except FileNotFoundError:
+            stamp = None
+        with self._lock:
+            snapshot = self._snapshots.get(company_id)
+            if snapshot is not None and snapshot.stamp == stamp and self._fresh(snapshot):
+                self._snapshots.move_to_end(company_id)
+                return snapshot
+        snapshot = _open(company_id, path, build=stamp is None)
+        if not self._fresh(snapshot):
+            snapshot = _open(company_id, path, build=True)
+        # Los mapas descartados no se cierran: otro hilo puede estar leyéndolos; se liberan con la última referencia.
+        with self._lock:
+            self._snapshots[company_id] = snapshot
+            self._snapshots.move_to_end(company_id)
+            while len(self._snapshots) > self.max_companies:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+catalog_snapshots = CatalogSnapshotCache()
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product
+
+User = get_user_model()
+
+
+class InventoryBulkAdjustTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.other_company = Company.objects.create(name='Company B', rut='87654321-4')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.foreign_branch = Branch.objects.create(company=self.other_company, name='Otra', address='Norte')
+        self.products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(60)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, lines):
+        return self.client.post(reverse('inventory-adjust-bulk'), {'lines': lines, 'reason': 'Conteo'}, format='json')
+
+    def test_applies_lines_and_reports_per_line_results(self):
+        Inventory.objects.create(company=self.company, branch=self.branch, product=self.products[0], stock=3)
+        response = self._post([
+            {'branch': self.branch.id, 'product': self.products[0].id, 'quantity_delta': 2},
+            {'branch': self.branch.id, 'product': self.products[1].id, 'quantity_delta': 7},
+            {'branch': self.branch.id, 'product': self.products[0].id, 'quantity_delta': -10},
+            {'branch': self.foreign_branch.id, 'product': self.products[2].id, 'quantity_delta': 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['applied'], 2)
+        self.assertEqual([r['status'] for r in response.data['results']], ['ok', 'ok', 'error', 'error'])
+        self.assertEqual(Inventory.objects.get(branch=self.branch, product=self.products[0]).stock, 5)
+        self.assertEqual(Inventory.objects.get(branch=self.branch, product=self.products[1]).stock, 7)
+        self.assertEqual(InventoryMovement.objects.filter(movement_type=InventoryMovement.MOV_ADJUST).count(), 2)
+
+    def test_query_count_does_not_grow_with_payload(self):
+        def run(products):
+            lines = [{'branch': self.branch.id, 'product': p.id, 'quantity_delta': 1} for p in products]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._post(lines).status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(self.products[:5]), run(self.products[5:60]))
@@ -0,0 +1,66 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.models import Product
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        # El ETag exige una caché compartida entre workers; la de archivos lo es.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name,
+        }})
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.product = Product.objects.create(company=self.company, sku='TAL-100', name='Taladro', price=100, cost=60)
+        Product.objects.create(company=self.company, sku='MAR-1', name='Martillo', price=15, cost=8)
+        self.client = APIClient()
+        self.url = reverse('product-list')
+
+    def _get(self, etag=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, {'company': self.company.id, **params}, **headers)
+
+    def test_cached_listing_and_conditional_get_skip_the_database(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.data), 2)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"catalog-'))
+        self.assertIn('public', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get().data, first.data)
+            not_modified = self._get(etag=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+
+        search = self._get(q='taladro')
+        self.assertNotEqual(search['ETag'], etag)
+        self.assertEqual(search.data['count'], 1)
+
+    def test_product_write_changes_etag_and_content(self):
+        etag = self._get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Taladro percutor'
+            self.product.save()
+        response = self._get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Taladro percutor', [row['name'] for row in response.data])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_never_answers_304(self):
+        response = self._get()
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self._get(etag='*').status_code, 200)
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.caching import PROCESS_LOCAL_MAX_AGE
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, Product
+from apps.inventory.sku_index import SkuIndex, get_sku_index
+from apps.inventory.snapshot import (
+    CatalogSnapshot, CatalogSnapshotCache, build_catalog_snapshot, catalog_snapshots, discard_catalog_snapshot,
+    snapshot_path,
+)
+
+User = get_user_model()
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog_snapshots.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(CATALOG_SNAPSHOT_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.other = Company.objects.create(name='Company B', rut='87654321-4')
+        self.product = Product.objects.create(
+            company=self.company, sku='7801234567890', name='Café molido', price=990, cost=500, category='Almacén',
+        )
+        Product.objects.create(company=self.company, sku='ABC-1', name='Té', price='1.50', cost=1)
+        Product.objects.create(company=self.other, sku='7800000000001', name='Ajeno', price=1, cost=1)
+
+    def test_workers_share_the_mapped_file(self):
+        index = get_sku_index(self.company.id)
+        self.assertIsInstance(index, CatalogSnapshot)
+        self.assertTrue(snapshot_path(self.company.id).exists())
+        with self.assertNumQueries(0):
+            self.assertIs(get_sku_index(self.company.id), index)
+            product = index.by_sku(' 7801234567890 ')
+            self.assertEqual((product.name, product.price, product.category), ('Café molido', 990, 'Almacén'))
+            self.assertEqual(index.by_sku('abc-1').name, 'Té')
+            self.assertEqual(index.by_id(str(self.product.id)).sku, '7801234567890')
+            self.assertIsNone(index.by_sku('7800000000001'))
+            self.assertIsNone(index.by_id('x'))
+            # Otro proceso abre el mismo archivo sin reconstruirlo.
+            worker = CatalogSnapshotCache().get(self.company.id)
+        self.assertEqual(worker.stamp, index.stamp)
+        self.assertEqual(len(worker), 2)
+
+    def test_catalog_change_discards_and_rebuilds(self):
+        get_sku_index(self.company.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 1090
+            self.product.save()
+        self.assertFalse(snapshot_path(self.company.id).exists())
+        self.assertEqual(get_sku_index(self.company.id).by_sku('7801234567890').price, 1090)
+
+    def test_process_local_cache_bounds_snapshot_age(self):
+        get_sku_index(self.company.id)
+        # Escritura de un proceso que no borra el archivo (sin señales, como otro worker sin la carpeta).
+        Product.objects.filter(pk=self.product.pk).update(price=1090)
+        self.assertEqual(get_sku_index(self.company.id).by_sku('7801234567890').price, 990)
+        old = time.time() - PROCESS_LOCAL_MAX_AGE - 1
+        os.utime(snapshot_path(self.company.id), (old, old))
+        self.assertEqual(get_sku_index(self.company.id).by_sku('7801234567890').price, 1090)
+
+    def test_shared_cache_compares_the_header_version(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+        }}):
+            get_sku_index(self.company.id)
+            with override_settings(CATALOG_SNAPSHOT_DIR=''), self.captureOnCommitCallbacks(execute=True):
+                self.product.price = 1090
+                self.product.save()
+            self.assertTrue(snapshot_path(self.company.id).exists())
+            self.assertEqual(get_sku_index(self.company.id).by_sku('7801234567890').price, 1090)
+
+    def test_discarded_rebuilds_fall_back_to_memory_index(self):
+        # Cada reconstrucción se descarta por un cambio concurrente: el archivo nunca llega a existir.
+        with mock.patch('apps.inventory.snapshot.build_catalog_snapshot', return_value=0):
+            index = get_sku_index(self.company.id)
+        self.assertIsInstance(index, SkuIndex)
+        self.assertEqual(index.by_sku('7801234567890').price, 990)
+
+    def test_write_from_another_worker_during_build_discards_it(self):
+        path = snapshot_path(self.company.id)
+        replace = os.replace
+
+        def racing_replace(src, dst):
+            if str(dst) == str(path):
+                # Otro worker confirma un cambio entre la lectura y la publicación; su catalog_version
+                # (caché por proceso) no llega a este proceso, pero la marca en disco sí.
+                discard_catalog_snapshot(self.company.id)
+            replace(src, dst)
+
+        with mock.patch('apps.inventory.snapshot.os.replace', racing_replace):
+            build_catalog_snapshot(self.company.id)
+        self.assertFalse(path.exists())
+        build_catalog_snapshot(self.company.id)
+        self.assertTrue(path.exists())
+
+    def test_pos_sale_resolves_sku_from_snapshot(self):
+        user = User.objects.create_user(
+            username='vendedor', password='pass1234', email='v@example.com', rut='11111111-1',
+            role=User.ROLE_VENDEDOR, company=self.company,
+        )
+        branch = Branch.objects.create(company=self.company, name='Centro', address='Calle 1')
+        Inventory.objects.create(company=self.company, branch=branch, product=self.product, stock=10)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        payload = {'branch': branch.id, 'payment_method': 'Efectivo', 'items': [{'sku': '7801234567890', 'quantity': 1}]}
+        response = client.post(reverse('sale-list'), payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['items'][0]['unit_price'], '990.00')
+
+    def test_command_builds_selected_companies(self):
+        out = StringIO()
+        call_command('build_catalog_snapshot', company=[self.other.id], stdout=out)
+        self.assertTrue(snapshot_path(self.other.id).exists())
+        self.assertFalse(snapshot_path(self.company.id).exists())
+        self.assertIn('1 productos', out.getvalue())
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product
+from apps.inventory.services import apply_stock_deltas, low_stock_lines
+
+User = get_user_model()
+
+
+class LowStockTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.other_branch = Branch.objects.create(company=self.company, name='Sucursal', address='Norte')
+        products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(5)
+        ])
+        # Márgenes stock - reorder_point: -1, -5, 0, +3 (no bajo), -2 en otra sucursal.
+        self.rows = Inventory.objects.bulk_create([
+            Inventory(company=self.company, branch=self.branch, product=products[0], stock=4, reorder_point=5),
+            Inventory(company=self.company, branch=self.branch, product=products[1], stock=0, reorder_point=5),
+            Inventory(company=self.company, branch=self.branch, product=products[2], stock=5, reorder_point=5),
+            Inventory(company=self.company, branch=self.branch, product=products[3], stock=8, reorder_point=5),
+            Inventory(company=self.company, branch=self.other_branch, product=products[4], stock=1, reorder_point=3),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_lists_branch_lines_by_severity_with_cursor_pages(self):
+        url = reverse('inventory-low-stock')
+        response = self.client.get(url, {'branch': self.branch.id, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['sku'] for row in response.data['results']], ['SKU-1', 'SKU-0'])
+        self.assertEqual(response.data['results'][0]['shortfall'], 5)
+        following = self.client.get(response.data['next'])
+        self.assertEqual([row['sku'] for row in following.data['results']], ['SKU-2'])
+        self.assertIsNone(following.data['next'])
+
+    def test_stock_mutations_keep_the_set_current(self):
+        apply_stock_deltas(
+            self.company,
+            [
+                {'branch': self.branch.id, 'product': self.rows[1].product_id, 'quantity_delta': 10},
+                {'branch': self.branch.id, 'product': self.rows[3].product_id, 'quantity_delta': -4},
+            ],
+            movement_type=InventoryMovement.MOV_ADJUST,
+        )
+        skus = list(low_stock_lines(self.company).order_by('margin', 'pk').values_list('product__sku', flat=True))
+        self.assertEqual(skus, ['SKU-4', 'SKU-0', 'SKU-3', 'SKU-2'])
+
+    def test_branch_query_uses_partial_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN específico de SQLite')
+        plan = low_stock_lines(self.company, self.branch.id).order_by('margin', 'pk').explain()
+        self.assertIn('inventory_low_severity_idx', plan)
@@ -0,0 +1,59 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.imports import import_products
+from apps.inventory.models import Product
+
+User = get_user_model()
+
+
+class ProductImportTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.other = Company.objects.create(name='Company B', rut='87654321-4')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        Product.objects.create(company=self.company, sku='A-1', name='Antiguo', price=1, cost=1)
+        Product.objects.create(company=self.other, sku='A-1', name='Otra empresa', price=9, cost=9)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_upserts_by_sku_in_chunks_and_reports_row_errors(self):
+        content = (
+            'sku,name,price,cost,category\n'
+            'A-1,Actualizado,100,60,Herramientas\n'
+            'B-2,Nuevo,50,20,\n'
+            'C-3,No,10,5,\n'
+            'D-4,Precio malo,abc,5,\n'
+            'B-2,Nuevo repetido,55,20,\n'
+        )
+        summary = import_products(self.company, io.StringIO(content), chunk_size=2)
+        self.assertEqual((summary['created'], summary['updated'], summary['errors']), (1, 2, 2))
+        self.assertEqual([e['line'] for e in summary['error_details']], [4, 5])
+        updated = Product.objects.get(company=self.company, sku='A-1')
+        self.assertEqual((updated.name, updated.price, updated.category), ('Actualizado', 100, 'Herramientas'))
+        self.assertEqual(Product.objects.get(company=self.company, sku='B-2').name, 'Nuevo repetido')
+        self.assertEqual(Product.objects.get(company=self.other, sku='A-1').name, 'Otra empresa')
+
+    def test_export_round_trips_through_upload(self):
+        response = self.client.get(reverse('product-export'), {'format': 'jsonl'})
+        self.assertEqual(response.status_code, 200)
+        exported = b''.join(response.streaming_content)
+        self.assertIn(b'"sku": "A-1"', exported)
+
+        upload = SimpleUploadedFile('productos.jsonl', exported.replace(b'Antiguo', b'Renombrado'))
+        response = self.client.post(reverse('product-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(Product.objects.get(company=self.company, sku='A-1').name, 'Renombrado')
+
+        csv_export = self.client.get(reverse('product-export'))
+        self.assertEqual(csv_export['Content-Disposition'], 'attachment; filename="productos.csv"')
@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.models import Company, Plan, PlanFeature, Subscription
+from apps.inventory.models import Branch, Product
+from apps.inventory.search import lookup_products
+
+User = get_user_model()
+
+
+class ProductLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        other = Company.objects.create(name='Company B', rut='87654321-4')
+        pos, _ = PlanFeature.objects.get_or_create(code='pos', defaults={'label': 'POS'})
+        plan, _ = Plan.objects.get_or_create(code='CUSTOM', defaults={'name': 'Custom', 'monthly_price': 0})
+        plan.features.add(pos)
+        Subscription.objects.create(
+            company=self.company, plan=plan, start_date=date.today(), end_date=date.today() + timedelta(days=30),
+            status=Subscription.STATUS_ACTIVE,
+        )
+        self.user = User.objects.create_user(
+            username='vendedor', password='pass1234', email='v@example.com', rut='11111111-1',
+            role=User.ROLE_VENDEDOR, company=self.company,
+        )
+        Branch.objects.create(company=self.company, name='Centro', address='Calle 1')
+        self.drill = Product.objects.create(company=self.company, sku='TAL-100', name='Taladro', price=100, cost=60)
+        self.bits = Product.objects.create(company=self.company, sku='BRO-10', name='Brocas para taladro', price=20, cost=10)
+        Product.objects.create(company=other, sku='TAL-200', name='Taladro ajeno', price=1, cost=1)
+        self.client.force_login(self.user)
+
+    def test_sku_prefix_first_then_name_words(self):
+        rows = lookup_products(self.company.id, 'tal')
+        self.assertEqual([row['id'] for row in rows], [self.drill.id, self.bits.id])
+        self.assertEqual(set(rows[0]), {'id', 'sku', 'name', 'price'})
+        self.assertEqual([row['sku'] for row in lookup_products(self.company.id, 'BRO-1')], ['BRO-10'])
+        self.assertEqual(lookup_products(self.company.id, '  '), [])
+
+    def test_cached_per_company_until_a_product_changes(self):
+        lookup_products(self.company.id, 'bro')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(lookup_products(self.company.id, 'bro')), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(company=self.company, sku='BRO-20', name='Brocas finas', price=5, cost=2)
+        self.assertEqual(len(lookup_products(self.company.id, 'bro')), 2)
+
+    def test_endpoint_and_pos_page_without_embedded_catalog(self):
+        response = self.client.get(reverse('product-lookup'), {'q': 'TAL-100'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['sku'] for row in response.json()], ['TAL-100'])
+
+        page = self.client.get(reverse('pos_new_sale'))
+        self.assertEqual(page.status_code, 200)
+        self.assertContains(page, 'data-product-lookup')
+        self.assertNotContains(page, 'Brocas para taladro')
+
+        page = self.client.post(reverse('pos_new_sale'), {
+            'branch': '', 'product[]': [str(self.drill.id)], 'quantity[]': ['0'],
+        })
+        self.assertContains(page, f'<option value="{self.drill.id}" selected>')
+        self.assertNotContains(page, 'Brocas para taladro')
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.models import Product
+from apps.inventory.search import search_products
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.other = Company.objects.create(name='Company B', rut='87654321-4')
+        self.drill = Product.objects.create(
+            company=self.company, sku='TAL-100', name='Taladro percutor', category='Herramientas',
+            description='Incluye brocas', price=100, cost=60,
+        )
+        self.bits = Product.objects.create(
+            company=self.company, sku='BRO-10', name='Set de brocas', category='Accesorios',
+            description='Para taladro', price=20, cost=10,
+        )
+        Product.objects.create(company=self.company, sku='MAR-1', name='Martillo', price=15, cost=8)
+        Product.objects.create(company=self.other, sku='TAL-100', name='Taladro ajeno', price=1, cost=1)
+        self.client = APIClient()
+
+    def _search(self, query):
+        return list(search_products(Product.objects.filter(company=self.company), query))
+
+    def test_ranks_name_matches_first_and_stays_in_company(self):
+        self.assertEqual(self._search('taladro'), [self.drill, self.bits])
+        self.assertEqual(self._search('tal-100'), [self.drill])
+        self.assertEqual(self._search('herramientas percutor'), [self.drill])
+        self.assertEqual(self._search('"); DROP'), [])
+
+    def test_index_follows_product_writes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('sincronización por triggers de FTS5')
+        self.bits.name = 'Set de puntas'
+        self.bits.description = ''
+        self.bits.save()
+        Product.objects.filter(pk=self.drill.pk).update(name='Atornillador')
+        self.assertEqual(self._search('taladro'), [])
+        self.assertEqual(self._search('atornillador'), [self.drill])
+        self.drill.delete()
+        self.assertEqual(self._search('atornillador'), [])
+
+    def test_api_search_is_paginated(self):
+        response = self.client.get(reverse('product-list'), {'company': self.company.id, 'q': 'taladro', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([row['sku'] for row in response.data['results']], ['TAL-100'])
+        self.assertIsNotNone(response.data['next'])
+
+        plain = self.client.get(reverse('product-list'), {'company': self.company.id})
+        self.assertEqual(len(plain.data), 3)
+
+    def test_shop_catalog_searches_server_side(self):
+        response = self.client.get(reverse('shop-products'), {'company': self.company.id, 'q': 'brocas'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['products']), [self.bits, self.drill])
+        self.assertNotContains(response, 'Martillo')
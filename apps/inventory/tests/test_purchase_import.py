@@ -0,0 +1,120 @@
+import io
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.imports import import_purchases
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product, Purchase, Supplier
+from apps.inventory.services import post_purchases
+
+User = get_user_model()
+
+CSV_HEADER = 'reference,branch,supplier,date,sku,quantity,unit_cost\n'
+
+
+class PurchaseImportTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.supplier = Supplier.objects.create(
+            company=self.company, name='Proveedor', rut='76543210-3', contact_name='Ana',
+            contact_email='ana@example.com', contact_phone='123',
+        )
+        self.products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(40)
+        ])
+
+    def _documents(self, count, lines):
+        return [
+            {
+                'branch': self.branch.id, 'supplier': self.supplier.id, 'date': '2024-01-01', 'reference': f'F-{n}',
+                'items': [{'product': p.id, 'quantity': 2, 'unit_cost': '3.50'} for p in self.products[:lines]],
+            }
+            for n in range(count)
+        ]
+
+    def test_post_purchases_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            post_purchases(self.company, self.user, self._documents(1, 2))
+        with CaptureQueriesContext(connection) as large:
+            post_purchases(self.company, self.user, self._documents(3, 30))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Inventory.objects.get(branch=self.branch, product=self.products[0]).stock, 8)
+        self.assertEqual(Purchase.objects.get(reference='F-0', items__product=self.products[3]).total_cost, 210)
+
+    def test_csv_import_groups_lines_and_rejects_invalid_documents(self):
+        content = CSV_HEADER + (
+            'F-1,Casa Matriz,76543210-3,2024-01-01,SKU-0,3,1000\n'
+            'F-1,Casa Matriz,76543210-3,2024-01-01,SKU-1,2,500\n'
+            'F-2,Casa Matriz,76543210-3,2024-01-02,SKU-0,1,1000\n'
+            'F-2,Casa Matriz,76543210-3,2024-01-02,NOPE,1,1000\n'
+            f'F-3,{self.branch.id},{self.supplier.id},2024-01-03,SKU-2,4,10\n'
+        )
+        summary = import_purchases(self.company, self.user, io.StringIO(content), chunk_size=1)
+        self.assertEqual(summary['purchases'], 2)
+        self.assertEqual(summary['lines'], 3)
+        self.assertEqual(summary['error_details'], [{'line': 5, 'error': 'SKU desconocido: NOPE'}])
+        self.assertEqual(Purchase.objects.get(reference='F-1').total_cost, 4000)
+        self.assertFalse(Purchase.objects.filter(reference='F-2').exists())
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).stock, 3)
+        self.assertEqual(InventoryMovement.objects.filter(movement_type=InventoryMovement.MOV_PURCHASE).count(), 3)
+
+        again = import_purchases(self.company, self.user, io.StringIO(content))
+        self.assertEqual(again['purchases'], 0)
+        self.assertEqual(again['skipped'], 2)
+        self.assertEqual(Purchase.objects.count(), 2)
+
+    def test_invalid_line_without_reference_discards_its_whole_purchase(self):
+        content = CSV_HEADER + (
+            ',Casa Matriz,76543210-3,2024-01-05,SKU-0,1,10\n'
+            ',Casa Matriz,76543210-3,2024-01-05,NOPE,1,10\n'
+            ',Casa Matriz,76543210-3,2024-01-05,SKU-1,1,10\n'
+            ',Casa Matriz,76543210-3,2024-01-06,NOPE,1,10\n'
+            ',Casa Matriz,76543210-3,2024-01-06,SKU-2,1,10\n'
+            ',Casa Matriz,76543210-3,2024-01-07,SKU-3,1,10\n'
+        )
+        summary = import_purchases(self.company, self.user, io.StringIO(content))
+        self.assertEqual((summary['purchases'], summary['errors']), (1, 2))
+        self.assertEqual(list(Purchase.objects.values_list('date', flat=True)), [date(2024, 1, 7)])
+
+    def test_failed_chunk_rejects_only_the_offending_purchase(self):
+        content = CSV_HEADER + ''.join(
+            f'F-{n},Casa Matriz,76543210-3,2024-01-01,SKU-{n},1,10\n' for n in range(3)
+        )
+
+        def post(company, user, documents):
+            if any(doc['reference'] == 'F-1' for doc in documents):
+                raise ValidationError('Sucursal o proveedor inválido')
+            return post_purchases(company, user, documents)
+
+        with mock.patch('apps.inventory.imports.post_purchases', side_effect=post):
+            summary = import_purchases(self.company, self.user, io.StringIO(content))
+        self.assertEqual(summary['purchases'], 2)
+        self.assertEqual(summary['error_details'], [{'line': 3, 'error': 'Sucursal o proveedor inválido'}])
+        self.assertEqual(set(Purchase.objects.values_list('reference', flat=True)), {'F-0', 'F-2'})
+
+    def test_upload_endpoint_accepts_jsonl(self):
+        content = (
+            '{"reference": "J-1", "branch": "Casa Matriz", "supplier": "76543210-3", '
+            '"date": "2024-02-01", "sku": "SKU-5", "quantity": 6, "unit_cost": "2.5"}\n'
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        upload = SimpleUploadedFile('compras.jsonl', content.encode('utf-8'))
+        response = client.post(reverse('purchase-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['purchases'], 1)
+        self.assertEqual(Inventory.objects.get(product=self.products[5]).stock, 6)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.dates import business_date
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product, ReorderSuggestion, Supplier
+from apps.inventory.reorder import compute_suggestions, suggest_reorder_points
+from apps.inventory.services import post_purchases
+
+User = get_user_model()
+
+
+class ReorderSuggestionTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.supplier = Supplier.objects.create(
+            company=self.company, name='Proveedor', rut='76543210-3', contact_name='Ana',
+            contact_email='ana@example.com', contact_phone='123',
+        )
+        self.fast, self.idle = Product.objects.bulk_create([
+            Product(company=self.company, sku='FAST', name='Rápido', price=10, cost=4),
+            Product(company=self.company, sku='IDLE', name='Sin ventas', price=10, cost=4),
+        ])
+        post_purchases(self.company, self.user, [{
+            'branch': self.branch.id, 'supplier': self.supplier.id, 'date': business_date() - timedelta(days=60),
+            'items': [{'product': self.fast.id, 'quantity': 10, 'unit_cost': '4'}],
+        }])
+        Inventory.objects.create(company=self.company, branch=self.branch, product=self.idle, stock=3)
+        today = business_date()
+        # 2 unidades diarias durante 28 días dentro de una ventana de 28.
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                company=self.company, branch=self.branch, product=self.fast, movement_type=InventoryMovement.MOV_SALE,
+                quantity_delta=-2, business_date=today - timedelta(days=day),
+            )
+            for day in range(28)
+        ])
+
+    def test_compute_suggestions_is_vectorized(self):
+        result = compute_suggestions(
+            np.array([0, 100]), np.array([56.0, 0.0]), np.array([112.0, 0.0]),
+            window_days=28, lead_time_days=7, review_days=7, service_z=1.65,
+        )
+        self.assertEqual(result['reorder_point'].tolist(), [14, 0])
+        self.assertEqual(result['order_quantity'].tolist(), [28, 0])
+        self.assertTrue(np.isnan(result['days_of_cover'][1]))
+
+    def test_batch_writes_suggestions_and_supplier_drafts(self):
+        summary = suggest_reorder_points(self.company, window_days=28, apply=True)
+        self.assertEqual(summary, {'pairs': 2, 'to_order': 1, 'updated': 1})
+        fast = ReorderSuggestion.objects.get(product=self.fast)
+        self.assertEqual((fast.daily_velocity, fast.daily_std), (2.0, 0.0))
+        self.assertEqual((fast.reorder_point, fast.order_quantity, fast.supplier_id), (14, 18, self.supplier.id))
+        self.assertEqual(fast.days_of_cover, 5.0)
+        self.assertIsNone(ReorderSuggestion.objects.get(product=self.idle).days_of_cover)
+        self.assertEqual(Inventory.objects.get(product=self.fast).reorder_point, 14)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        drafts = client.get(reverse('reorder-suggestion-drafts')).data
+        self.assertEqual(len(drafts), 1)
+        self.assertEqual(drafts[0]['supplier'], self.supplier.id)
+        self.assertEqual(drafts[0]['items'][0]['quantity'], 18)
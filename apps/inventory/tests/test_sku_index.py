@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.caching import PROCESS_LOCAL_MAX_AGE
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, Product
+from apps.inventory.sku_index import SkuIndexCache, get_sku_index, sku_indexes
+from apps.sales.models import SaleItem
+
+User = get_user_model()
+
+
+class SkuIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        sku_indexes.clear()
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.other = Company.objects.create(name='Company B', rut='87654321-4')
+        self.user = User.objects.create_user(
+            username='vendedor', password='pass1234', email='v@example.com', rut='11111111-1',
+            role=User.ROLE_VENDEDOR, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Centro', address='Calle 1')
+        self.product = Product.objects.create(company=self.company, sku='7801234567890', name='Bebida', price=990, cost=500)
+        Product.objects.create(company=self.other, sku='7800000000001', name='Ajeno', price=1, cost=1)
+        Inventory.objects.create(company=self.company, branch=self.branch, product=self.product, stock=10)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_loads_once_and_reloads_on_catalog_change(self):
+        index = get_sku_index(self.company.id)
+        with self.assertNumQueries(0):
+            self.assertIs(get_sku_index(self.company.id), index)
+            self.assertEqual(index.by_sku(' 7801234567890 ').name, 'Bebida')
+            self.assertEqual(index.by_id(str(self.product.id)).price, 990)
+            self.assertIsNone(index.by_sku('7800000000001'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 1090
+            self.product.save()
+        self.assertEqual(get_sku_index(self.company.id).by_sku('7801234567890').price, 1090)
+
+    def test_process_local_cache_bounds_index_age(self):
+        index = get_sku_index(self.company.id)
+        Product.objects.filter(pk=self.product.pk).update(price=1090)  # escritura vista solo por otro worker
+        with mock.patch('apps.inventory.sku_index.time.monotonic', return_value=index.loaded_at + PROCESS_LOCAL_MAX_AGE):
+            self.assertEqual(get_sku_index(self.company.id).by_sku('7801234567890').price, 1090)
+
+    def test_lru_keeps_most_recent_companies(self):
+        indexes = SkuIndexCache(max_companies=1)
+        first = indexes.get(self.company.id)
+        indexes.get(self.other.id)
+        self.assertIsNot(indexes.get(self.company.id), first)
+
+    def test_pos_api_sells_by_scanned_sku_with_catalog_price(self):
+        payload = {
+            'branch': self.branch.id, 'payment_method': 'Efectivo',
+            'items': [{'sku': '7801234567890', 'quantity': 2}],
+        }
+        response = self.client.post(reverse('sale-list'), payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['items'], [{'product': self.product.id, 'quantity': 2, 'unit_price': '990.00'}])
+        self.assertEqual(SaleItem.objects.get().product_id, self.product.id)
+
+        payload['items'] = [{'sku': '7800000000001', 'quantity': 1}]
+        self.assertEqual(self.client.post(reverse('sale-list'), payload, format='json').status_code, 400)
+
+    def test_exact_lookup_resolves_scans(self):
+        response = self.client.get(reverse('product-lookup'), {'q': '7801234567890', 'exact': 1})
+        self.assertEqual([row['name'] for row in response.json()], ['Bebida'])
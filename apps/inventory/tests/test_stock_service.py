@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product
+from apps.inventory.services import InsufficientStock, InventoryNotFound, apply_stock_deltas
+from apps.sales.models import Sale
+
+User = get_user_model()
+
+
+class StockServiceTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='vendedor', password='pass1234', email='v@example.com', rut='11111111-1',
+            role=User.ROLE_ADMIN_CLIENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.other_branch = Branch.objects.create(company=self.company, name='Norte', address='Norte')
+        self.product = Product.objects.create(company=self.company, sku='SKU-1', name='Producto 1', price=10, cost=5)
+        self.product_2 = Product.objects.create(company=self.company, sku='SKU-2', name='Producto 2', price=20, cost=5)
+        self.inventory = Inventory.objects.create(company=self.company, branch=self.branch, product=self.product, stock=5)
+        Inventory.objects.create(company=self.company, branch=self.branch, product=self.product_2, stock=1)
+
+    def _line(self, product, delta, branch=None):
+        return {'branch': (branch or self.branch).id, 'product': product.id, 'quantity_delta': delta}
+
+    def test_conditional_decrement_rolls_back_whole_batch(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            apply_stock_deltas(
+                self.company,
+                [self._line(self.product, -2), self._line(self.product_2, -3)],
+                movement_type=InventoryMovement.MOV_SALE,
+            )
+        self.assertEqual(ctx.exception.product_id, self.product_2.id)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.stock, 5)
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_lines_for_same_row_are_netted(self):
+        with self.assertRaises(InsufficientStock):
+            apply_stock_deltas(
+                self.company,
+                [self._line(self.product, -3), self._line(self.product, -3)],
+                movement_type=InventoryMovement.MOV_SALE,
+            )
+        apply_stock_deltas(
+            self.company,
+            [self._line(self.product, -3), self._line(self.product, -2)],
+            movement_type=InventoryMovement.MOV_SALE,
+        )
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.stock, 0)
+        self.assertEqual(InventoryMovement.objects.count(), 2)
+
+    def test_missing_rows_created_only_when_allowed(self):
+        with self.assertRaises(InventoryNotFound):
+            apply_stock_deltas(self.company, [self._line(self.product, 4, self.other_branch)], movement_type=InventoryMovement.MOV_PURCHASE)
+        apply_stock_deltas(
+            self.company, [self._line(self.product, 4, self.other_branch)],
+            movement_type=InventoryMovement.MOV_PURCHASE, create_missing=True,
+        )
+        self.assertEqual(Inventory.objects.get(branch=self.other_branch, product=self.product).stock, 4)
+
+    def test_sale_api_decrements_stock(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        payload = {
+            'branch': self.branch.id,
+            'payment_method': 'cash',
+            'items': [{'product': self.product.id, 'quantity': 2, 'unit_price': '10.00'}],
+        }
+        response = client.post(reverse('sale-list'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Sale.objects.get().total, 20)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.stock, 3)
@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.core.models import Company
+from apps.inventory.models import Branch, Product, Purchase, Supplier, SupplierStats
+from apps.inventory.services import post_purchases, rebuild_supplier_stats
+from apps.reports.exports import supplier_rows
+
+User = get_user_model()
+
+
+class SupplierStatsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.supplier = Supplier.objects.create(
+            company=self.company, name='Proveedor', rut='76543210-3', contact_name='Ana',
+            contact_email='ana@example.com', contact_phone='123',
+        )
+        self.idle = Supplier.objects.create(
+            company=self.company, name='Sin compras', rut='11111111-1', contact_name='Luis',
+            contact_email='luis@example.com', contact_phone='456',
+        )
+        self.products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(3)
+        ])
+
+    def _post(self, day, product_indexes):
+        return post_purchases(self.company, self.user, [{
+            'branch': self.branch.id, 'supplier': self.supplier.id, 'date': date(2024, 1, day),
+            'items': [{'product': self.products[i].id, 'quantity': 2, 'unit_cost': '5.00'} for i in product_indexes],
+        }])
+
+    def test_posting_purchases_updates_stats_incrementally(self):
+        self._post(10, [0, 1])
+        self._post(3, [1, 2])
+        stats = SupplierStats.objects.get(supplier=self.supplier)
+        self.assertEqual(stats.purchases_count, 2)
+        self.assertEqual(stats.products_count, 3)
+        self.assertEqual(stats.total_spend, Decimal('40'))
+        self.assertEqual(stats.last_purchase, date(2024, 1, 10))
+
+        rows = {row['name']: row for row in supplier_rows(self.company)}
+        self.assertEqual(rows['Proveedor']['total_purchases'], 2)
+        self.assertEqual(rows['Sin compras']['total_purchases'], 0)
+        self.assertIsNone(rows['Sin compras']['last_purchase'])
+
+    def test_rebuild_and_delete_match_incremental_values(self):
+        self._post(10, [0, 1])
+        self._post(12, [2])
+        incremental = SupplierStats.objects.values().get(supplier=self.supplier)
+        self.assertEqual(rebuild_supplier_stats([self.company.id]), 2)
+        self.assertEqual(SupplierStats.objects.values().get(supplier=self.supplier), incremental)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Purchase.objects.get(date=date(2024, 1, 12)).delete()
+        stats = SupplierStats.objects.get(supplier=self.supplier)
+        self.assertEqual((stats.purchases_count, stats.products_count), (1, 2))
+        self.assertEqual(stats.last_purchase, date(2024, 1, 10))
+
+    def test_cascading_deletes_rebuild_once(self):
+        self._post(10, [0, 1])
+        self._post(12, [2])
+        with mock.patch('apps.inventory.signals.rebuild_supplier_stats', wraps=rebuild_supplier_stats) as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.products[0].delete()
+            self.assertEqual(SupplierStats.objects.get(supplier=self.supplier).products_count, 2)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.branch.delete()
+        self.assertEqual(rebuild.call_count, 2)
+        stats = SupplierStats.objects.get(supplier=self.supplier)
+        self.assertEqual((stats.purchases_count, stats.products_count, stats.total_spend), (0, 0, 0))
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product, TransferOrder
+from apps.inventory.services import post_transfer
+
+User = get_user_model()
+
+
+class TransferOrderTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        other_company = Company.objects.create(name='Company B', rut='87654321-4')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.source = Branch.objects.create(company=self.company, name='Bodega', address='Centro')
+        self.target = Branch.objects.create(company=self.company, name='Sala', address='Norte')
+        self.foreign_branch = Branch.objects.create(company=other_company, name='Otra', address='Sur')
+        self.products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(30)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(company=self.company, branch=self.source, product=p, stock=10) for p in self.products
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, items, target=None):
+        payload = {
+            'source_branch': self.source.id,
+            'target_branch': (target or self.target).id,
+            'note': 'Reposición',
+            'items': items,
+        }
+        return self.client.post(reverse('transfer-list'), payload, format='json')
+
+    def test_transfer_moves_all_lines_with_paired_movements(self):
+        response = self._post([
+            {'product': self.products[0].id, 'quantity': 4},
+            {'product': self.products[1].id, 'quantity': 10},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['items']), 2)
+        self.assertEqual(Inventory.objects.get(branch=self.source, product=self.products[0]).stock, 6)
+        self.assertEqual(Inventory.objects.get(branch=self.target, product=self.products[0]).stock, 4)
+        self.assertEqual(Inventory.objects.get(branch=self.target, product=self.products[1]).stock, 10)
+        deltas = InventoryMovement.objects.filter(movement_type=InventoryMovement.MOV_TRANSFER).values_list('quantity_delta', flat=True)
+        self.assertEqual(sorted(deltas), [-10, -4, 4, 10])
+
+    def test_insufficient_stock_rolls_back_whole_transfer(self):
+        response = self._post([
+            {'product': self.products[0].id, 'quantity': 4},
+            {'product': self.products[1].id, 'quantity': 11},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(int(response.data['product']), self.products[1].id)
+        self.assertEqual(Inventory.objects.get(branch=self.source, product=self.products[0]).stock, 10)
+        self.assertFalse(TransferOrder.objects.exists())
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_rejects_branch_from_other_company(self):
+        response = self._post([{'product': self.products[0].id, 'quantity': 1}], target=self.foreign_branch)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Inventory.objects.get(branch=self.source, product=self.products[0]).stock, 10)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        def run(products):
+            with CaptureQueriesContext(connection) as ctx:
+                post_transfer(self.company, self.user, self.source.id, self.target.id,
+                              [{'product': p.id, 'quantity': 1} for p in products])
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(self.products[:2]), run(self.products[2:30]))
@@ -1,6 +1,10 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path
-from .views import ProductViewSet, BranchViewSet, InventoryViewSet, InventoryAdjustView, SupplierViewSet, PurchaseViewSet
+from .views import (
+    ProductViewSet, BranchViewSet, InventoryViewSet, InventoryAdjustView, InventoryBulkAdjustView, LowStockView,
+    SupplierViewSet, PurchaseViewSet, PurchaseImportView, ProductImportView, ProductExportView, ProductLookupView,
+    ReorderSuggestionViewSet, TransferOrderViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
@@ -8,7 +12,16 @@ router.register(r'branches', BranchViewSet, basename='branch')
 router.register(r'inventory', InventoryViewSet, basename='inventory')
 router.register(r'suppliers', SupplierViewSet, basename='supplier')
 router.register(r'purchases', PurchaseViewSet, basename='purchase')
+router.register(r'transfers', TransferOrderViewSet, basename='transfer')
+router.register(r'reorder-suggestions', ReorderSuggestionViewSet, basename='reorder-suggestion')
 
-urlpatterns = router.urls + [
+# Las rutas explícitas van antes del router: inventory/<pk>/ capturaría inventory/adjust/ (y purchases/<pk>/ a purchases/import/, products/<pk>/ a products/export/ y products/lookup/).
+urlpatterns = [
     path('inventory/adjust/', InventoryAdjustView.as_view(), name='inventory-adjust'),
-]
+    path('inventory/adjust/bulk/', InventoryBulkAdjustView.as_view(), name='inventory-adjust-bulk'),
+    path('inventory/low-stock/', LowStockView.as_view(), name='inventory-low-stock'),
+    path('purchases/import/', PurchaseImportView.as_view(), name='purchase-import'),
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/lookup/', ProductLookupView.as_view(), name='product-lookup'),
+] + router.urls
@@ -1,35 +1,110 @@
+import io
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 from rest_framework import viewsets, status, generics
 from rest_framework.permissions import AllowAny
 from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.parsers import MultiPartParser
+from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db import transaction
 from apps.core.permissions import IsActive
 from apps.accounts.permissions import IsAdminOrGerente, IsInternal, IsAdminOrSuper
-from .models import Product, Branch, Inventory, InventoryMovement, Supplier, Purchase, PurchaseItem
+from apps.core.caching import catalog_version, shared_cache, version_timeout
+from apps.reports.exports import CSVRenderer, JSONLRenderer, PRODUCT_COLUMNS, product_rows, stream_export
+from .models import Product, Branch, Inventory, InventoryMovement, Supplier, Purchase, ReorderSuggestion, TransferOrder
 from .serializers import (
-    ProductSerializer, BranchSerializer, InventorySerializer, InventoryAdjustSerializer,
-    SupplierSerializer, PurchaseSerializer
+    ProductSerializer, BranchSerializer, InventorySerializer, InventoryAdjustSerializer, LowStockSerializer,
+    InventoryBulkAdjustSerializer, SupplierSerializer, PurchaseSerializer, PurchaseImportSerializer,
+    ProductImportSerializer, ReorderSuggestionSerializer, TransferOrderSerializer,
+)
+from .cache import CATALOG_CACHE_TIMEOUT, cached_catalog, catalog_etag
+from .imports import ImportFormatError, import_products, import_purchases
+from .reorder import draft_purchases
+from .search import LOOKUP_LIMIT, LOOKUP_MAX_LIMIT, lookup_products, search_products
+from .sku_index import get_sku_index
+from .services import (
+    StockError, apply_stock_deltas, bulk_adjust_inventory, low_stock_lines, post_purchase, post_transfer,
 )
 
 
+class ProductSearchPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    pagination_class = ProductSearchPagination
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [AllowAny()]
         return [IsActive(), IsAdminOrGerente()]
 
-    def get_queryset(self):
+    def _catalog_company_id(self):
         user = getattr(self.request, 'user', None)
+        if user and user.is_authenticated and getattr(user, 'company_id', None):
+            return user.company_id
         company_id = self.request.query_params.get('company')
-        if user and user.is_authenticated and getattr(user, 'company', None):
-            return Product.objects.filter(company=user.company)
-        if company_id:
-            return Product.objects.filter(company_id=company_id)
-        return Product.objects.none()
+        return int(company_id) if company_id and company_id.isdigit() else None
+
+    def get_queryset(self):
+        company_id = self._catalog_company_id()
+        if not company_id:
+            return Product.objects.none()
+        queryset = Product.objects.filter(company_id=company_id)
+        if self.action == 'list' and self.request.query_params.get('q'):
+            return search_products(queryset, self.request.query_params['q'])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        company_id = self._catalog_company_id()
+        if not company_id:
+            return super().list(request, *args, **kwargs)
+        # Misma versión para el ETag y la clave: ambos describen exactamente los mismos datos.
+        version = catalog_version(company_id)
+        # El host entra en la clave porque la paginación devuelve enlaces absolutos.
+        params = {
+            'query': sorted(request.query_params.lists()),
+            'format': request.accepted_renderer.format,
+            'host': request.get_host(),
+        }
+        # Con una caché por proceso (LocMem) otro worker puede haber avanzado la versión sin que este lo
+        # sepa: sin ETag, porque un 304 confirmaría datos viejos indefinidamente, y el listado dura poco.
+        shared = shared_cache()
+        etag = catalog_etag(company_id, version, params) if shared else None
+        if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            timeout = version_timeout(CATALOG_CACHE_TIMEOUT)
+            response = Response(cached_catalog(company_id, version, params, self._catalog_data, timeout))
+        if etag:
+            response['ETag'] = etag
+        # Sin max-age: cada uso revalida con If-None-Match, que cuesta un 304 sin consultas.
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+        else:
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def _catalog_data(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data).data
+        return self.get_serializer(queryset, many=True).data
+
+    def paginate_queryset(self, queryset):
+        # Solo la búsqueda se pagina; el listado completo conserva su formato de lista.
+        if not self.request.query_params.get('q'):
+            return None
+        return super().paginate_queryset(queryset)
 
     def perform_create(self, serializer):
         serializer.save(company=self.request.user.company)
@@ -38,6 +113,59 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer.save(company=self.request.user.company)
 
 
+class ProductLookupView(APIView):
+    """Typeahead del catálogo (``?q=`` prefijo de SKU o de nombre) para POS, compras y traspasos.
+
+    Con ``?exact=1`` (lector de códigos) un SKU exacto se resuelve en el índice en memoria.
+    """
+    permission_classes = [IsActive]
+
+    def get(self, request, *args, **kwargs):
+        company_id = getattr(request.user, 'company_id', None)
+        if not company_id:
+            return Response([])
+        if request.query_params.get('exact'):
+            product = get_sku_index(company_id).by_sku(request.query_params.get('q'))
+            if product:
+                return Response([product._asdict()])
+        try:
+            limit = min(max(int(request.query_params.get('limit', LOOKUP_LIMIT)), 1), LOOKUP_MAX_LIMIT)
+        except ValueError:
+            limit = LOOKUP_LIMIT
+        return Response(lookup_products(company_id, request.query_params.get('q'), limit))
+
+
+def _upload_stream(serializer):
+    upload = serializer.validated_data['file']
+    fmt = serializer.validated_data.get('format') or ('jsonl' if upload.name.lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+    return io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''), fmt
+
+
+class ProductImportView(generics.GenericAPIView):
+    serializer_class = ProductImportSerializer
+    permission_classes = [IsActive, IsAdminOrGerente]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        stream, fmt = _upload_stream(serializer)
+        try:
+            summary = import_products(request.user.company, stream, fmt=fmt)
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            raise ValidationError(str(exc))
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
+
+
+class ProductExportView(APIView):
+    """Catálogo completo en streaming (``?format=csv`` por defecto o ``jsonl``), reimportable con /products/import/."""
+    permission_classes = [IsActive, IsAdminOrGerente]
+    renderer_classes = [CSVRenderer, JSONLRenderer]
+
+    def get(self, request):
+        return stream_export(product_rows(request.user.company), PRODUCT_COLUMNS, request.accepted_renderer.format, 'productos')
+
+
 class BranchViewSet(viewsets.ModelViewSet):
     serializer_class = BranchSerializer
 
@@ -50,14 +178,13 @@ class BranchViewSet(viewsets.ModelViewSet):
         return Branch.objects.filter(company=self.request.user.company)
 
     def perform_create(self, serializer):
-        user = self.request.user
-        if not user.company:
+        tenant = self.request.tenant
+        if not tenant:
             raise ValidationError('El usuario debe tener una compañía asignada')
-        subscription = getattr(user.company, 'subscription', None)
-        if subscription and subscription.branch_limit:
-            if Branch.objects.filter(company=user.company).count() >= subscription.branch_limit:
+        if tenant.branch_limit:
+            if Branch.objects.filter(company_id=tenant.company_id).count() >= tenant.branch_limit:
                 raise ValidationError('Límite de sucursales alcanzado para el plan actual')
-        serializer.save(company=user.company)
+        serializer.save(company=tenant.company)
 
     @action(detail=True, methods=['get'], url_path='inventory')
     def inventory(self, request, pk=None):
@@ -78,6 +205,49 @@ class InventoryViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(branch_id=branch_id)
         return qs
 
+
+class LowStockPagination(CursorPagination):
+    # Keyset sobre (stock - reorder_point, id): cada página es un rango del índice parcial.
+    ordering = ('margin', 'pk')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class LowStockView(generics.ListAPIView):
+    """Líneas bajo el punto de reorden, de la más crítica a la menos (``?branch=`` para una sucursal)."""
+    serializer_class = LowStockSerializer
+    permission_classes = [IsActive, IsInternal]
+    pagination_class = LowStockPagination
+
+    def get_queryset(self):
+        return low_stock_lines(self.request.user.company, self.request.query_params.get('branch')).select_related(
+            'branch', 'product',
+        )
+
+
+class ReorderSuggestionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Resultado de ``suggest_reorder_points``; ``/drafts/`` agrupa lo que hay que pedir por proveedor y sucursal."""
+    serializer_class = ReorderSuggestionSerializer
+    permission_classes = [IsActive, IsAdminOrGerente]
+
+    def get_queryset(self):
+        qs = ReorderSuggestion.objects.filter(company=self.request.user.company).select_related('product')
+        params = self.request.query_params
+        if params.get('branch'):
+            qs = qs.filter(branch_id=params['branch'])
+        if params.get('supplier'):
+            qs = qs.filter(supplier_id=params['supplier'])
+        if params.get('to_order') == '1':
+            qs = qs.filter(order_quantity__gt=0)
+        return qs.order_by('supplier_id', 'branch_id', '-order_quantity', 'pk')
+
+    @action(detail=False, methods=['get'])
+    def drafts(self, request):
+        params = request.query_params
+        return Response(draft_purchases(request.user.company, params.get('branch'), params.get('supplier')))
+
+
 class InventoryAdjustView(generics.GenericAPIView):
     serializer_class = InventoryAdjustSerializer
     permission_classes = [IsActive, IsAdminOrGerente]
@@ -89,25 +259,51 @@ class InventoryAdjustView(generics.GenericAPIView):
         branch = data['branch']
         product = data['product']
         qty = data['quantity_delta']
-        if branch.company != request.user.company or product.company != request.user.company:
+        if branch.company_id != request.user.company_id or product.company_id != request.user.company_id:
             return Response({'detail': 'Operación inválida'}, status=status.HTTP_400_BAD_REQUEST)
-        inventory, _ = Inventory.objects.get_or_create(company=request.user.company, branch=branch, product=product, defaults={'stock': 0})
-        new_stock = inventory.stock + qty
-        if new_stock < 0:
-            return Response({'detail': 'Stock no puede ser negativo'}, status=status.HTTP_400_BAD_REQUEST)
-        with transaction.atomic():
-            inventory.stock = new_stock
-            inventory.save()
-            InventoryMovement.objects.create(
-                company=request.user.company,
-                branch=branch,
-                product=product,
+        try:
+            apply_stock_deltas(
+                request.user.company,
+                [{'branch': branch.id, 'product': product.id, 'quantity_delta': qty, 'reason': data.get('reason', '')}],
                 movement_type=InventoryMovement.MOV_ADJUST,
-                quantity_delta=qty,
-                reason=data.get('reason', ''),
-                created_by=request.user,
+                user=request.user,
+                create_missing=True,
             )
-        return Response({'detail': 'Ajuste aplicado', 'stock': inventory.stock})
+        except StockError:
+            return Response({'detail': 'Stock no puede ser negativo'}, status=status.HTTP_400_BAD_REQUEST)
+        stock = Inventory.objects.filter(
+            company=request.user.company, branch=branch, product=product,
+        ).values_list('stock', flat=True).first()
+        return Response({'detail': 'Ajuste aplicado', 'stock': stock or 0})
+
+
+class InventoryBulkAdjustView(generics.GenericAPIView):
+    serializer_class = InventoryBulkAdjustSerializer
+    permission_classes = [IsActive, IsAdminOrGerente]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results = bulk_adjust_inventory(request.user.company, data['lines'], request.user, data['reason'])
+        applied = sum(1 for result in results if result['status'] == 'ok')
+        return Response({'applied': applied, 'rejected': len(results) - applied, 'results': results})
+
+
+class PurchaseImportView(generics.GenericAPIView):
+    serializer_class = PurchaseImportSerializer
+    permission_classes = [IsActive, IsAdminOrGerente]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        stream, fmt = _upload_stream(serializer)
+        try:
+            summary = import_purchases(request.user.company, request.user, stream, fmt=fmt)
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            raise ValidationError(str(exc))
+        return Response(summary, status=status.HTTP_201_CREATED if summary['purchases'] else status.HTTP_200_OK)
 
 
 class SupplierViewSet(viewsets.ModelViewSet):
@@ -130,32 +326,32 @@ class PurchaseViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         user = self.request.user
-        items_data = serializer.validated_data.pop('items')
-        branch = serializer.validated_data['branch']
-        supplier = serializer.validated_data['supplier']
-        if branch.company != user.company or supplier.company != user.company:
-            raise ValidationError('Sucursal o proveedor inválido')
-        purchase = Purchase.objects.create(company=user.company, created_by=user, **serializer.validated_data)
-        total = 0
-        with transaction.atomic():
-            for item in items_data:
-                product = item['product']
-                quantity = item['quantity']
-                unit_cost = item['unit_cost']
-                total += quantity * unit_cost
-                PurchaseItem.objects.create(purchase=purchase, **item)
-                inventory, _ = Inventory.objects.get_or_create(company=user.company, branch=purchase.branch, product=product, defaults={'stock': 0})
-                inventory.stock += quantity
-                inventory.save()
-                InventoryMovement.objects.create(
-                    company=user.company,
-                    branch=purchase.branch,
-                    product=product,
-                    movement_type=InventoryMovement.MOV_PURCHASE,
-                    quantity_delta=quantity,
-                    reason='Compra',
-                    created_by=user,
-                )
-        purchase.total_cost = total
-        purchase.save()
-        return purchase
+        purchase = post_purchase(user.company, user, serializer.validated_data)
+        serializer.instance = purchase
+
+
+class TransferOrderViewSet(viewsets.ModelViewSet):
+    serializer_class = TransferOrderSerializer
+    permission_classes = [IsActive, IsAdminOrGerente]
+    # Los traspasos son documentos inmutables: se corrigen con otro traspaso.
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        return TransferOrder.objects.filter(company=self.request.user.company).prefetch_related('items').order_by('-created_at')
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        data = serializer.validated_data
+        try:
+            serializer.instance = post_transfer(
+                user.company,
+                user,
+                data['source_branch_id'],
+                data['target_branch_id'],
+                [{'product': item['product_id'], 'quantity': item['quantity']} for item in data['items']],
+                note=data.get('note', ''),
+            )
+        except StockError as exc:
+            raise ValidationError({
+                'detail': str(exc.detail[0]), 'branch': exc.branch_id, 'product': exc.product_id,
+            })
@@ -2,15 +2,14 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.utils import timezone
-from django.db import transaction
 from decimal import Decimal, InvalidOperation
 from rest_framework.exceptions import ValidationError
 
 from apps.accounts.models import User
-from apps.core.access import plan_allows
 from .forms import SupplierForm, BranchForm
-from .models import Branch, Inventory, Supplier, Product, Purchase, PurchaseItem, InventoryMovement
+from .models import Branch, Inventory, Supplier, Product
 from .serializers import PurchaseSerializer
+from .services import StockError, post_purchase, post_transfer
 
 
 def _user_has_role(user, allowed_roles):
@@ -24,10 +23,11 @@ def _guard_role(request, allowed_roles, required_feature: str | None = None):
         return redirect('dashboard')
     if getattr(request.user, 'role', None) == User.ROLE_SUPER_ADMIN:
         return None
-    if not request.user.company:
+    tenant = request.tenant
+    if not tenant:
         messages.error(request, 'Debes pertenecer a una compañía para ver esta sección.')
         return redirect('dashboard')
-    if required_feature and not plan_allows(request.user, required_feature):
+    if required_feature and not tenant.allows(required_feature):
         messages.error(request, 'Tu plan actual no habilita esta sección. Mejora el plan para acceder.')
         return redirect('dashboard')
     return None
@@ -79,8 +79,7 @@ def branch_create(request):
     if denial:
         return denial
 
-    subscription = getattr(request.user.company, 'subscription', None)
-    branch_limit = getattr(subscription, 'branch_limit', None)
+    branch_limit = request.tenant.branch_limit
     current_count = Branch.objects.filter(company=request.user.company).count()
     if branch_limit and current_count >= branch_limit:
         messages.warning(request, 'Límite de sucursales alcanzado para tu plan. Mejora el plan para crear más.')
@@ -140,123 +139,68 @@ def transfer_stock(request):
         messages.error(request, 'Debes pertenecer a una compañía para mover inventario entre sucursales.')
         return redirect('dashboard')
     branches = Branch.objects.filter(company=company).order_by('name')
-    products = Product.objects.filter(company=company).order_by('name')
     form_errors: list[str] = []
 
+    items_payload = []
+
     if request.method == 'POST':
         source_id = request.POST.get('source_branch')
         target_id = request.POST.get('target_branch')
-        product_id = request.POST.get('product')
-        qty_raw = request.POST.get('quantity', '0')
         note = request.POST.get('note', '').strip()
 
         source_branch = branches.filter(id=source_id).first()
         target_branch = branches.filter(id=target_id).first()
-        product = products.filter(id=product_id).first()
-
         if not source_branch or not target_branch:
             form_errors.append('Selecciona sucursales válidas.')
         if source_branch and target_branch and source_branch == target_branch:
             form_errors.append('La sucursal de origen y destino no pueden ser la misma.')
-        if not product:
-            form_errors.append('Selecciona un producto a transferir.')
-        try:
-            quantity = int(qty_raw)
-            if quantity < 1:
-                raise ValueError
-        except ValueError:
-            form_errors.append('Ingresa una cantidad válida (mínimo 1).')
-            quantity = 0
-
-        if not form_errors and source_branch and target_branch and product:
+
+        posted_ids = request.POST.getlist('item_product')
+        # Solo los productos de las filas enviadas: la página ya no carga el catálogo completo.
+        selected = Product.objects.filter(company=company).in_bulk([pid for pid in posted_ids if pid.isdigit()])
+        product_names = {product_id: product.name for product_id, product in selected.items()}
+        items = []
+        rows = zip(posted_ids, request.POST.getlist('item_quantity'))
+        for idx, (pid, qty) in enumerate(rows, start=1):
+            if not pid and not qty:
+                continue
+            try:
+                product_id = int(pid)
+            except ValueError:
+                product_id = None
+            items_payload.append({'product': pid, 'product_obj': selected.get(product_id), 'quantity': qty})
+            if product_id not in product_names:
+                form_errors.append(f'Fila {idx}: selecciona un producto a transferir.')
+                continue
             try:
-                with transaction.atomic():
-                    source_inventory, _ = Inventory.objects.select_for_update().get_or_create(
-                        company=company,
-                        branch=source_branch,
-                        product=product,
-                        defaults={'stock': 0},
-                    )
-                    target_inventory, _ = Inventory.objects.select_for_update().get_or_create(
-                        company=company,
-                        branch=target_branch,
-                        product=product,
-                        defaults={'stock': 0},
-                    )
-                    if source_inventory.stock < quantity:
-                        raise ValidationError('Stock insuficiente en la sucursal de origen.')
-                    source_inventory.stock -= quantity
-                    target_inventory.stock += quantity
-                    source_inventory.save()
-                    target_inventory.save()
-                    InventoryMovement.objects.create(
-                        company=company,
-                        branch=source_branch,
-                        product=product,
-                        movement_type=InventoryMovement.MOV_TRANSFER,
-                        quantity_delta=-quantity,
-                        reason=note or f'Traspaso a {target_branch.name}',
-                        created_by=request.user,
-                    )
-                    InventoryMovement.objects.create(
-                        company=company,
-                        branch=target_branch,
-                        product=product,
-                        movement_type=InventoryMovement.MOV_TRANSFER,
-                        quantity_delta=quantity,
-                        reason=note or f'Traspaso desde {source_branch.name}',
-                        created_by=request.user,
-                    )
-                messages.success(request, f'Se transfirieron {quantity} unidades de {product.name}.')
+                quantity = int(qty)
+                if quantity < 1:
+                    raise ValueError
+            except ValueError:
+                form_errors.append(f'Fila {idx}: ingresa una cantidad válida (mínimo 1).')
+                continue
+            items.append({'product': product_id, 'quantity': quantity})
+        if not items and not form_errors:
+            form_errors.append('Agrega al menos un producto a transferir.')
+
+        if not form_errors:
+            try:
+                transfer = post_transfer(company, request.user, source_branch.id, target_branch.id, items, note=note)
+                units = sum(item['quantity'] for item in items)
+                messages.success(request, f'Traspaso #{transfer.id} registrado: {units} unidades en {len(items)} líneas.')
                 return redirect('inventory_transfer')
-            except ValidationError as exc:
-                form_errors.append(str(getattr(exc, 'detail', exc)))
+            except StockError as exc:
+                name = product_names.get(exc.product_id, '')
+                form_errors.append(f'Stock insuficiente en la sucursal de origen para {name}.')
 
     context = {
         'branches': branches,
-        'products': products,
         'form_errors': form_errors,
+        'items_payload': items_payload,
     }
     return render(request, 'inventory/transfer.html', context)
 
 
-def _create_purchase(validated_data, user):
-    items_data = validated_data.pop('items')
-    branch = validated_data['branch']
-    supplier = validated_data['supplier']
-    if branch.company != user.company or supplier.company != user.company:
-        raise ValidationError('Sucursal o proveedor inválido para esta compañía')
-    purchase = Purchase.objects.create(company=user.company, created_by=user, **validated_data)
-    total = 0
-    with transaction.atomic():
-        for item in items_data:
-            product = item['product']
-            quantity = item['quantity']
-            unit_cost = item['unit_cost']
-            total += quantity * unit_cost
-            PurchaseItem.objects.create(purchase=purchase, **item)
-            inventory, _ = Inventory.objects.get_or_create(
-                company=user.company,
-                branch=purchase.branch,
-                product=product,
-                defaults={'stock': 0},
-            )
-            inventory.stock += quantity
-            inventory.save()
-            InventoryMovement.objects.create(
-                company=user.company,
-                branch=purchase.branch,
-                product=product,
-                movement_type=InventoryMovement.MOV_PURCHASE,
-                quantity_delta=quantity,
-                reason='Compra',
-                created_by=user,
-            )
-    purchase.total_cost = total
-    purchase.save()
-    return purchase
-
-
 @login_required
 def purchase_create(request):
     denial = _guard_role(request, {User.ROLE_ADMIN_CLIENTE, User.ROLE_GERENTE, User.ROLE_SUPER_ADMIN}, required_feature='inventory')
@@ -266,7 +210,6 @@ def purchase_create(request):
     company = request.user.company
     branches = Branch.objects.filter(company=company).order_by('name')
     suppliers = Supplier.objects.filter(company=company).order_by('name')
-    products = Product.objects.filter(company=company).order_by('name')
     form_errors = []
     items_payload = []
 
@@ -277,6 +220,7 @@ def purchase_create(request):
         product_ids = request.POST.getlist('item_product')
         quantities = request.POST.getlist('item_quantity')
         costs = request.POST.getlist('item_unit_cost')
+        selected = Product.objects.filter(company=company).in_bulk([pid for pid in product_ids if pid.isdigit()])
 
         items = []
         for idx, (pid, qty, cost) in enumerate(zip(product_ids, quantities, costs), start=1):
@@ -300,7 +244,10 @@ def purchase_create(request):
                 form_errors.append(f'Fila {idx}: costo unitario inválido.')
                 continue
             items.append({'product': pid, 'quantity': qty_int, 'unit_cost': str(unit_cost)})
-            items_payload.append({'product': pid, 'quantity': qty_int, 'unit_cost': unit_cost})
+            items_payload.append({
+                'product': pid, 'product_obj': selected.get(int(pid)) if pid.isdigit() else None,
+                'quantity': qty_int, 'unit_cost': unit_cost,
+            })
 
         data = {
             'branch': branch_id,
@@ -311,7 +258,7 @@ def purchase_create(request):
         serializer = PurchaseSerializer(data=data)
         if serializer.is_valid() and not form_errors:
             try:
-                purchase = _create_purchase(serializer.validated_data, request.user)
+                purchase = post_purchase(request.user.company, request.user, serializer.validated_data)
                 messages.success(request, f'Compra #{purchase.id} creada correctamente.')
                 return redirect('purchase_create')
             except ValidationError as exc:
@@ -322,7 +269,6 @@ def purchase_create(request):
     context = {
         'branches': branches,
         'suppliers': suppliers,
-        'products': products,
         'form_errors': form_errors,
         'selected_branch_id': request.POST.get('branch') if request.method == 'POST' else None,
         'selected_supplier_id': request.POST.get('supplier') if request.method == 'POST' else None,
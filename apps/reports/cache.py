@@ -0,0 +1,24 @@
+"""Caché de resultados de reportes (respuesta JSON de la API).
+
+La clave incluye la versión de datos de la empresa (``apps.core.caching``), que
+avanza con cada venta, compra o movimiento de stock: no hay que borrar nada al
+escribir, las entradas viejas quedan huérfanas y expiran solas. Con una caché por
+proceso otro worker puede avanzar la versión sin que este lo vea, así que la entrada
+dura a lo sumo ``PROCESS_LOCAL_MAX_AGE``.
+"""
+import hashlib
+import json
+
+from apps.core.caching import data_version, single_flight, version_timeout
+
+REPORT_CACHE_TIMEOUT = 300
+
+
+def report_cache_key(company_id, name, params) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f'reports:{name}:{company_id}:{data_version(company_id)}:{digest}'
+
+
+def cached_report(company_id, name, params, compute):
+    """Devuelve las filas cacheadas del reporte; peticiones simultáneas con la misma clave calculan una vez."""
+    return single_flight(report_cache_key(company_id, name, params), compute, version_timeout(REPORT_CACHE_TIMEOUT))
@@ -0,0 +1,111 @@
+"""Exportación en streaming (CSV / JSONL) de los reportes.
+
+Las filas salen de ``.iterator(chunk_size=...)`` (cursor del lado del servidor en
+PostgreSQL), así la memoria se mantiene constante y los primeros bytes se envían
+apenas llega el primer bloque.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from apps.inventory.models import Inventory, Product, Supplier
+from apps.sales.models import DailySalesRollup
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CHUNK_SIZE = 2000
+
+STOCK_COLUMNS = ('branch__name', 'product__sku', 'product__name', 'stock', 'reorder_point')
+SALES_COLUMNS = ('period', 'total', 'tickets', 'units')
+# Mismas columnas que acepta import_products: el archivo exportado se puede volver a importar.
+PRODUCT_COLUMNS = ('sku', 'name', 'description', 'price', 'cost', 'category')
+SUPPLIER_COLUMNS = ('name', 'rut', 'total_purchases', 'products_count', 'last_purchase', 'total_spend')
+
+
+class CSVRenderer(BaseRenderer):
+    """Habilita ``?format=csv`` en las vistas DRF; la respuesta real es un StreamingHttpResponse."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Solo se usa para errores (permisos, validación): se devuelven como texto plano.
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+class JSONLRenderer(CSVRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+
+
+def stock_rows(company, branch_id=None):
+    qs = Inventory.objects.filter(company=company)
+    if branch_id:
+        qs = qs.filter(branch_id=branch_id)
+    return qs.order_by('branch__name', 'product__name').values(*STOCK_COLUMNS)
+
+
+def sales_rows(company, branch_id=None, date_from=None, date_to=None, group='day'):
+    # Lee el resumen diario (una fila por sucursal/día/medio de pago), no la tabla de ventas.
+    qs = DailySalesRollup.objects.filter(company=company)
+    if branch_id:
+        qs = qs.filter(branch_id=branch_id)
+    if date_from:
+        qs = qs.filter(business_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(business_date__lte=date_to)
+    annotator = F('business_date') if group == 'day' else TruncMonth('business_date')
+    return qs.annotate(period=annotator).values('period').annotate(
+        total=Sum('total'), tickets=Sum('tickets'), units=Sum('units'),
+    ).order_by('period')
+
+
+def product_rows(company):
+    return Product.objects.filter(company=company).order_by('sku').values(*PRODUCT_COLUMNS)
+
+
+def supplier_rows(company):
+    # SupplierStats se mantiene al registrar compras: un join por clave primaria, sin recorrer compras.
+    return Supplier.objects.filter(company=company).order_by('name').values(
+        'name',
+        'rut',
+        total_purchases=Coalesce('stats__purchases_count', 0),
+        products_count=Coalesce('stats__products_count', 0),
+        last_purchase=F('stats__last_purchase'),
+        total_spend=Coalesce('stats__total_spend', 0, output_field=DecimalField()),
+    )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([row[column] for column in columns])
+
+
+def _jsonl_lines(rows, columns):
+    for row in rows:
+        yield json.dumps({column: row[column] for column in columns}, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_lines(rows, columns, fmt):
+    """Líneas de texto (con salto de línea) de ``rows`` en el formato pedido."""
+    return _csv_lines(rows, columns) if fmt == 'csv' else _jsonl_lines(rows, columns)
+
+
+def stream_export(queryset, columns, fmt, filename):
+    """StreamingHttpResponse con las filas de ``queryset`` (dicts de .values()) en CSV o JSONL."""
+    lines = export_lines(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), columns, fmt)
+    content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,130 @@
+"""Cola de reportes en base de datos.
+
+La vista solo crea el ReportJob; ``run_report_workers`` toma los pendientes con un
+UPDATE condicional (dos workers nunca toman el mismo), genera el archivo con los
+mismos generadores de la exportación en streaming y lo deja en REPORTS_RESULT_DIR.
+Mientras un job corre, el worker renueva ``heartbeat_at`` cada ``HEARTBEAT_INTERVAL``;
+un job RUNNING sin latido reciente es de un worker caído y vuelve a la cola.
+"""
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import (
+    SALES_COLUMNS, STOCK_COLUMNS, SUPPLIER_COLUMNS, EXPORT_CHUNK_SIZE,
+    export_lines, sales_rows, stock_rows, supplier_rows,
+)
+from .models import ReportJob
+
+REPORT_BUILDERS = {
+    ReportJob.REPORT_STOCK: (lambda company, params: stock_rows(company, params.get('branch')), STOCK_COLUMNS),
+    ReportJob.REPORT_SALES: (
+        lambda company, params: sales_rows(
+            company,
+            branch_id=params.get('branch'),
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
+            group=params.get('group', 'day'),
+        ),
+        SALES_COLUMNS,
+    ),
+    ReportJob.REPORT_SUPPLIERS: (lambda company, params: supplier_rows(company), SUPPLIER_COLUMNS),
+}
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+REPORT_PARAMS = {
+    ReportJob.REPORT_STOCK: {'branch'},
+    ReportJob.REPORT_SALES: {'branch', 'date_from', 'date_to', 'group'},
+    ReportJob.REPORT_SUPPLIERS: set(),
+}
+
+
+def claim_next_job():
+    """Marca como RUNNING el job pendiente más antiguo y lo devuelve (None si la cola está vacía)."""
+    while True:
+        job_id = (
+            ReportJob.objects.filter(status=ReportJob.STATUS_PENDING)
+            .order_by('created_at', 'pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_PENDING).update(
+            status=ReportJob.STATUS_RUNNING, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return job_id
+        # Otro worker lo tomó entre el SELECT y el UPDATE: probar con el siguiente.
+
+
+def heartbeat_jobs(job_ids):
+    """Marca como vivos los jobs que el worker sigue ejecutando."""
+    if not job_ids:
+        return 0
+    return ReportJob.objects.filter(pk__in=job_ids, status=ReportJob.STATUS_RUNNING).update(
+        heartbeat_at=timezone.now(),
+    )
+
+
+def requeue_stale_jobs(older_than):
+    """Devuelve a la cola los jobs RUNNING sin latido desde ``older_than`` (su worker murió)."""
+    cutoff = timezone.now() - older_than
+    return ReportJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=ReportJob.STATUS_RUNNING,
+    ).update(status=ReportJob.STATUS_PENDING, started_at=None, heartbeat_at=None)
+
+
+def result_file(job):
+    return Path(settings.REPORTS_RESULT_DIR) / str(job.company_id) / f'{job.report}-{job.pk}.{job.format}'
+
+
+def execute_job(job_id):
+    """Genera el archivo del job; se ejecuta dentro de un hilo o proceso del pool."""
+    close_old_connections()
+    tmp_path = None
+    try:
+        job = ReportJob.objects.select_related('company').get(pk=job_id)
+        build, columns = REPORT_BUILDERS[job.report]
+        rows = build(job.company, job.params or {}).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        path = result_file(job)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        count = 0
+        with tmp_path.open('w', encoding='utf-8', newline='') as handle:
+            for line in export_lines(rows, columns, job.format):
+                handle.write(line)
+                count += 1
+        os.replace(tmp_path, path)
+        if job.format == 'csv':
+            count -= 1  # encabezado
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=ReportJob.STATUS_DONE, result_path=str(path), rows=count, finished_at=timezone.now(),
+        )
+    except ReportJob.DoesNotExist:
+        pass  # lo borraron después de tomarlo: no hay a quién informar
+    except Exception as exc:  # el error queda en el job para que el usuario lo vea al consultar
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        ReportJob.objects.filter(pk=job_id).update(
+            status=ReportJob.STATUS_FAILED, error=str(exc)[:2000], finished_at=timezone.now(),
+        )
+    finally:
+        close_old_connections()
+    return job_id
+
+
+def purge_finished_jobs(older_than=timedelta(days=7)):
+    """Borra jobs terminados antiguos y sus archivos."""
+    old = ReportJob.objects.filter(
+        status__in=[ReportJob.STATUS_DONE, ReportJob.STATUS_FAILED], finished_at__lt=timezone.now() - older_than,
+    )
+    for path in old.exclude(result_path='').values_list('result_path', flat=True):
+        Path(path).unlink(missing_ok=True)
+    return old.delete()[0]
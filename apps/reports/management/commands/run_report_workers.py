@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.reports.jobs import (
+    HEARTBEAT_INTERVAL, claim_next_job, heartbeat_jobs, purge_finished_jobs, requeue_stale_jobs,
+)
+from apps.reports.worker import init_process, run_job
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de reportes en segundo plano con un pool de hilos o procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help='process evita el GIL en reportes que formatean muchas filas')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Segundos entre consultas a la cola vacía')
+        parser.add_argument('--once', action='store_true', help='Procesa lo pendiente y termina')
+        parser.add_argument('--stale-minutes', type=int, default=5,
+                            help='Reencola jobs RUNNING sin latido desde hace estos minutos (worker caído)')
+        parser.add_argument('--purge-days', type=int, default=7, help='Borra jobs terminados y sus archivos tras N días')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        requeued = requeue_stale_jobs(stale_after)
+        purged = purge_finished_jobs(timedelta(days=options['purge_days']))
+        self.stdout.write(f'Reencolados: {requeued} | Purgados: {purged}')
+
+        if options['mode'] == 'process':
+            # "spawn": cada proceso inicializa Django y abre su propia conexión (nada heredado del padre).
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_process,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-worker')
+
+        running = {}
+        processed = 0
+        last_beat = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() - last_beat >= HEARTBEAT_INTERVAL.total_seconds():
+                    # Latido de los jobs propios y barrido de los de workers caídos en cualquier host.
+                    heartbeat_jobs(list(running.values()))
+                    requeued = requeue_stale_jobs(stale_after)
+                    if requeued:
+                        self.stdout.write(f'Reencolados: {requeued}')
+                    last_beat = time.monotonic()
+                # Solo se reclaman tantos jobs como hilos/procesos libres haya.
+                while len(running) < workers:
+                    job_id = claim_next_job()
+                    if job_id is None:
+                        break
+                    running[executor.submit(run_job, job_id)] = job_id
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as exc:  # p. ej. un proceso del pool que murió: se informa y se sigue
+                        self.stderr.write(f'Job {job_id} falló: {exc!r}')
+                    else:
+                        self.stdout.write(f'Job {job_id} terminado')
+                    processed += 1
+        except KeyboardInterrupt:
+            self.stdout.write('Deteniendo workers...')
+        finally:
+            executor.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(f'Jobs procesados: {processed}'))
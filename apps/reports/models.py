@@ -0,0 +1,45 @@
+from django.db import models
+
+from apps.core.models import Company
+
+
+class ReportJob(models.Model):
+    """Reporte pedido en segundo plano; lo ejecuta ``manage.py run_report_workers``."""
+    REPORT_STOCK = 'stock'
+    REPORT_SALES = 'sales'
+    REPORT_SUPPLIERS = 'suppliers'
+    REPORT_CHOICES = [
+        (REPORT_STOCK, 'Stock'),
+        (REPORT_SALES, 'Ventas'),
+        (REPORT_SUPPLIERS, 'Proveedores'),
+    ]
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_DONE, 'Listo'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+    FORMAT_CHOICES = [('csv', 'CSV'), ('jsonl', 'JSONL')]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    requested_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True)
+    report = models.CharField(max_length=20, choices=REPORT_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    result_path = models.CharField(max_length=500, blank=True)
+    rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='reportjob_queue_idx'),
+        ]
@@ -0,0 +1,21 @@
+from rest_framework import serializers
+
+from .jobs import REPORT_PARAMS
+from .models import ReportJob
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportJob
+        fields = ['id', 'report', 'format', 'params', 'status', 'rows', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = ['id', 'status', 'rows', 'error', 'created_at', 'started_at', 'finished_at']
+
+    def validate(self, attrs):
+        params = attrs.get('params') or {}
+        if not isinstance(params, dict):
+            raise serializers.ValidationError({'params': 'Debe ser un objeto'})
+        unknown = set(params) - REPORT_PARAMS[attrs['report']]
+        if unknown:
+            raise serializers.ValidationError({'params': f"Parámetros no soportados: {', '.join(sorted(unknown))}"})
+        attrs['params'] = {key: str(value) for key, value in params.items() if value not in (None, '')}
+        return attrs
@@ -0,0 +1,57 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company, Plan, Subscription
+from apps.inventory.models import Branch, Inventory, Product
+
+User = get_user_model()
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        plan, _ = Plan.objects.get_or_create(code='PREMIUM', defaults={'name': 'Premium', 'monthly_price': 0})
+        Subscription.objects.create(
+            company=self.company, plan=plan, status=Subscription.STATUS_ACTIVE,
+            start_date=date.today() - timedelta(days=1), end_date=date.today() + timedelta(days=30),
+        )
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        products = Product.objects.bulk_create([
+            Product(company=self.company, sku=f'SKU-{i}', name=f'Producto {i}', price=10, cost=5) for i in range(3)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(company=self.company, branch=branch, product=p, stock=i, reorder_point=1) for i, p in enumerate(products)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_stock_report_streams_csv_and_jsonl(self):
+        response = self.client.get(reverse('report-stock'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'branch__name,product__sku,product__name,stock,reorder_point')
+        self.assertEqual(len(lines), 4)
+
+        response = self.client.get(reverse('report-stock'), {'format': 'jsonl'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['product__sku'] for row in rows], ['SKU-0', 'SKU-1', 'SKU-2'])
+
+    def test_supplier_report_csv_and_json_default(self):
+        response = self.client.get(reverse('report-suppliers'), {'format': 'csv'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="proveedores.csv"')
+        self.assertEqual(self.client.get(reverse('report-sales')).status_code, 200)
+
+    def test_web_stock_report_export(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('report_stock'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
@@ -0,0 +1,81 @@
+import threading
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.caching import PROCESS_LOCAL_MAX_AGE, data_version, single_flight
+from apps.core.models import Company, Plan, Subscription
+from apps.inventory.models import Branch, Inventory, InventoryMovement, Product
+from apps.inventory.services import apply_stock_deltas
+from apps.reports.cache import REPORT_CACHE_TIMEOUT, cached_report
+
+User = get_user_model()
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        plan, _ = Plan.objects.get_or_create(code='PREMIUM', defaults={'name': 'Premium', 'monthly_price': 0})
+        Subscription.objects.create(
+            company=self.company, plan=plan, status=Subscription.STATUS_ACTIVE,
+            start_date=date.today() - timedelta(days=1), end_date=date.today() + timedelta(days=30),
+        )
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.product = Product.objects.create(company=self.company, sku='SKU-1', name='Producto', price=10, cost=5)
+        Inventory.objects.create(company=self.company, branch=self.branch, product=self.product, stock=5)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_stock_report_is_cached_until_stock_changes(self):
+        first = self.client.get(reverse('report-stock'))
+        with self.assertNumQueries(0):
+            # Autenticación forzada y entitlements en caché: solo queda la lectura del reporte, que también se cachea.
+            cached = self.client.get(reverse('report-stock'))
+        self.assertEqual(first.data, cached.data)
+
+        version = data_version(self.company.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_deltas(self.company, [{'branch': self.branch.id, 'product': self.product.id, 'quantity_delta': -2}],
+                               movement_type=InventoryMovement.MOV_ADJUST)
+        self.assertNotEqual(data_version(self.company.id), version)
+        self.assertEqual(self.client.get(reverse('report-stock')).data[0]['stock'], 3)
+
+    def test_process_local_cache_bounds_report_age(self):
+        # Con LocMem otro worker puede avanzar data_version sin que este lo vea.
+        with mock.patch('apps.reports.cache.single_flight') as flight:
+            cached_report(self.company.id, 'stock', {}, list)
+            self.assertEqual(flight.call_args.args[2], PROCESS_LOCAL_MAX_AGE)
+            with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+            }}):
+                cached_report(self.company.id, 'stock', {}, list)
+            self.assertEqual(flight.call_args.args[2], REPORT_CACHE_TIMEOUT)
+
+    def test_single_flight_computes_once_for_concurrent_misses(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'resultado'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight('test:sf', compute, 60))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['resultado'] * 8)
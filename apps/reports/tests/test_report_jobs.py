@@ -0,0 +1,141 @@
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import Company, Plan, Subscription
+from apps.inventory.models import Branch, Inventory, Product
+from apps.reports.jobs import claim_next_job, execute_job, heartbeat_jobs, requeue_stale_jobs, result_file
+from apps.reports.models import ReportJob
+
+User = get_user_model()
+
+
+class ReportJobSetupMixin:
+    def create_tenant(self, role=User.ROLE_GERENTE):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        plan, _ = Plan.objects.get_or_create(code='PREMIUM', defaults={'name': 'Premium', 'monthly_price': 0})
+        Subscription.objects.create(
+            company=self.company, plan=plan, status=Subscription.STATUS_ACTIVE,
+            start_date=date.today() - timedelta(days=1), end_date=date.today() + timedelta(days=30),
+        )
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=role, company=self.company,
+        )
+        branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        product = Product.objects.create(company=self.company, sku='SKU-1', name='Producto 1', price=10, cost=5)
+        Inventory.objects.create(company=self.company, branch=branch, product=product, stock=7)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+
+class ReportJobApiTests(ReportJobSetupMixin, TestCase):
+    def setUp(self):
+        self.result_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.result_dir.cleanup)
+        override = override_settings(REPORTS_RESULT_DIR=self.result_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.create_tenant()
+
+    def test_submit_poll_and_download(self):
+        response = self.client.post(reverse('report-job-list'), {'report': 'stock', 'format': 'csv'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['id']
+
+        download_url = reverse('report-job-download', args=[job_id])
+        self.assertEqual(self.client.get(download_url).status_code, 409)
+
+        self.assertEqual(claim_next_job(), job_id)
+        self.assertIsNone(claim_next_job())
+        execute_job(job_id)
+
+        status_response = self.client.get(reverse('report-job-detail', args=[job_id]))
+        self.assertEqual(status_response.data['status'], ReportJob.STATUS_DONE)
+        self.assertEqual(status_response.data['rows'], 1)
+        content = b''.join(self.client.get(download_url).streaming_content).decode()
+        self.assertIn('Casa Matriz,SKU-1,Producto 1,7,0', content)
+
+    def test_deleted_and_failed_jobs_do_not_escape(self):
+        job = ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv')
+        deleted_id = ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv').pk
+        ReportJob.objects.filter(pk=deleted_id).delete()
+        self.assertEqual(execute_job(deleted_id), deleted_id)
+
+        def broken_lines(rows, columns, fmt):
+            yield 'branch__name\n'
+            raise OSError('disco lleno')
+
+        with mock.patch('apps.reports.jobs.export_lines', broken_lines):
+            execute_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ReportJob.STATUS_FAILED, 'disco lleno'))
+        self.assertEqual(list(Path(result_file(job)).parent.iterdir()), [])
+
+    def test_requeue_uses_the_heartbeat(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        alive = ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv')
+        dead = ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv')
+        ReportJob.objects.filter(pk__in=[alive.pk, dead.pk]).update(
+            status=ReportJob.STATUS_RUNNING, started_at=long_ago, heartbeat_at=long_ago,
+        )
+        # Un job largo pero con latido reciente no se le quita a su worker.
+        self.assertEqual(heartbeat_jobs([alive.pk]), 1)
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=5)), 1)
+        alive.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual(alive.status, ReportJob.STATUS_RUNNING)
+        self.assertEqual((dead.status, dead.started_at, dead.heartbeat_at), (ReportJob.STATUS_PENDING, None, None))
+
+    def test_rejects_unknown_params(self):
+        response = self.client.post(
+            reverse('report-job-list'), {'report': 'stock', 'params': {'date_from': '2024-01-01'}}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(REPORTS_RESULT_DIR=tempfile.gettempdir())
+class ReportWorkerCommandTests(ReportJobSetupMixin, TransactionTestCase):
+    def test_thread_pool_drains_queue(self):
+        self.create_tenant()
+        jobs = [ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_SALES, format='jsonl') for _ in range(3)]
+        call_command('run_report_workers', workers=2, once=True, stdout=StringIO())
+        statuses = set(ReportJob.objects.filter(pk__in=[job.pk for job in jobs]).values_list('status', flat=True))
+        self.assertEqual(statuses, {ReportJob.STATUS_DONE})
+
+    def test_failed_future_does_not_stop_the_loop(self):
+        self.create_tenant()
+        jobs = [ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv') for _ in range(2)]
+        err = StringIO()
+        with mock.patch('apps.reports.management.commands.run_report_workers.run_job', side_effect=RuntimeError('pool')):
+            call_command('run_report_workers', workers=1, once=True, stdout=StringIO(), stderr=err)
+        self.assertEqual(err.getvalue().count('falló'), len(jobs))
+
+    @mock.patch('apps.reports.management.commands.run_report_workers.HEARTBEAT_INTERVAL', timedelta(0))
+    def test_loop_requeues_jobs_of_dead_workers(self):
+        self.create_tenant()
+        job = ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv')
+        orphan = ReportJob.objects.create(company=self.company, report=ReportJob.REPORT_STOCK, format='csv')
+        long_ago = timezone.now() - timedelta(hours=1)
+
+        def run_job(job_id):
+            if job_id == job.pk:
+                # Otro worker murió con este job tomado después del barrido inicial.
+                ReportJob.objects.filter(pk=orphan.pk).update(
+                    status=ReportJob.STATUS_RUNNING, started_at=long_ago, heartbeat_at=long_ago,
+                )
+            return execute_job(job_id)
+
+        with mock.patch('apps.reports.management.commands.run_report_workers.run_job', run_job):
+            call_command('run_report_workers', workers=1, once=True, poll_interval=0.1, stdout=StringIO())
+        orphan.refresh_from_db()
+        self.assertEqual(orphan.status, ReportJob.STATUS_DONE)
@@ -1,8 +1,12 @@
 from django.urls import path
-from .views import StockReportView, SalesReportView, SupplierReportView
+from rest_framework.routers import DefaultRouter
+from .views import StockReportView, SalesReportView, SupplierReportView, ReportJobViewSet
+
+router = DefaultRouter()
+router.register(r'reports/jobs', ReportJobViewSet, basename='report-job')
 
 urlpatterns = [
     path('reports/stock/', StockReportView.as_view(), name='report-stock'),
     path('reports/sales/', SalesReportView.as_view(), name='report-sales'),
     path('reports/suppliers/', SupplierReportView.as_view(), name='report-suppliers'),
-]
+] + router.urls
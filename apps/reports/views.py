@@ -1,53 +1,102 @@
+from django.http import FileResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.views import APIView
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
-from rest_framework import status
-from django.db.models import Sum, Count, Max
-from django.db.models.functions import TruncDay, TruncMonth
+from apps.accounts.models import User
 from apps.accounts.permissions import IsAdminOrGerente
 from apps.core.permissions import IsActive, CompanyPlanAllowsReports
-from apps.inventory.models import Inventory, Branch, Supplier
-from apps.sales.models import Sale
+from .cache import cached_report
+from .models import ReportJob
+from .serializers import ReportJobSerializer
+from .exports import (
+    CSVRenderer, JSONLRenderer, SALES_COLUMNS, STOCK_COLUMNS, SUPPLIER_COLUMNS,
+    sales_rows, stock_rows, stream_export, supplier_rows,
+)
 
 
-class StockReportView(APIView):
-    permission_classes = [IsActive, CompanyPlanAllowsReports]
+class ReportView(APIView):
+    """Base de los reportes: ``?format=csv|jsonl`` responde en streaming; el JSON se sirve desde caché."""
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, CSVRenderer, JSONLRenderer]
+    export_name = None
+    export_columns = ()
+
+    def get_rows(self, request):
+        raise NotImplementedError
 
     def get(self, request):
-        branch_id = request.query_params.get('branch')
-        qs = Inventory.objects.filter(company=request.user.company)
-        if branch_id:
-            qs = qs.filter(branch_id=branch_id)
-        data = list(qs.values('branch__name', 'product__name', 'stock'))
-        return Response(data)
+        rows = self.get_rows(request)
+        fmt = request.accepted_renderer.format
+        if fmt in ('csv', 'jsonl'):
+            return stream_export(rows, self.export_columns, fmt, self.export_name)
+        params = {key: value for key, value in request.query_params.items() if key != 'format'}
+        return Response(cached_report(request.user.company_id, self.export_name, params, lambda: list(rows)))
 
 
-class SalesReportView(APIView):
+class StockReportView(ReportView):
     permission_classes = [IsActive, CompanyPlanAllowsReports]
+    export_name = 'stock'
+    export_columns = STOCK_COLUMNS
 
-    def get(self, request):
-        branch_id = request.query_params.get('branch')
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        group = request.query_params.get('group', 'day')
-        qs = Sale.objects.filter(company=request.user.company)
-        if branch_id:
-            qs = qs.filter(branch_id=branch_id)
-        if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
-        if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
-        annotator = TruncDay('created_at') if group == 'day' else TruncMonth('created_at')
-        qs = qs.annotate(period=annotator).values('period').annotate(total=Sum('total')).order_by('period')
-        return Response(qs)
-
-
-class SupplierReportView(APIView):
+    def get_rows(self, request):
+        return stock_rows(request.user.company, request.query_params.get('branch'))
+
+
+class SalesReportView(ReportView):
+    permission_classes = [IsActive, CompanyPlanAllowsReports]
+    export_name = 'ventas'
+    export_columns = SALES_COLUMNS
+
+    def get_rows(self, request):
+        params = request.query_params
+        return sales_rows(
+            request.user.company,
+            branch_id=params.get('branch'),
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
+            group=params.get('group', 'day'),
+        )
+
+
+class SupplierReportView(ReportView):
     permission_classes = [IsActive, CompanyPlanAllowsReports, IsAdminOrGerente]
+    export_name = 'proveedores'
+    export_columns = SUPPLIER_COLUMNS
 
-    def get(self, request):
-        qs = Supplier.objects.filter(company=request.user.company).annotate(
-            total_purchases=Count('purchase', distinct=True),
-            last_purchase=Max('purchase__date'),
-            products_count=Count('purchase__items__product', distinct=True),
-        ).values('name', 'rut', 'total_purchases', 'products_count', 'last_purchase')
-        return Response(qs)
+    def get_rows(self, request):
+        return supplier_rows(request.user.company)
+
+
+class ReportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Reportes asíncronos: POST encola, GET consulta el estado y /download/ entrega el archivo."""
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsActive, CompanyPlanAllowsReports]
+
+    def get_queryset(self):
+        return ReportJob.objects.filter(company=self.request.user.company).order_by('-created_at')
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if serializer.validated_data['report'] == ReportJob.REPORT_SUPPLIERS and user.role not in (
+            User.ROLE_ADMIN_CLIENTE, User.ROLE_GERENTE,
+        ):
+            raise PermissionDenied('Solo administradores o gerentes pueden pedir el reporte de proveedores')
+        serializer.save(company=user.company, requested_by=user)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ReportJob.STATUS_DONE:
+            return Response({'detail': 'El reporte aún no está listo', 'status': job.status}, status=status.HTTP_409_CONFLICT)
+        try:
+            handle = open(job.result_path, 'rb')
+        except FileNotFoundError:
+            return Response({'detail': 'El archivo del reporte ya no existe'}, status=status.HTTP_410_GONE)
+        return FileResponse(handle, as_attachment=True, filename=f'{job.report}-{job.pk}.{job.format}')
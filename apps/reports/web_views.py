@@ -1,14 +1,12 @@
 from django.contrib import messages
-from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
-from django.db.models import Count, Max
-
 from apps.accounts.models import User
 from apps.core.access import plan_allows
-from apps.inventory.models import Branch, Inventory, Supplier
+from apps.inventory.models import Branch, Inventory
 from apps.inventory.web_views import _guard_role
+from .exports import EXPORT_FORMATS, STOCK_COLUMNS, SUPPLIER_COLUMNS, stock_rows, stream_export, supplier_rows
 
 
 @login_required
@@ -17,13 +15,16 @@ def stock_report(request):
     if denial:
         return denial
 
-    company = request.user.company
+    company = request.tenant.company
     reports_enabled = plan_allows(request.user, 'reports')
     if not reports_enabled:
         messages.warning(request, 'Tu plan no permite ver reportes de stock. Mejora el plan para habilitarlos.')
 
     branches = Branch.objects.filter(company=company).order_by('name')
     selected_branch_id = request.GET.get('branch')
+    export_format = request.GET.get('format')
+    if reports_enabled and export_format in EXPORT_FORMATS:
+        return stream_export(stock_rows(company, selected_branch_id), STOCK_COLUMNS, export_format, 'stock')
     inventories = Inventory.objects.filter(company=company).select_related('product', 'branch').order_by('product__name')
     if selected_branch_id:
         inventories = inventories.filter(branch_id=selected_branch_id)
@@ -43,16 +44,16 @@ def suppliers_report(request):
     if denial:
         return denial
 
-    company = request.user.company
+    company = request.tenant.company
     reports_enabled = plan_allows(request.user, 'reports')
     if not reports_enabled:
         messages.warning(request, 'Tu plan no permite ver reportes de proveedores. Mejora el plan para habilitarlos.')
 
-    suppliers = Supplier.objects.filter(company=company).annotate(
-        total_purchases=Count('purchase', distinct=True),
-        last_purchase=Max('purchase__date'),
-        products_count=Count('purchase__items__product', distinct=True),
-    ).order_by('name') if reports_enabled else Supplier.objects.none()
+    export_format = request.GET.get('format')
+    if reports_enabled and export_format in EXPORT_FORMATS:
+        return stream_export(supplier_rows(company), SUPPLIER_COLUMNS, export_format, 'proveedores')
+
+    suppliers = list(supplier_rows(company)) if reports_enabled else []
 
     context = {
         'suppliers': suppliers,
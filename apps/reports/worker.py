@@ -0,0 +1,19 @@
+"""Puntos de entrada de los procesos del pool de reportes.
+
+Este módulo no importa modelos al cargarse: con el inicio "spawn" el proceso hijo
+lo importa antes de que Django esté configurado.
+"""
+import os
+
+import django
+
+
+def init_process(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def run_job(job_id):
+    from .jobs import execute_job
+
+    return execute_job(job_id)
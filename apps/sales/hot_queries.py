@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from apps.core.dates import business_date
+from apps.core.hot_queries import register
+
+from .models import Order, Sale
+
+
+@register('sales.by_company_date')
+def sales_by_company_date(company_id):
+    return Sale.objects.filter(company_id=company_id, business_date__gte=business_date() - timedelta(days=30))
+
+
+@register('sales.by_seller')
+def sales_by_seller(company_id):
+    return Sale.objects.filter(company_id=company_id, seller_id=1)
+
+
+@register('orders.by_status')
+def orders_by_status(company_id):
+    return Order.objects.filter(company_id=company_id, status=Order.STATUS_PENDING)
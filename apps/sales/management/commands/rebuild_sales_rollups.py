@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.sales.services import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de ventas (DailySalesRollup) desde las ventas registradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', help='Limita a una empresa (repetible)')
+
+    def handle(self, *args, **options):
+        created = rebuild_sales_rollups(options.get('company'))
+        self.stdout.write(self.style.SUCCESS(f'Resumen diario reconstruido: {created} filas'))
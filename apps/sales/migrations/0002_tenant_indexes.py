@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:17
+
+from django.db import migrations, models
+
+from apps.core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['company', 'status'], name='order_company_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='sale',
+            index=models.Index(fields=['company', 'created_at'], name='sale_company_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='sale',
+            index=models.Index(fields=['company', 'seller'], name='sale_company_seller_idx'),
+        ),
+    ]
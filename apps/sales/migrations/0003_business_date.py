@@ -0,0 +1,62 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:19
+
+import apps.core.dates
+from django.db import migrations, models
+
+from apps.core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción.
+    atomic = False
+
+    dependencies = [
+        ('sales', '0002_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            # Las filas existentes quedan en NULL hasta correr backfill_business_date;
+            # el default solo aplica a las nuevas.
+            database_operations=[
+                migrations.AddField(
+                    model_name='order',
+                    name='business_date',
+                    field=models.DateField(editable=False, null=True),
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='order',
+                    name='business_date',
+                    field=models.DateField(default=apps.core.dates.business_date, editable=False, null=True),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            # Las filas existentes quedan en NULL hasta correr backfill_business_date;
+            # el default solo aplica a las nuevas.
+            database_operations=[
+                migrations.AddField(
+                    model_name='sale',
+                    name='business_date',
+                    field=models.DateField(editable=False, null=True),
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='sale',
+                    name='business_date',
+                    field=models.DateField(default=apps.core.dates.business_date, editable=False, null=True),
+                ),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['company', 'business_date'], name='order_company_bdate_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='sale',
+            index=models.Index(fields=['company', 'business_date'], name='sale_company_bdate_idx'),
+        ),
+    ]
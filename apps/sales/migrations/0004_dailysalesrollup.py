@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_business_date'),
+        ('core', '0002_planfeature_remove_subscription_active_and_more'),
+        ('sales', '0003_business_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField()),
+                ('payment_method', models.CharField(max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tickets', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.branch')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'business_date'], name='rollup_company_bdate_idx')],
+                'unique_together': {('company', 'branch', 'business_date', 'payment_method')},
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from apps.core.dates import business_date
 from apps.core.models import Company
 from apps.inventory.models import Branch, Product
 
@@ -11,6 +12,14 @@ class Sale(models.Model):
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     payment_method = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
+    business_date = models.DateField(default=business_date, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'created_at'], name='sale_company_created_idx'),
+            models.Index(fields=['company', 'seller'], name='sale_company_seller_idx'),
+            models.Index(fields=['company', 'business_date'], name='sale_company_bdate_idx'),
+        ]
 
 
 class SaleItem(models.Model):
@@ -20,6 +29,23 @@ class SaleItem(models.Model):
     unit_price = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
 
 
+class DailySalesRollup(models.Model):
+    """Totales de venta por (empresa, sucursal, día local, medio de pago), mantenidos al registrar cada venta."""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE)
+    business_date = models.DateField()
+    payment_method = models.CharField(max_length=50)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tickets = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('company', 'branch', 'business_date', 'payment_method')
+        indexes = [
+            models.Index(fields=['company', 'business_date'], name='rollup_company_bdate_idx'),
+        ]
+
+
 class CartItem(models.Model):
     user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='cart_items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -45,6 +71,13 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    business_date = models.DateField(default=business_date, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'status'], name='order_company_status_idx'),
+            models.Index(fields=['company', 'business_date'], name='order_company_bdate_idx'),
+        ]
 
 
 class OrderItem(models.Model):
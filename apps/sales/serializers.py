@@ -1,13 +1,65 @@
 from rest_framework import serializers
 from django.utils import timezone
 from apps.inventory.models import Branch, Product, Inventory, InventoryMovement
+from apps.inventory.sku_index import get_sku_index
 from .models import Sale, SaleItem, CartItem, Order, OrderItem
 
+FOREIGN_PRODUCT = 'Producto no pertenece a la empresa del usuario'
+
+
+def _request_sku_index(serializer):
+    company_id = getattr(serializer.context['request'].user, 'company_id', None)
+    if not company_id:
+        raise serializers.ValidationError(FOREIGN_PRODUCT)
+    return get_sku_index(company_id)
+
+
+class IndexedProductField(serializers.RelatedField):
+    """Producto por id resuelto en el índice en memoria de la empresa (sin consulta por línea)."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('read_only', False)
+        super().__init__(queryset=None, **kwargs)
+
+    def get_queryset(self):
+        return Product.objects.none()
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_internal_value(self, data):
+        index = _request_sku_index(self)
+        product = index.by_id(data)
+        if product is None:
+            raise serializers.ValidationError(FOREIGN_PRODUCT)
+        return index.instance(product)
+
+    def to_representation(self, value):
+        return value.pk
+
 
 class SaleItemSerializer(serializers.ModelSerializer):
+    product = IndexedProductField(required=False)
+    sku = serializers.CharField(write_only=True, required=False)
+
     class Meta:
         model = SaleItem
-        fields = ['product', 'quantity', 'unit_price']
+        fields = ['product', 'sku', 'quantity', 'unit_price']
+        extra_kwargs = {'unit_price': {'required': False}}
+
+    def validate(self, attrs):
+        # Un escaneo manda el código (``sku``) y, si no trae precio, se usa el del catálogo.
+        code = attrs.pop('sku', None)
+        if 'product' not in attrs:
+            if not code:
+                raise serializers.ValidationError({'product': 'Indica el producto o su SKU.'})
+            index = _request_sku_index(self)
+            product = index.by_sku(code)
+            if product is None:
+                raise serializers.ValidationError({'sku': f'SKU {code} no encontrado.'})
+            attrs['product'] = index.instance(product)
+        attrs.setdefault('unit_price', attrs['product'].price)
+        return attrs
 
 
 class SaleSerializer(serializers.ModelSerializer):
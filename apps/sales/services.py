@@ -1,48 +1,169 @@
 from decimal import Decimal
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
-from apps.inventory.models import Inventory, InventoryMovement
-from .models import Sale, SaleItem
+from apps.core.caching import bump_data_version
+from apps.inventory.models import InventoryMovement
+from apps.inventory.services import apply_stock_deltas, retry_on_deadlock
+from .models import CartItem, DailySalesRollup, Order, OrderItem, Sale, SaleItem
 
 
+@retry_on_deadlock
 def create_sale(validated_data, user):
-    items_data = list(validated_data.pop('items'))
-    branch = validated_data['branch']
-    if branch.company != user.company:
+    items_data = list(validated_data['items'])
+    sale_data = {key: value for key, value in validated_data.items() if key != 'items'}
+    branch = sale_data['branch']
+    if branch.company_id != user.company_id:
         raise ValidationError('Sucursal invalida')
-    total = Decimal('0')
+    for item in items_data:
+        if item['product'].company_id != user.company_id:
+            raise ValidationError('Producto no pertenece a la empresa del usuario')
+    total = sum((item['quantity'] * item['unit_price'] for item in items_data), Decimal('0'))
     with transaction.atomic():
-        sale = Sale.objects.create(company=user.company, seller=user, **validated_data)
-        for item in items_data:
-            product = item['product']
-            quantity = item['quantity']
-            unit_price = item['unit_price']
-            if product.company != user.company:
-                raise ValidationError('Producto no pertenece a la empresa del usuario')
-            try:
-                inventory = Inventory.objects.select_for_update().get(company=user.company, branch=branch, product=product)
-            except Inventory.DoesNotExist:
-                raise ValidationError('Inventario no encontrado para el producto/sucursal')
-            if inventory.stock < quantity:
-                raise ValidationError('Stock insuficiente')
-            inventory.stock -= quantity
-            inventory.save()
-            SaleItem.objects.create(sale=sale, **item)
-            InventoryMovement.objects.create(
-                company=user.company,
-                branch=branch,
-                product=product,
-                movement_type=InventoryMovement.MOV_SALE,
-                quantity_delta=-quantity,
-                reason='Venta',
-                created_by=user,
-            )
-            total += quantity * unit_price
-        sale.total = total
-        sale.save()
+        sale = Sale.objects.create(company=user.company, seller=user, total=total, **sale_data)
+        apply_stock_deltas(
+            user.company,
+            [
+                {'branch': branch.id, 'product': item['product'].id, 'quantity_delta': -item['quantity'], 'reason': 'Venta'}
+                for item in items_data
+            ],
+            movement_type=InventoryMovement.MOV_SALE,
+            user=user,
+        )
+        SaleItem.objects.bulk_create([SaleItem(sale=sale, **item) for item in items_data])
         if sale.created_at > timezone.now():
             raise ValidationError('La fecha de venta no puede estar en el futuro')
+        add_sale_to_rollup(sale, sum(item['quantity'] for item in items_data))
     return sale
+
+
+@retry_on_deadlock
+def checkout_cart(user, branch, *, record_sale=False, payment_method='tienda'):
+    """Convierte el carrito del usuario en una Order (y opcionalmente una Sale) descontando stock."""
+    company = user.company
+    with transaction.atomic():
+        cart_items = list(
+            CartItem.objects.select_for_update()
+            .filter(user=user, product__company=company)
+            .select_related('product')
+        )
+        if not cart_items:
+            raise ValidationError('Carrito vacio')
+        total = sum((ci.product.price * ci.quantity for ci in cart_items), Decimal('0'))
+        order = Order.objects.create(
+            company=company,
+            branch=branch,
+            customer_name=user.username or 'Cliente',
+            customer_email=user.email or '',
+            total=total,
+        )
+        apply_stock_deltas(
+            company,
+            [
+                {'branch': branch.id, 'product': ci.product_id, 'quantity_delta': -ci.quantity, 'reason': 'Checkout'}
+                for ci in cart_items
+            ],
+            movement_type=InventoryMovement.MOV_SALE,
+            user=user,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=ci.product, quantity=ci.quantity, unit_price=ci.product.price)
+            for ci in cart_items
+        ])
+        sale = None
+        if record_sale:
+            sale = Sale.objects.create(
+                company=company, branch=branch, seller=user, payment_method=payment_method, total=total,
+            )
+            SaleItem.objects.bulk_create([
+                SaleItem(sale=sale, product=ci.product, quantity=ci.quantity, unit_price=ci.product.price)
+                for ci in cart_items
+            ])
+            add_sale_to_rollup(sale, sum(ci.quantity for ci in cart_items))
+        CartItem.objects.filter(pk__in=[ci.pk for ci in cart_items]).delete()
+    return order, sale
+
+
+def add_sale_to_rollup(sale, units):
+    """Suma la venta a su fila de DailySalesRollup; debe llamarse dentro de la transacción de la venta."""
+    key = {
+        'company_id': sale.company_id,
+        'branch_id': sale.branch_id,
+        'business_date': sale.business_date,
+        'payment_method': sale.payment_method,
+    }
+    increments = {'total': F('total') + sale.total, 'tickets': F('tickets') + 1, 'units': F('units') + units}
+    bump_data_version(sale.company_id)
+    if DailySalesRollup.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(**key, total=sale.total, tickets=1, units=units)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT.
+        DailySalesRollup.objects.filter(**key).update(**increments)
+
+
+def delete_sale(sale):
+    """Elimina la venta y descuenta su aporte del resumen diario."""
+    with transaction.atomic():
+        units = sale.items.aggregate(units=Sum('quantity'))['units'] or 0
+        DailySalesRollup.objects.filter(
+            company_id=sale.company_id,
+            branch_id=sale.branch_id,
+            business_date=sale.business_date,
+            payment_method=sale.payment_method,
+        ).update(total=F('total') - sale.total, tickets=F('tickets') - 1, units=F('units') - units)
+        sale.delete()
+        bump_data_version(sale.company_id)
+
+
+def rebuild_sales_rollups(company_ids=None):
+    """Recalcula DailySalesRollup desde Sale/SaleItem (historial o reparación); devuelve filas creadas.
+
+    Las ventas sin business_date (pendientes de backfill_business_date) se omiten.
+    """
+    sales = Sale.objects.filter(business_date__isnull=False)
+    items = SaleItem.objects.filter(sale__business_date__isnull=False)
+    rollups = DailySalesRollup.objects.all()
+    if company_ids is not None:
+        sales = sales.filter(company_id__in=company_ids)
+        items = items.filter(sale__company_id__in=company_ids)
+        rollups = rollups.filter(company_id__in=company_ids)
+    key_fields = ('company_id', 'branch_id', 'business_date', 'payment_method')
+    # Unidades por separado: sumar total sobre el join con items lo multiplicaría.
+    units = {
+        (row['sale__company_id'], row['sale__branch_id'], row['sale__business_date'], row['sale__payment_method']): row['units']
+        for row in items.values(
+            'sale__company_id', 'sale__branch_id', 'sale__business_date', 'sale__payment_method',
+        ).annotate(units=Sum('quantity')).order_by()
+    }
+    with transaction.atomic():
+        affected = set(rollups.values_list('company_id', flat=True).distinct())
+        rollups.delete()
+        batch = []
+        created = 0
+        totals = sales.values(*key_fields).annotate(total=Sum('total'), tickets=Count('id')).order_by()
+        for row in totals.iterator(chunk_size=2000):
+            key = tuple(row[field] for field in key_fields)
+            affected.add(row['company_id'])
+            batch.append(DailySalesRollup(
+                company_id=row['company_id'],
+                branch_id=row['branch_id'],
+                business_date=row['business_date'],
+                payment_method=row['payment_method'],
+                total=row['total'] or 0,
+                tickets=row['tickets'],
+                units=units.get(key, 0) or 0,
+            ))
+            if len(batch) >= 1000:
+                DailySalesRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        DailySalesRollup.objects.bulk_create(batch)
+        created += len(batch)
+        bump_data_version(*affected)
+    return created
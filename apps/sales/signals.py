@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.caching import bump_data_version
+from .models import Order, Sale
+
+
+@receiver([post_save, post_delete], sender=Sale)
+@receiver([post_save, post_delete], sender=Order)
+def sales_data_changed(sender, instance, **kwargs):
+    bump_data_version(instance.company_id)
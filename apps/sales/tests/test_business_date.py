@@ -0,0 +1,44 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.dates import business_date
+from apps.core.models import Company
+from apps.inventory.models import Branch
+from apps.sales.models import Sale
+
+User = get_user_model()
+
+
+class BusinessDateTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+
+    def test_new_rows_get_local_business_date(self):
+        sale = Sale.objects.create(company=self.company, branch=self.branch, seller=self.user, payment_method='cash')
+        self.assertEqual(sale.business_date, business_date(sale.created_at))
+
+    def test_backfill_uses_santiago_day_and_filters_use_it(self):
+        sale = Sale.objects.create(company=self.company, branch=self.branch, seller=self.user, payment_method='cash', total=10)
+        # 02:00 UTC del 1 de marzo es todavía 29 de febrero en Santiago.
+        Sale.objects.filter(pk=sale.pk).update(
+            created_at=datetime(2024, 3, 1, 2, 0, tzinfo=dt_timezone.utc), business_date=None,
+        )
+        call_command('backfill_business_date', chunk_size=1, stdout=StringIO())
+        sale.refresh_from_db()
+        self.assertEqual(sale.business_date, date(2024, 2, 29))
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('sale-list'), {'date_from': '2024-02-29', 'date_to': '2024-02-29'})
+        self.assertEqual([row['id'] for row in response.data], [sale.id])
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.models import Company, Plan, Subscription
+from apps.inventory.models import Branch, Inventory, Product
+from apps.sales.models import CartItem, DailySalesRollup
+from apps.sales.services import checkout_cart, rebuild_sales_rollups
+
+User = get_user_model()
+
+
+class DailySalesRollupTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Company A', rut='12345678-5')
+        plan, _ = Plan.objects.get_or_create(code='PREMIUM', defaults={'name': 'Premium', 'monthly_price': 0})
+        Subscription.objects.create(
+            company=self.company, plan=plan, status=Subscription.STATUS_ACTIVE,
+            start_date=date.today() - timedelta(days=1), end_date=date.today() + timedelta(days=30),
+        )
+        self.user = User.objects.create_user(
+            username='gerente', password='pass1234', email='g@example.com', rut='11111111-1',
+            role=User.ROLE_GERENTE, company=self.company,
+        )
+        self.branch = Branch.objects.create(company=self.company, name='Casa Matriz', address='Centro')
+        self.product = Product.objects.create(company=self.company, sku='SKU-1', name='Producto 1', price=100, cost=50)
+        Inventory.objects.create(company=self.company, branch=self.branch, product=self.product, stock=50)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _sell(self, quantity, payment_method='cash'):
+        payload = {
+            'branch': self.branch.id,
+            'payment_method': payment_method,
+            'items': [{'product': self.product.id, 'quantity': quantity, 'unit_price': '100.00'}],
+        }
+        response = self.client.post(reverse('sale-list'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def _snapshot(self):
+        return sorted(DailySalesRollup.objects.values_list('payment_method', 'total', 'tickets', 'units'))
+
+    def test_sales_and_checkout_update_rollup_and_report(self):
+        self._sell(2)
+        self._sell(3)
+        self._sell(1, payment_method='card')
+        CartItem.objects.create(user=self.user, product=self.product, quantity=4)
+        checkout_cart(self.user, self.branch, record_sale=True)
+
+        self.assertEqual(self._snapshot(), [
+            ('card', Decimal('100.00'), 1, 1),
+            ('cash', Decimal('500.00'), 2, 5),
+            ('tienda', Decimal('400.00'), 1, 4),
+        ])
+        response = self.client.get(reverse('report-sales'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['total'], Decimal('1000.00'))
+        self.assertEqual(response.data[0]['tickets'], 4)
+
+    def test_rebuild_matches_incremental_and_delete_subtracts(self):
+        sale_id = self._sell(2)
+        self._sell(3)
+        self.client.delete(reverse('sale-detail', args=[sale_id]))
+        incremental = self._snapshot()
+        self.assertEqual(incremental, [('cash', Decimal('300.00'), 1, 3)])
+        rebuild_sales_rollups([self.company.id])
+        self.assertEqual(self._snapshot(), incremental)
@@ -1,14 +1,12 @@
 from rest_framework import viewsets, status, generics
-from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.decorators import action
-from django.db import transaction
 from apps.core.permissions import IsActive
 from apps.accounts.permissions import IsAdminOrGerente, IsInternal
-from apps.inventory.models import Inventory, InventoryMovement, Product, Branch
-from .models import Sale, SaleItem, CartItem, Order, OrderItem
+from apps.inventory.models import Branch
+from apps.inventory.services import InventoryNotFound
+from .models import Sale, CartItem
 from .serializers import SaleSerializer, CartItemSerializer, OrderSerializer
-from .services import create_sale
+from .services import checkout_cart, create_sale, delete_sale
 
 
 class SaleViewSet(viewsets.ModelViewSet):
@@ -27,13 +25,16 @@ class SaleViewSet(viewsets.ModelViewSet):
         if branch:
             qs = qs.filter(branch_id=branch)
         if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
+            qs = qs.filter(business_date__gte=date_from)
         if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
+            qs = qs.filter(business_date__lte=date_to)
         return qs
 
     def perform_create(self, serializer):
-        return create_sale(serializer.validated_data, self.request.user)
+        serializer.instance = create_sale(serializer.validated_data, self.request.user)
+
+    def perform_destroy(self, instance):
+        delete_sale(instance)
 
 
 class CartAddView(generics.GenericAPIView):
@@ -62,34 +63,10 @@ class CheckoutView(generics.GenericAPIView):
         branch = Branch.objects.filter(id=branch_id, company=request.user.company).first()
         if not branch:
             return Response({'detail': 'Sucursal invalida'}, status=status.HTTP_400_BAD_REQUEST)
-        cart_items = CartItem.objects.filter(user=request.user, product__company=request.user.company)
-        if not cart_items:
+        if not CartItem.objects.filter(user=request.user, product__company=request.user.company).exists():
             return Response({'detail': 'Carrito vacio'}, status=status.HTTP_400_BAD_REQUEST)
-        total = 0
-        with transaction.atomic():
-            order = Order.objects.create(company=request.user.company, branch=branch, customer_name=request.user.username, customer_email=request.user.email, total=0)
-            for ci in cart_items:
-                try:
-                    inventory = Inventory.objects.select_for_update().get(company=request.user.company, branch=branch, product=ci.product)
-                except Inventory.DoesNotExist:
-                    return Response({'detail': 'Inventario no encontrado para el producto/sucursal'}, status=status.HTTP_400_BAD_REQUEST)
-                if inventory.stock < ci.quantity:
-                    raise ValidationError('Stock insuficiente')
-                inventory.stock -= ci.quantity
-                inventory.save()
-                price = ci.product.price
-                total += price * ci.quantity
-                OrderItem.objects.create(order=order, product=ci.product, quantity=ci.quantity, unit_price=price)
-                InventoryMovement.objects.create(
-                    company=request.user.company,
-                    branch=branch,
-                    product=ci.product,
-                    movement_type=InventoryMovement.MOV_SALE,
-                    quantity_delta=-ci.quantity,
-                    reason='Checkout',
-                    created_by=request.user,
-                )
-            order.total = total
-            order.save()
-            cart_items.delete()
+        try:
+            order, _ = checkout_cart(request.user, branch)
+        except InventoryNotFound as exc:
+            return Response({'detail': str(exc.detail[0])}, status=status.HTTP_400_BAD_REQUEST)
         return Response(OrderSerializer(order).data)
@@ -6,7 +6,8 @@ from django.shortcuts import render, redirect
 from django.db.models import Sum
 
 from apps.accounts.models import User
-from apps.inventory.models import Branch, Product
+from apps.inventory.models import Branch
+from apps.inventory.sku_index import get_sku_index
 from apps.inventory.web_views import _guard_role
 from .models import Sale
 from .serializers import SaleSerializer
@@ -45,9 +46,9 @@ def sales_list(request):
     date_from_parsed = parse_date(date_from)
     date_to_parsed = parse_date(date_to)
     if date_from_parsed:
-        qs = qs.filter(created_at__date__gte=date_from_parsed)
+        qs = qs.filter(business_date__gte=date_from_parsed)
     if date_to_parsed:
-        qs = qs.filter(created_at__date__lte=date_to_parsed)
+        qs = qs.filter(business_date__lte=date_to_parsed)
 
     sales = qs.select_related('branch', 'seller').annotate(item_count=Sum('items__quantity')).order_by('-created_at')
 
@@ -70,7 +71,6 @@ def pos_new_sale(request):
 
     company = request.user.company
     branches = Branch.objects.filter(company=company).order_by('name')
-    products = Product.objects.filter(company=company).order_by('name')
     form_errors = []
     item_rows = []
     selected_branch_id = None
@@ -83,6 +83,8 @@ def pos_new_sale(request):
         payment_method_value = payment_method
         product_ids = request.POST.getlist('product[]') or request.POST.getlist('item_product')
         quantities = request.POST.getlist('quantity[]') or request.POST.getlist('item_quantity')
+        # Ids resueltos en el índice en memoria de la empresa: sin consultas por línea.
+        index = get_sku_index(company.id) if company else None
 
         items = []
         for idx, (pid, qty) in enumerate(zip(product_ids, quantities), start=1):
@@ -90,9 +92,10 @@ def pos_new_sale(request):
             qty = (qty or '').strip()
             if not pid and not qty:
                 continue
+            product = index.by_id(pid) if index and pid.isdigit() else None
             if not pid or not qty:
                 form_errors.append(f'Fila {idx}: indica producto y cantidad.')
-                item_rows.append({'product_id': pid, 'quantity': qty or '1'})
+                item_rows.append({'product_id': pid, 'product': product, 'quantity': qty or '1'})
                 continue
             try:
                 quantity_int = int(qty)
@@ -100,15 +103,13 @@ def pos_new_sale(request):
                     raise ValueError
             except ValueError:
                 form_errors.append(f'Fila {idx}: cantidad inválida (mínimo 1).')
-                item_rows.append({'product_id': pid, 'quantity': qty or '1'})
+                item_rows.append({'product_id': pid, 'product': product, 'quantity': qty or '1'})
                 continue
-            try:
-                product = products.get(pk=pid)
-            except Product.DoesNotExist:
+            if product is None:
                 form_errors.append(f'Fila {idx}: producto inválido.')
                 item_rows.append({'product_id': pid, 'quantity': qty or '1'})
                 continue
-            item_rows.append({'product_id': str(product.id), 'quantity': str(quantity_int)})
+            item_rows.append({'product_id': str(product.id), 'product': product, 'quantity': str(quantity_int)})
             items.append({'product': product.id, 'quantity': quantity_int, 'unit_price': str(product.price)})
 
         data = {
@@ -133,7 +134,6 @@ def pos_new_sale(request):
 
     return render(request, 'sales/pos.html', {
         'branches': branches,
-        'products': products,
         'form_errors': form_errors,
         'item_rows': item_rows,
         'selected_branch_id': selected_branch_id,
@@ -0,0 +1,53 @@
+"""Microcaché del catálogo público en el proxy (``deploy/nginx.conf``) y purga por surrogate keys.
+
+Las páginas anónimas de ``shop/products/`` salen con ``Cache-Control: public`` y
+``X-Accel-Expires`` (TTL del proxy; el navegador siempre revalida) más
+``Surrogate-Key`` con ``catalog-<empresa>`` (también las fichas: cualquier escritura
+de un producto avanza la versión del catálogo). Cuando cambia el catálogo se envía, ya confirmada la transacción, un ``PURGE`` a
+``EDGE_PURGE_URL`` con las claves en el mismo encabezado. Sin URL configurada la
+purga no hace nada y el TTL acota lo que puede quedar viejo.
+"""
+import logging
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+logger = logging.getLogger(__name__)
+
+EDGE_CACHE_TTL = 60
+EDGE_PURGE_TIMEOUT = 2
+
+
+def catalog_key(company_id) -> str:
+    return f'catalog-{company_id}'
+
+
+def edge_cache(request, response, keys):
+    """Marca la respuesta como cacheable por el proxy solo para visitantes anónimos."""
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True)
+        return response
+    patch_cache_control(response, public=True, max_age=0, s_maxage=EDGE_CACHE_TTL)
+    response['X-Accel-Expires'] = str(EDGE_CACHE_TTL)
+    response['Surrogate-Key'] = ' '.join(keys)
+    return response
+
+
+def purge(keys):
+    """Pide al proxy descartar las páginas con esas claves; un fallo se registra y no interrumpe la escritura."""
+    url = getattr(settings, 'EDGE_PURGE_URL', '')
+    if not url or not keys:
+        return False
+    request = urllib.request.Request(url, method='PURGE', headers={'Surrogate-Key': ' '.join(sorted(keys))})
+    try:
+        urllib.request.urlopen(request, timeout=EDGE_PURGE_TIMEOUT).close()
+    except urllib.error.HTTPError as exc:
+        if exc.code != 404:  # 404: no había nada cacheado con esas claves
+            logger.warning('Purga de %s falló: HTTP %s', keys, exc.code)
+            return False
+    except OSError as exc:
+        logger.warning('Purga de %s falló: %s', keys, exc)
+        return False
+    return True
@@ -0,0 +1,131 @@
+"""KPIs del dashboard en vivo (Server-Sent Events sobre ``config.asgi``).
+
+Por cada empresa con navegadores conectados corre una sola tarea que, en cada
+tick, ejecuta ``live_kpis`` (una consulta) y reparte a los suscriptores solo los
+valores que cambiaron. Consultar la base en cada tick hace que los cambios se
+vean aunque vengan de otro proceso (gunicorn WSGI, workers, admin).
+
+Django 4.2 no avisa a la vista cuando el cliente se desconecta y uvicorn descarta
+en silencio lo que se envía después, así que cada stream dura a lo sumo
+``LIVE_KPI_MAX_AGE``: termina con un ``retry:`` y el navegador se reconecta solo.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .services import live_kpis
+
+LIVE_KPI_INTERVAL = 2  # segundos entre consultas por empresa
+LIVE_KPI_HEARTBEAT = 15  # comentario SSE para que proxies no corten la conexión
+LIVE_KPI_MAX_AGE = 300  # segundos que vive cada stream; acota los de clientes que ya se fueron
+LIVE_KPI_RETRY = 1000  # milisegundos que espera el navegador antes de reconectarse
+
+
+def _query(company_id):
+    try:
+        return live_kpis(company_id)
+    finally:
+        close_old_connections()
+
+
+class _Subscriber:
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, values):
+        # Si el cliente va lento los deltas se combinan en vez de encolarse.
+        self.pending.update(values)
+        self.ready.set()
+
+    def take(self):
+        values, self.pending = self.pending, {}
+        self.ready.clear()
+        return values
+
+
+class _CompanyFeed:
+    def __init__(self, company_id):
+        self.company_id = company_id
+        self.subscribers = set()
+        self.values = None
+        self.task = None
+
+    async def run(self):
+        while self.subscribers:
+            try:
+                values = await sync_to_async(_query)(self.company_id)
+            except Exception:  # una caída de la base no debe terminar la tarea; se reintenta en el próximo tick
+                values = None
+            if values is not None:
+                previous = self.values or {}
+                delta = {name: value for name, value in values.items() if previous.get(name) != value}
+                self.values = values
+                if delta:
+                    for subscriber in self.subscribers:
+                        subscriber.push(delta)
+            await asyncio.sleep(LIVE_KPI_INTERVAL)
+
+
+class KpiHub:
+    """Registro de suscriptores por empresa; una instancia por proceso (``hub``)."""
+
+    def __init__(self):
+        self._feeds = {}
+
+    def subscribe(self, company_id):
+        feed = self._feeds.get(company_id)
+        if feed is None:
+            feed = self._feeds[company_id] = _CompanyFeed(company_id)
+        subscriber = _Subscriber()
+        if feed.values is not None:
+            subscriber.push(feed.values)
+        feed.subscribers.add(subscriber)
+        if feed.task is None or feed.task.done():
+            feed.task = asyncio.get_running_loop().create_task(feed.run())
+        return subscriber
+
+    def unsubscribe(self, company_id, subscriber):
+        feed = self._feeds.get(company_id)
+        if feed is None:
+            return
+        feed.subscribers.discard(subscriber)
+        if not feed.subscribers:
+            # La tarea termina sola al ver el conjunto vacío.
+            del self._feeds[company_id]
+
+    def active_companies(self):
+        return list(self._feeds)
+
+
+hub = KpiHub()
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+async def kpi_events(company_id):
+    """Generador SSE: primero el estado completo y luego solo los KPIs que cambian."""
+    subscriber = hub.subscribe(company_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LIVE_KPI_MAX_AGE
+    first = True
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield f'retry: {LIVE_KPI_RETRY}\n\n'
+                return
+            try:
+                await asyncio.wait_for(subscriber.ready.wait(), min(LIVE_KPI_HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                if loop.time() < deadline:
+                    yield ': keepalive\n\n'
+                continue
+            yield _event('snapshot' if first else 'delta', subscriber.take())
+            first = False
+    finally:
+        hub.unsubscribe(company_id, subscriber)
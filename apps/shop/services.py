@@ -0,0 +1,95 @@
+"""KPIs del dashboard: una sola consulta con subconsultas escalares, cacheada unos segundos.
+
+La clave incluye la versión de datos de la empresa (``apps.core.caching``), que ya
+avanza con productos, proveedores, sucursales, inventario, ventas y órdenes; los
+cambios del carrito borran la entrada del vendedor afectado.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.accounts.models import User
+from apps.core.caching import data_version, version_timeout
+from apps.core.dates import business_date
+from apps.core.models import Company
+from apps.inventory.models import Branch, Inventory, Product, Supplier
+from apps.sales.models import CartItem, Order, Sale
+
+DASHBOARD_CACHE_TIMEOUT = 10
+
+# KPIs por rol; los que dependen del usuario hacen que la entrada se cachee por usuario.
+ROLE_KPIS = {
+    User.ROLE_VENDEDOR: ('products', 'cart_items', 'my_sales', 'pending_orders'),
+    User.ROLE_GERENTE: ('products', 'suppliers', 'low_stock', 'sales_today', 'pending_orders'),
+}
+DEFAULT_KPIS = ('products', 'suppliers', 'branches', 'low_stock', 'sales_today', 'pending_orders')
+USER_KPIS = {'cart_items', 'my_sales'}
+LIVE_KPIS = ('sales_today', 'pending_orders', 'low_stock')
+
+
+def _count(queryset, company_field='company'):
+    return Coalesce(Subquery(
+        queryset.filter(**{company_field: OuterRef('pk')}).order_by()
+        .values(company_field).annotate(n=Count('*')).values('n')
+    ), 0)
+
+
+def _kpi_expressions(user=None):
+    expressions = {
+        'products': _count(Product.objects.all()),
+        'suppliers': _count(Supplier.objects.all()),
+        'branches': _count(Branch.objects.all()),
+        'low_stock': _count(Inventory.objects.filter(stock__lte=F('reorder_point'))),
+        'sales_today': _count(Sale.objects.filter(business_date=business_date())),
+        'pending_orders': _count(Order.objects.filter(status=Order.STATUS_PENDING)),
+    }
+    if user is not None:
+        expressions['cart_items'] = _count(CartItem.objects.filter(user=user), 'product__company')
+        expressions['my_sales'] = _count(Sale.objects.filter(seller=user))
+    return expressions
+
+
+def _kpi_row(company_id, names, user=None, **extra):
+    expressions = _kpi_expressions(user)
+    row = Company.objects.filter(pk=company_id).values(
+        # Prefijo: 'products' y 'suppliers' ya son relaciones inversas de Company.
+        **{f'kpi_{name}': expressions[name] for name in names},
+        **extra,
+    ).get()
+    return {name: row[f'kpi_{name}'] for name in names}, row
+
+
+def live_kpis(company_id):
+    """KPIs del stream en vivo del dashboard, en una consulta."""
+    return _kpi_row(company_id, LIVE_KPIS)[0]
+
+
+def dashboard_cache_key(company_id, role, user_id):
+    kpis = ROLE_KPIS.get(role, DEFAULT_KPIS)
+    owner = user_id if USER_KPIS.intersection(kpis) else 'all'
+    return f'shop:dashboard:{company_id}:{data_version(company_id)}:{role}:{owner}'
+
+
+def dashboard_kpis(company_id, user):
+    """Devuelve ``(valores, has_data)`` de los KPIs del rol de ``user``."""
+    key = dashboard_cache_key(company_id, user.role, user.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    values, row = _kpi_row(
+        company_id,
+        ROLE_KPIS.get(user.role, DEFAULT_KPIS),
+        user,
+        has_products=Exists(Product.objects.filter(company=OuterRef('pk'))),
+        has_suppliers=Exists(Supplier.objects.filter(company=OuterRef('pk'))),
+        has_inventory=Exists(Inventory.objects.filter(company=OuterRef('pk'))),
+    )
+    result = (values, bool(row['has_products'] or row['has_suppliers'] or row['has_inventory']))
+    cache.set(key, result, version_timeout(DASHBOARD_CACHE_TIMEOUT))
+    return result
+
+
+def invalidate_cart_kpis(user):
+    if user.company_id:
+        transaction.on_commit(lambda: cache.delete(dashboard_cache_key(user.company_id, user.role, user.pk)))
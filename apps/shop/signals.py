@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.caching import catalog_changed
+from apps.sales.models import CartItem
+from .edge import catalog_key, purge
+from .services import invalidate_cart_kpis
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def cart_changed(sender, instance, **kwargs):
+    invalidate_cart_kpis(instance.user)
+
+
+@receiver(catalog_changed)
+def purge_catalog_pages(sender, company_ids, **kwargs):
+    # Ya se ejecuta tras el commit (lo emite bump_catalog_version).
+    purge({catalog_key(company_id) for company_id in company_ids})
+
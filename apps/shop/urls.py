@@ -7,6 +7,7 @@ from . import views
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('dashboard/live/', views.dashboard_live, name='dashboard_live'),
     path('super-admin/', views.super_admin_dashboard, name='super_admin_dashboard'),
     path('super-admin/plans/', views.super_admin_plans, name='super_admin_plans'),
     path('super-admin/plans/<int:pk>/edit/', views.super_admin_plan_edit, name='super_admin_plan_edit'),
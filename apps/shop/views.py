@@ -4,22 +4,27 @@ from decimal import Decimal
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.db.models import F
-from django.http import Http404
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 
 from apps.accounts.models import User
 from apps.accounts.serializers import UserSerializer
-from rest_framework.exceptions import ValidationError
 
-from apps.core.access import plan_allows
 from apps.core.forms import PlanForm, SubscriptionAdminForm
 from apps.core.models import Company, Plan, PlanFeature, Subscription
-from apps.inventory.models import Branch, Inventory, InventoryMovement, Product, Supplier
+from apps.inventory.models import Branch, Product
+from apps.inventory.search import search_products
+from apps.inventory.services import InsufficientStock
 from apps.inventory.web_views import _guard_role
-from apps.sales.models import CartItem, Order, OrderItem, Sale, SaleItem
+from apps.sales.models import CartItem, Order
+from apps.sales.services import checkout_cart
+from .edge import catalog_key, edge_cache
+from .live import kpi_events
+from .services import LIVE_KPIS, dashboard_kpis
 
 
 def login_view(request):
@@ -42,33 +47,22 @@ def dashboard(request):
         messages.info(request, 'Accede al panel de Super Admin para gestionar planes y compañías.')
         return redirect('super_admin_dashboard')
 
-    company = getattr(request.user, 'company', None)
+    company = request.tenant.company
     if not company:
         context = {'missing_company': True}
         return render(request, 'dashboard.html', context)
 
-    products = Product.objects.filter(company=company)
-    suppliers = Supplier.objects.filter(company=company)
-    branches = Branch.objects.filter(company=company)
-    inventories = Inventory.objects.filter(company=company)
-    low_stock = inventories.filter(stock__lte=F('reorder_point'))
-
-    today = timezone.now().date()
-    sales_today = Sale.objects.filter(company=company, created_at__date=today)
-    pending_orders = Order.objects.filter(company=company, status=Order.STATUS_PENDING)
-
     role = request.user.role
-    has_data = products.exists() or suppliers.exists() or inventories.exists()
-
-    reports_enabled = plan_allows(request.user, 'reports')
+    values, has_data = dashboard_kpis(company.id, request.user)
+    reports_enabled = request.tenant.allows('reports')
 
     if role == User.ROLE_VENDEDOR:
-        kpis = [
-            {'title': 'Productos disponibles', 'value': products.count()},
-            {'title': 'Ítems en carrito', 'value': CartItem.objects.filter(user=request.user, product__company=company).count()},
-            {'title': 'Mis ventas', 'value': Sale.objects.filter(company=company, seller=request.user).count()},
-            {'title': 'Órdenes pendientes', 'value': pending_orders.count()},
-        ]
+        titles = {
+            'products': 'Productos disponibles',
+            'cart_items': 'Ítems en carrito',
+            'my_sales': 'Mis ventas',
+            'pending_orders': 'Órdenes pendientes',
+        }
         quick_actions = [
             {'label': 'Productos', 'url': 'shop-products'},
             {'label': 'Carro', 'url': 'shop-cart'},
@@ -76,13 +70,13 @@ def dashboard(request):
             {'label': 'Mis órdenes', 'url': 'shop_orders'},
         ]
     elif role == User.ROLE_GERENTE:
-        kpis = [
-            {'title': 'Productos', 'value': products.count()},
-            {'title': 'Proveedores', 'value': suppliers.count()},
-            {'title': 'Stock bajo', 'value': low_stock.count()},
-            {'title': 'Ventas de hoy', 'value': sales_today.count()},
-            {'title': 'Órdenes pendientes', 'value': pending_orders.count()},
-        ]
+        titles = {
+            'products': 'Productos',
+            'suppliers': 'Proveedores',
+            'low_stock': 'Stock bajo',
+            'sales_today': 'Ventas de hoy',
+            'pending_orders': 'Órdenes pendientes',
+        }
         quick_actions = [
             {'label': 'Inventario', 'url': 'inventory_by_branch'},
             {'label': 'Proveedores', 'url': 'suppliers_list'},
@@ -91,20 +85,21 @@ def dashboard(request):
         if reports_enabled:
             quick_actions.insert(2, {'label': 'Reportes', 'url': 'report_stock'})
     else:
-        kpis = [
-            {'title': 'Productos', 'value': products.count()},
-            {'title': 'Proveedores', 'value': suppliers.count()},
-            {'title': 'Sucursales', 'value': branches.count()},
-            {'title': 'Stock bajo', 'value': low_stock.count()},
-            {'title': 'Ventas de hoy', 'value': sales_today.count()},
-            {'title': 'Órdenes pendientes', 'value': pending_orders.count()},
-        ]
+        titles = {
+            'products': 'Productos',
+            'suppliers': 'Proveedores',
+            'branches': 'Sucursales',
+            'low_stock': 'Stock bajo',
+            'sales_today': 'Ventas de hoy',
+            'pending_orders': 'Órdenes pendientes',
+        }
         quick_actions = [
             {'label': 'Sucursales', 'url': 'branches_list'},
             {'label': 'Gestión de usuarios', 'url': 'user_create'},
             {'label': 'Suscripción', 'url': 'subscription_detail'},
             {'label': 'Ventas', 'url': 'sales_list'},
         ]
+    kpis = [{'name': name, 'title': title, 'value': values[name]} for name, title in titles.items()]
 
     context = {
         'company': company,
@@ -113,11 +108,33 @@ def dashboard(request):
         'role': role,
         'has_data': has_data,
         'reports_enabled': reports_enabled,
+        'live_kpis': [kpi['name'] for kpi in kpis if kpi['name'] in LIVE_KPIS],
     }
     return render(request, 'dashboard.html', context)
 
 
-@login_required
+def _live_company_id(request):
+    user = request.user
+    if not user.is_authenticated or user.role == User.ROLE_SUPER_ADMIN:
+        return None
+    company = request.tenant.company
+    return company.id if company else None
+
+
+async def dashboard_live(request):
+    """Stream SSE con los KPIs del dashboard que cambian (ventas de hoy, órdenes pendientes, stock bajo)."""
+    if not isinstance(request, ASGIRequest):
+        # Bajo WSGI un stream bloquearía un worker completo. Con 204 el EventSource deja de reconectarse.
+        return HttpResponse(status=204)
+    company_id = await sync_to_async(_live_company_id)(request)
+    if company_id is None:
+        return HttpResponseForbidden()
+    response = StreamingHttpResponse(kpi_events(company_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def _resolve_company(request):
     """
     Determina la empresa a usar para catalogos publicos.
@@ -136,8 +153,12 @@ def _resolve_company(request):
     return None
 
 
+SHOP_PAGE_SIZE = 48
+
+
 def product_list(request):
     company = _resolve_company(request)
+    query = request.GET.get('q', '').strip()
     products = Product.objects.none()
     if not company:
         if Company.objects.count() > 1:
@@ -145,10 +166,14 @@ def product_list(request):
         else:
             messages.info(request, 'No hay una empresa activa para mostrar productos.')
     else:
-        products = Product.objects.filter(company=company)
-        if not products.exists():
+        products = Product.objects.filter(company=company).order_by('name', 'pk')
+        if query:
+            products = search_products(products, query)
+        elif not products.exists():
             messages.info(request, 'No hay productos disponibles. Ejecuta "python manage.py seed_demo --reset" para cargar datos de ejemplo.')
-    return render(request, 'shop/products.html', {'products': products, 'company': company})
+    page = Paginator(products, SHOP_PAGE_SIZE).get_page(request.GET.get('page'))
+    response = render(request, 'shop/products.html', {'products': page, 'page': page, 'query': query, 'company': company})
+    return edge_cache(request, response, [catalog_key(company.id)]) if company else response
 
 
 def product_detail(request, pk):
@@ -160,7 +185,8 @@ def product_detail(request, pk):
         product = Product.objects.get(pk=pk, company=company)
     except Product.DoesNotExist as exc:
         raise Http404 from exc
-    return render(request, 'shop/product_detail.html', {'product': product, 'company': company})
+    response = render(request, 'shop/product_detail.html', {'product': product, 'company': company})
+    return edge_cache(request, response, [catalog_key(company.id)])
 
 
 @login_required
@@ -232,48 +258,12 @@ def checkout_view(request):
             messages.error(request, 'Selecciona una sucursal válida.')
         else:
             try:
-                with transaction.atomic():
-                    order = Order.objects.create(
-                        company=company,
-                        branch=selected_branch,
-                        customer_name=request.user.username or 'Cliente',
-                        customer_email=request.user.email or '',
-                        total=0,
-                    )
-                    sale = Sale.objects.create(
-                        company=company,
-                        branch=selected_branch,
-                        seller=request.user,
-                        payment_method='tienda',
-                        total=0,
-                    )
-                    running_total = Decimal('0')
-                    for ci in items.select_for_update():
-                        inventory = Inventory.objects.select_for_update().get(company=company, branch=selected_branch, product=ci.product)
-                        if inventory.stock < ci.quantity:
-                            raise ValidationError('Stock insuficiente para ' + ci.product.name)
-                        inventory.stock -= ci.quantity
-                        inventory.save()
-                        price = ci.product.price
-                        running_total += price * ci.quantity
-                        OrderItem.objects.create(order=order, product=ci.product, quantity=ci.quantity, unit_price=price)
-                        SaleItem.objects.create(sale=sale, product=ci.product, quantity=ci.quantity, unit_price=price)
-                        InventoryMovement.objects.create(
-                            company=company,
-                            branch=selected_branch,
-                            product=ci.product,
-                            movement_type=InventoryMovement.MOV_SALE,
-                            quantity_delta=-ci.quantity,
-                            reason='Checkout',
-                            created_by=request.user,
-                        )
-                    order.total = running_total
-                    order.save()
-                    sale.total = running_total
-                    sale.save()
-                    items.delete()
+                order, _ = checkout_cart(request.user, selected_branch, record_sale=True)
                 messages.success(request, f'Orden #{order.id} creada')
                 return redirect('shop_orders')
+            except InsufficientStock as exc:
+                product_names = {line['item'].product_id: line['item'].product.name for line in cart_lines}
+                messages.error(request, f"No se pudo crear la orden: Stock insuficiente para {product_names.get(exc.product_id, '')}")
             except Exception as exc:
                 detail = getattr(exc, 'detail', str(exc))
                 messages.error(request, f'No se pudo crear la orden: {detail}')
@@ -342,8 +332,8 @@ def subscription_detail(request):
     if denial:
         return denial
 
-    company = getattr(request.user, 'company', None)
-    subscription = getattr(company, 'subscription', None) if company else None
+    company = request.tenant.company
+    subscription = request.tenant.subscription
     plans = Plan.objects.filter(is_active=True).prefetch_related('features').order_by('monthly_price')
     plan_features = PlanFeature.objects.filter(plans__in=plans).distinct().order_by('label')
 
@@ -39,7 +39,9 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'apps.core.middleware.LegacySessionBackendMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.TenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,6 +78,15 @@ DATABASES = {
     }
 }
 
+# Caché compartida entre workers (entitlements de planes, etc.). En producción
+# apuntar CACHE_BACKEND a Redis/Memcached para que la invalidación alcance a todos.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'temucosoft'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,17 +101,26 @@ TIME_ZONE = 'America/Santiago'
 USE_I18N = True
 USE_TZ = True
 
+# Resultados de reportes generados en segundo plano (run_report_workers).
+REPORTS_RESULT_DIR = Path(os.environ.get('REPORTS_RESULT_DIR', BASE_DIR / 'var' / 'reports'))
+
+# Snapshots del catálogo mapeados en memoria y compartidos por los workers (apps/inventory/snapshot.py).
+# Vacío: cada proceso arma su propio índice en memoria.
+CATALOG_SNAPSHOT_DIR = os.environ.get('CATALOG_SNAPSHOT_DIR', '')
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.User'
+# Las sesiones emitidas con ModelBackend se traducen en LegacySessionBackendMiddleware.
+AUTHENTICATION_BACKENDS = ['apps.accounts.backends.TenantModelBackend']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
+        'apps.core.authentication.TenantClaimsJWTAuthentication',
+        'apps.core.authentication.TenantSessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -111,8 +131,16 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.serializers.TenantTokenObtainPairSerializer',
 }
 
+# Modo JWT sin estado: los tokens incluyen rol, company_id, estado y features del
+# plan; las lecturas de la API se autentican sin consultar la tabla de usuarios.
+JWT_TENANT_CLAIMS = os.environ.get('JWT_TENANT_CLAIMS', '0') == '1'
+
+# Endpoint PURGE del proxy (deploy/nginx.conf: http://127.0.0.1/_edge/purge). Vacío desactiva la purga.
+EDGE_PURGE_URL = os.environ.get('EDGE_PURGE_URL', '')
+
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
 LOGIN_URL = '/login/'
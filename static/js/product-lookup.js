@@ -0,0 +1,62 @@
+// Typeahead de productos: cada <input data-product-lookup> rellena el <select> de su misma celda
+// con los resultados de /api/products/lookup/ en vez de traer el catálogo completo en el HTML.
+(function () {
+  const DELAY = 200;
+  const timers = new WeakMap();
+
+  function optionLabel(product) {
+    return `${product.name} (SKU ${product.sku} · ${product.price} CLP)`;
+  }
+
+  function fill(select, products) {
+    const current = select.value;
+    const placeholder = select.options[0] && !select.options[0].value ? select.options[0] : null;
+    select.innerHTML = '';
+    if (placeholder) {
+      select.appendChild(placeholder);
+    }
+    products.forEach(product => {
+      const option = document.createElement('option');
+      option.value = product.id;
+      option.textContent = optionLabel(product);
+      select.appendChild(option);
+    });
+    if (products.length === 1) {
+      select.value = String(products[0].id);
+    } else if (products.some(product => String(product.id) === current)) {
+      select.value = current;
+    }
+  }
+
+  async function lookup(input, exact = false) {
+    const select = input.parentElement.querySelector('select');
+    const term = input.value.trim();
+    if (!select || !term) {
+      return;
+    }
+    const url = `${input.dataset.productLookup}?q=${encodeURIComponent(term)}${exact ? '&exact=1' : ''}`;
+    const response = await fetch(url, {headers: {Accept: 'application/json'}, credentials: 'same-origin'});
+    if (response.ok && input.value.trim() === term) {
+      fill(select, await response.json());
+    }
+  }
+
+  document.addEventListener('input', event => {
+    const input = event.target.closest('[data-product-lookup]');
+    if (!input) {
+      return;
+    }
+    clearTimeout(timers.get(input));
+    timers.set(input, setTimeout(() => lookup(input), DELAY));
+  });
+
+  // Los lectores de código de barras terminan con Enter: se busca el SKU exacto al instante y no se envía el formulario.
+  document.addEventListener('keydown', event => {
+    const input = event.target.closest('[data-product-lookup]');
+    if (input && event.key === 'Enter') {
+      event.preventDefault();
+      clearTimeout(timers.get(input));
+      lookup(input, true);
+    }
+  });
+})();